@@ -2,13 +2,23 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+import io
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 import urllib.parse
+import xml.etree.ElementTree as ET
 
-import feedparser
-import requests
 import re 
 
+from .http_cache import HttpCache
+from .state_store import base_arxiv_id
+
+if TYPE_CHECKING:
+    # requests 导入较慢（~100ms），只在真正发请求时才导入
+    import requests
+
 @dataclass(frozen=True)
 class ArxivPaper:
     arxiv_id: str
@@ -64,78 +74,368 @@ def build_query(categories: Iterable[str], keywords: Iterable[str]) -> str:
     return f"({cats_query}) AND ({kw_query})"
 
 
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_ARXIV = "{http://arxiv.org/schemas/atom}"
+
+
+def _entry_to_paper(entry: Any) -> ArxivPaper:
+    published = _parse_arxiv_datetime(entry.published)
+    updated = _parse_arxiv_datetime(entry.updated)
+    arxiv_id = _extract_arxiv_id(entry.id)
+    title = " ".join((entry.title or "").split())
+    summary = " ".join((entry.summary or "").split())
+    authors = [(a.name, a.get('arxiv_affiliation', '未提供')) for a in getattr(entry, "authors", []) if getattr(a, "name", None)]
+    categories = [t.term for t in getattr(entry, "tags", []) if getattr(t, "term", None)]
+
+    link_abs = None
+    link_pdf = None
+    for link in getattr(entry, "links", []) or []:
+        href = getattr(link, "href", None)
+        rel = getattr(link, "rel", None)
+        typ = getattr(link, "type", None)
+        if rel == "alternate" and href and href.startswith("http"):
+            link_abs = href
+        # pdf link tends to have type application/pdf or title "pdf"
+        if href and "pdf" in href and (typ == "application/pdf" or href.endswith(".pdf")):
+            link_pdf = href
+    if link_abs is None:
+        # fallback from id
+        link_abs = entry.id.replace("http://", "https://").replace("/abs/", "/abs/")
+
+    return ArxivPaper(
+        arxiv_id=arxiv_id,
+        title=title,
+        summary=summary,
+        authors=authors,
+        categories=categories,
+        published=published,
+        updated=updated,
+        link_abs=link_abs,
+        link_pdf=link_pdf,
+    )
+
+
+def _text(elem: ET.Element | None) -> str:
+    return (elem.text or "") if elem is not None else ""
+
+
+def _element_to_paper(entry: ET.Element) -> ArxivPaper:
+    entry_id = _text(entry.find(f"{_ATOM}id")).strip()
+    if "/api/errors" in entry_id:
+        # arXiv 把查询错误包装成一个特殊 entry 返回
+        raise ValueError(f"arXiv API error: {_text(entry.find(f'{_ATOM}summary')).strip()}")
+
+    authors: list[tuple[str, str]] = []
+    for a in entry.iterfind(f"{_ATOM}author"):
+        name = _text(a.find(f"{_ATOM}name")).strip()
+        if not name:
+            continue
+        aff = a.find(f"{_ARXIV}affiliation")
+        authors.append((name, _text(aff).strip() if aff is not None else '未提供'))
+    categories = [
+        c.get("term", "") for c in entry.iterfind(f"{_ATOM}category") if c.get("term")
+    ]
+
+    link_abs = None
+    link_pdf = None
+    for link in entry.iterfind(f"{_ATOM}link"):
+        href = link.get("href")
+        rel = link.get("rel", "alternate")
+        typ = link.get("type")
+        if rel == "alternate" and href and href.startswith("http"):
+            link_abs = href
+        if href and "pdf" in href and (typ == "application/pdf" or href.endswith(".pdf")):
+            link_pdf = href
+    if link_abs is None:
+        link_abs = entry_id.replace("http://", "https://")
+
+    return ArxivPaper(
+        arxiv_id=_extract_arxiv_id(entry_id),
+        title=" ".join(_text(entry.find(f"{_ATOM}title")).split()),
+        summary=" ".join(_text(entry.find(f"{_ATOM}summary")).split()),
+        authors=authors,
+        categories=categories,
+        published=_parse_arxiv_datetime(_text(entry.find(f"{_ATOM}published")).strip()),
+        updated=_parse_arxiv_datetime(_text(entry.find(f"{_ATOM}updated")).strip()),
+        link_abs=link_abs,
+        link_pdf=link_pdf,
+    )
+
+
+def _iter_papers_etree(body: bytes) -> Iterator[ArxivPaper]:
+    """
+    基于 iterparse 的流式解析：每个 <entry> 结束即产出 ArxivPaper，
+    并立刻从树上摘掉，内存占用与单条 entry 同阶，而不是整份 feed。
+    """
+    root: ET.Element | None = None
+    for event, elem in ET.iterparse(io.BytesIO(body), events=("start", "end")):
+        if root is None:
+            root = elem
+            continue
+        if event == "end" and elem.tag == f"{_ATOM}entry":
+            paper = _element_to_paper(elem)
+            elem.clear()
+            root.remove(elem)
+            yield paper
+
+
+def _iter_papers_feedparser(body: bytes) -> Iterator[ArxivPaper]:
+    import feedparser
+
+    for entry in feedparser.parse(body).entries:
+        yield _entry_to_paper(entry)
+
+
+def _iter_papers(body: bytes) -> Iterator[ArxivPaper]:
+    """优先走专用解析器；XML 不合法时退回 feedparser（它对脏数据更宽容）。"""
+    n = 0
+    try:
+        for paper in _iter_papers_etree(body):
+            n += 1
+            yield paper
+        return
+    except ET.ParseError as e:
+        print(f"[arxiv] fast Atom parser failed ({e}); falling back to feedparser")
+    for i, paper in enumerate(_iter_papers_feedparser(body)):
+        if i >= n:
+            yield paper
+
+
+class RateLimiter:
+    """
+    线程安全的令牌桶。arXiv API 约定每 3 秒最多 1 个请求，
+    多个并发请求线程共享同一个实例即可整体遵守该限制。
+    """
+
+    def __init__(self, interval_s: float = 3.0, burst: int = 1) -> None:
+        self.interval_s = float(interval_s)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.interval_s <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    float(self.burst), self._tokens + (now - self._last) / self.interval_s
+                )
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait_s = (1.0 - self._tokens) * self.interval_s
+            time.sleep(wait_s)
+
+
+def _get_page(
+    sess: requests.Session,
+    params: dict[str, Any],
+    limiter: RateLimiter,
+    cache: HttpCache | None,
+) -> bytes:
+    """请求一页 API 结果；经过 limiter，传入 cache 时 TTL 内直接走本地缓存（不占用 limiter）。"""
+    url = ARXIV_API_URL + "?" + urllib.parse.urlencode(params)
+    if cache is not None:
+        return cache.get(url, sess, timeout=30, before_request=limiter.acquire)
+    limiter.acquire()
+    resp = sess.get(url, timeout=30)
+    resp.raise_for_status()
+    return resp.content
+
+
+def iter_recent(
+    categories: list[str],
+    keywords: list[str] = ['Data Selection'],
+    since_hours: int = 24,
+    max_results: int = 50,
+    page_size: int = 100,
+    limiter: RateLimiter | None = None,
+    cache: HttpCache | None = None,
+    session: requests.Session | None = None,
+) -> Iterator[ArxivPaper]:
+    """
+    逐页抓取（start=0, page_size, 2*page_size, ...），每解析一页就 yield 其中的论文。
+    结果按 lastUpdatedDate 降序，遇到早于 since_hours 的条目立即停止，不再请求后续页。
+    每次请求前都经过 limiter（默认 3 秒 1 次），并发抓取时应传入共享的 limiter。
+    传入 cache 时，TTL 内的重复请求直接走本地缓存（不占用 limiter）。
+    """
+    q = build_query(categories, keywords)
+    max_results = int(max_results)
+    page_size = max(1, min(int(page_size), max_results))
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=int(since_hours))
+
+    if session is None:
+        import requests
+
+        session = requests.Session()
+    sess = session
+    limiter = limiter or RateLimiter()
+    yielded = 0
+    start = 0
+    while yielded < max_results:
+        params = {
+            "search_query": q,
+            "start": start,
+            "max_results": min(page_size, max_results - yielded),
+            "sortBy": "lastUpdatedDate", # relevance
+            "sortOrder": "descending",
+        }
+        body = _get_page(sess, params, limiter, cache)
+
+        n_entries = 0
+        for paper in _iter_papers(body):
+            n_entries += 1
+            if paper.updated < cutoff:
+                # feed is sorted desc by updated, we can stop early
+                return
+            yield paper
+            yielded += 1
+            if yielded >= max_results:
+                print(
+                    f"[arxiv] warning: reached limit={max_results} before the {since_hours}h "
+                    "cutoff; remaining entries in the window may be dropped"
+                )
+                return
+        if n_entries < params["max_results"]:
+            # 最后一页（或空页）
+            return
+        start += n_entries
+
+
 def fetch_recent(
     categories: list[str],
     keywords: list[str] = ['Data Selection'],
     since_hours: int = 24,
     max_results: int = 50,
+    cache: HttpCache | None = None,
     session: requests.Session | None = None,
 ) -> list[ArxivPaper]:
     """
     Fetch recent papers sorted by lastUpdatedDate, then filter by updated >= now - since_hours.
     """
+    return list(
+        iter_recent(
+            categories=categories,
+            keywords=keywords,
+            since_hours=since_hours,
+            max_results=max_results,
+            cache=cache,
+            session=session,
+        )
+    )
+
+def iter_recent_concurrent(
+    categories: list[str],
+    keywords: list[str] = ['Data Selection'],
+    since_hours: int = 24,
+    max_results: int = 50,
+    max_workers: int = 4,
+    page_size: int = 100,
+    limiter: RateLimiter | None = None,
+    cache: HttpCache | None = None,
+) -> Iterator[ArxivPaper]:
+    """
+    与 iter_recent 相同的单个 OR 查询与结果，但最多 max_workers 页同时在途：
+    所有请求仍经过共享的 limiter（3 秒 1 次），并发只是让每页的响应延迟与限速等待重叠。
+    页按顺序产出；某页出现早于 since_hours 的条目、不满一页或达到 max_results 时停止提交后续页，
+    已提前发出的请求（最多 max_workers - 1 个）结果丢弃。
+    只有一页（max_results <= page_size）时与 iter_recent 完全相同。
+    """
     q = build_query(categories, keywords)
-    params = {
-        "search_query": q,
-        "start": 0,
-        "max_results": int(max_results),
-        "sortBy": "lastUpdatedDate", # relevance
-        "sortOrder": "descending",
-    }
-    url = "http://export.arxiv.org/api/query?" + urllib.parse.urlencode(params)
-
-    sess = session or requests.Session()
-    resp = sess.get(url, timeout=30)
-    resp.raise_for_status()
+    max_results = int(max_results)
+    page_size = max(1, min(int(page_size), max_results))
+    n_pages = -(-max_results // page_size)
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=int(since_hours))
+    limiter = limiter or RateLimiter()
+    local = threading.local()
+    sessions: list[requests.Session] = []
+    sessions_lock = threading.Lock()
+
+    def _fetch(page: int) -> bytes:
+        sess = getattr(local, "session", None)
+        if sess is None:
+            import requests
+
+            # requests.Session 不保证线程安全，每个工作线程各用一个
+            sess = local.session = requests.Session()
+            with sessions_lock:
+                sessions.append(sess)
+        params = {
+            "search_query": q,
+            "start": page * page_size,
+            "max_results": min(page_size, max_results - page * page_size),
+            "sortBy": "lastUpdatedDate",
+            "sortOrder": "descending",
+        }
+        return _get_page(sess, params, limiter, cache)
 
-    feed = feedparser.parse(resp.text)
-    now = datetime.now(timezone.utc)
-    cutoff = now - timedelta(hours=int(since_hours))
-
-    papers: list[ArxivPaper] = []
-    for entry in feed.entries:
-        updated = _parse_arxiv_datetime(entry.updated)
-        if updated < cutoff:
-            # feed is sorted desc by updated, we can stop early
-            break
-
-        published = _parse_arxiv_datetime(entry.published)
-        arxiv_id = _extract_arxiv_id(entry.id)
-        title = " ".join((entry.title or "").split())
-        summary = " ".join((entry.summary or "").split())
-        #breakpoint()
-        authors = [(a.name, a.get('arxiv_affiliation', '未提供')) for a in getattr(entry, "authors", []) if getattr(a, "name", None)]
-        categories = [t.term for t in getattr(entry, "tags", []) if getattr(t, "term", None)]
-
-        link_abs = None
-        link_pdf = None
-        for link in getattr(entry, "links", []) or []:
-            href = getattr(link, "href", None)
-            rel = getattr(link, "rel", None)
-            typ = getattr(link, "type", None)
-            if rel == "alternate" and href and href.startswith("http"):
-                link_abs = href
-            # pdf link tends to have type application/pdf or title "pdf"
-            if href and "pdf" in href and (typ == "application/pdf" or href.endswith(".pdf")):
-                link_pdf = href
-        if link_abs is None:
-            # fallback from id
-            link_abs = entry.id.replace("http://", "https://").replace("/abs/", "/abs/")
-
-        papers.append(
-            ArxivPaper(
-                arxiv_id=arxiv_id,
-                title=title,
-                summary=summary,
-                authors=authors,
-                categories=categories,
-                published=published,
-                updated=updated,
-                link_abs=link_abs,
-                link_pdf=link_pdf,
-            )
+    workers = max(1, min(int(max_workers), n_pages))
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {page: pool.submit(_fetch, page) for page in range(workers)}
+        seen: set[str] = set()
+        yielded = 0
+        for page in range(n_pages):
+            body = pending.pop(page).result()
+            nxt = page + workers
+            if nxt < n_pages:
+                pending[nxt] = pool.submit(_fetch, nxt)
+            n_entries = 0
+            for paper in _iter_papers(body):
+                n_entries += 1
+                if paper.updated < cutoff:
+                    return
+                # 抓取期间 feed 有更新时，相邻页可能重复出现同一篇
+                bid = base_arxiv_id(paper.arxiv_id)
+                if bid in seen:
+                    continue
+                seen.add(bid)
+                yield paper
+                yielded += 1
+                if yielded >= max_results:
+                    print(
+                        f"[arxiv] warning: reached limit={max_results} before the {since_hours}h "
+                        "cutoff; remaining entries in the window may be dropped"
+                    )
+                    return
+            if n_entries < min(page_size, max_results - page * page_size):
+                return
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        for sess in sessions:
+            sess.close()
+
+
+def fetch_recent_concurrent(
+    categories: list[str],
+    keywords: list[str] = ['Data Selection'],
+    since_hours: int = 24,
+    max_results: int = 50,
+    max_workers: int = 4,
+    limiter: RateLimiter | None = None,
+    cache: HttpCache | None = None,
+    page_size: int = 100,
+) -> list[ArxivPaper]:
+    """iter_recent_concurrent 的列表版本。"""
+    return list(
+        iter_recent_concurrent(
+            categories=categories,
+            keywords=keywords,
+            since_hours=since_hours,
+            max_results=max_results,
+            max_workers=max_workers,
+            page_size=page_size,
+            limiter=limiter,
+            cache=cache,
         )
-    return papers
+    )
+
 
 if __name__ == "__main__":
     papers = fetch_recent(categories=["cs.AI", "cs.LG", "stat.ML, cs.cv"], keywords=['reinforcement learning', 'policy optimization', 'rl', 'post-training', 'alignment', 'rlhf', 'preference optimization', 'llm', 'language model', 'agent'],
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import json
+import time
+from typing import Any
+
+try:
+    import httpx
+except ImportError as e:  # pragma: no cover - 可选依赖
+    raise ImportError("DEEPSEEK_ASYNC 需要 httpx：pip install 'httpx[http2]'") from e
+
+from .deepseek_client import DeepSeekResponse
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Retry-After 可以是秒数，也可以是 HTTP-date。"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (dt - datetime.now(timezone.utc)).total_seconds())
+
+
+class _Throttled(httpx.HTTPStatusError):
+    """429，带上解析出的 Retry-After。"""
+
+    def __init__(self, retry_after: float | None, message: str, **kwargs: Any) -> None:
+        super().__init__(message, **kwargs)
+        self.retry_after = retry_after
+
+
+class AdaptiveRateLimiter:
+    """
+    所有并发请求共享的自适应限速器（AIMD）：
+    - 正常情况下不限速；
+    - 收到 429 时请求间隔翻倍（至少 min_interval_s），并按 Retry-After 暂停所有请求；
+    - 之后每次成功把间隔缩小 10%，逐步恢复吞吐。
+    """
+
+    def __init__(self, min_interval_s: float = 0.5, max_interval_s: float = 30.0) -> None:
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.interval_s = 0.0
+        self._pause_until = 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._pause_until, self._next_slot)
+            self._next_slot = start + self.interval_s
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def on_throttled(self, retry_after_s: float | None) -> None:
+        self.interval_s = min(self.max_interval_s, max(self.min_interval_s, self.interval_s * 2))
+        if retry_after_s:
+            self._pause_until = max(self._pause_until, time.monotonic() + retry_after_s)
+
+    def on_success(self) -> None:
+        self.interval_s *= 0.9
+        if self.interval_s < 0.05:
+            self.interval_s = 0.0
+
+
+class AsyncDeepSeekClient:
+    """
+    DeepSeekClient 的 asyncio 版本：
+    - 一个 httpx.AsyncClient 连接池（有 h2 时走 HTTP/2，多个请求复用同一条连接）；
+    - 与同步版相同的指数退避重试；429 时遵守 Retry-After，并通过共享限速器让所有并发请求一起降速；
+    - stream / max_tokens / time_budget_s 的语义与同步版一致（SSE 边收边拼接，超出预算返回已收到的部分）。
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.deepseek.com",
+        model: str = "deepseek-chat",
+        timeout_s: int = 60,
+        max_retries: int = 3,
+        max_connections: int = 4,
+        limiter: AdaptiveRateLimiter | None = None,
+        keep_raw: bool = False,
+        stream: bool = False,
+        max_tokens: int | None = None,
+        time_budget_s: float | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self.stream = stream
+        self.max_tokens = max_tokens
+        self.time_budget_s = time_budget_s
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.keep_raw = keep_raw
+        self._client = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=timeout_s,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+        )
+
+    async def __aenter__(self) -> AsyncDeepSeekClient:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _read_stream(self, resp: httpx.Response, deadline: float | None) -> DeepSeekResponse:
+        """与 DeepSeekClient._read_stream 相同的 SSE 解析。"""
+        pieces: list[str] = []
+        chunks: list[dict[str, Any]] = []
+        truncated = False
+        async for line in resp.aiter_lines():
+            if deadline is not None and time.monotonic() > deadline:
+                truncated = True
+                break
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if self.keep_raw:
+                chunks.append(chunk)
+            choice = (chunk.get("choices") or [{}])[0]
+            delta = choice.get("delta", {}).get("content")
+            if delta:
+                pieces.append(delta)
+            if choice.get("finish_reason") == "length":
+                truncated = True
+        return DeepSeekResponse(
+            content="".join(pieces).strip(),
+            raw={"chunks": chunks} if self.keep_raw else None,
+            truncated=truncated,
+        )
+
+    def _check_status(self, resp: httpx.Response, text: str) -> None:
+        """429 / 5xx 抛出可重试的异常（429 的 Retry-After 秒数随 _Throttled 传出）。"""
+        if resp.status_code == 429:
+            retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+            self.limiter.on_throttled(retry_after)
+            raise _Throttled(
+                retry_after,
+                f"DeepSeek 429: {text[:2000]}",
+                request=resp.request,
+                response=resp,
+            )
+        if resp.status_code >= 500:
+            raise httpx.HTTPStatusError(
+                f"DeepSeek 5xx: {resp.status_code} {text[:2000]}",
+                request=resp.request,
+                response=resp,
+            )
+        resp.raise_for_status()
+
+    async def chat(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float = 0.2,
+        response_format: dict[str, str] | None = None,
+        max_tokens: int | None = None,
+        time_budget_s: float | None = None,
+    ) -> DeepSeekResponse:
+        max_tokens = max_tokens or self.max_tokens
+        time_budget_s = time_budget_s or self.time_budget_s
+        url = f"{self.base_url}/v1/chat/completions"
+        payload: dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        if max_tokens:
+            payload["max_tokens"] = int(max_tokens)
+        if self.stream:
+            payload["stream"] = True
+        body = json.dumps(payload).encode("utf-8")
+        deadline = time.monotonic() + time_budget_s if time_budget_s else None
+
+        last_err: Exception | None = None
+        for attempt in range(1, self.max_retries + 1):
+            retry_after: float | None = None
+            timeout: float = self.timeout_s
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = min(timeout, remaining)
+            try:
+                await self.limiter.acquire()
+                if self.stream:
+                    async with self._client.stream("POST", url, content=body, timeout=timeout) as resp:
+                        if resp.status_code >= 400:
+                            await resp.aread()
+                            self._check_status(resp, resp.text)
+                        result = await self._read_stream(resp, deadline)
+                    self.limiter.on_success()
+                    if result.truncated and not result.content:
+                        raise TimeoutError("DeepSeek stream exceeded time budget before any output")
+                    return result
+                resp = await self._client.post(url, content=body, timeout=timeout)
+                self._check_status(resp, resp.text)
+                raw: dict[str, Any] = resp.json()
+                self.limiter.on_success()
+                choice = raw.get("choices", [{}])[0]
+                content = choice.get("message", {}).get("content", "").strip()
+                return DeepSeekResponse(
+                    content=content,
+                    raw=raw if self.keep_raw else None,
+                    truncated=choice.get("finish_reason") == "length",
+                )
+            except Exception as e:  # noqa: BLE001
+                last_err = e
+                if isinstance(e, _Throttled):
+                    retry_after = e.retry_after
+                if attempt == self.max_retries:
+                    break
+                # 指数退避 + 抖动；429 时至少等到 Retry-After，但不超过时间预算
+                sleep_s = max(min(8.0, 0.8 * (2 ** (attempt - 1))) + (0.05 * attempt), retry_after or 0.0)
+                if deadline is not None:
+                    sleep_s = min(sleep_s, max(0.0, deadline - time.monotonic()))
+                await asyncio.sleep(sleep_s)
+        if last_err is None:
+            raise TimeoutError(f"DeepSeek time budget {time_budget_s}s exhausted")
+        raise last_err
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+from datetime import datetime
+import hashlib
+import json
+import os
+import threading
+from typing import Any
+
+from .arxiv_client import ArxivPaper
+from .filtering import FilterResult
+
+
+def paper_to_dict(p: ArxivPaper) -> dict[str, Any]:
+    d = asdict(p)
+    d["published"] = p.published.isoformat()
+    d["updated"] = p.updated.isoformat()
+    return d
+
+
+def paper_from_dict(d: dict[str, Any]) -> ArxivPaper:
+    return ArxivPaper(
+        arxiv_id=d["arxiv_id"],
+        title=d["title"],
+        summary=d["summary"],
+        authors=[(a[0], a[1]) for a in d.get("authors", [])],
+        categories=list(d.get("categories", [])),
+        published=datetime.fromisoformat(d["published"]),
+        updated=datetime.fromisoformat(d["updated"]),
+        link_abs=d["link_abs"],
+        link_pdf=d.get("link_pdf"),
+    )
+
+
+def result_to_dict(r: FilterResult) -> dict[str, Any]:
+    return {
+        "paper": paper_to_dict(r.paper),
+        "score": r.score,
+        "matched_keywords": r.matched_keywords,
+        "relevance": r.relevance,
+    }
+
+
+def result_from_dict(d: dict[str, Any]) -> FilterResult:
+    return FilterResult(
+        paper=paper_from_dict(d["paper"]),
+        score=int(d["score"]),
+        matched_keywords=list(d["matched_keywords"]),
+        relevance=float(d.get("relevance", 0.0)),
+    )
+
+
+def run_key(date_local: str, parts: dict[str, Any]) -> str:
+    """同一天、影响选文的配置不变时 key 相同；不同的 key 不会复用旧检查点。"""
+    raw = json.dumps([date_local, parts], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class RunCheckpoint:
+    """
+    单次运行的检查点，追加写入的 JSONL 文件，每完成一步写一条记录：
+      {"kind": "header", "run_key": "..."}
+      {"kind": "fetched", "papers": [...]}                 # 抓取结果
+      {"kind": "selected", "results": [...]}               # 过滤/排序/去重后的待发送列表
+      {"kind": "summary", "arxiv_id": "...", "summary": "..."}  # 每篇总结完成即写入
+      {"kind": "mailed", "profile": ""}                    # 该订阅的邮件已发出，只差保存 state
+    resume=True 且 run_key 一致时加载已有记录并跳过已完成的步骤；否则清空重来。
+    进程在写入中途被杀时最后一行可能不完整，加载时忽略。state 保存成功后调用 clear() 删除文件。
+    """
+
+    def __init__(self, path: str, key: str, resume: bool = False) -> None:
+        self.path = path
+        self.key = key
+        self.papers: list[ArxivPaper] | None = None
+        self.selected: list[FilterResult] | None = None
+        self.summaries: dict[str, str] = {}
+        self.mailed: set[str] = set()  # 已发出邮件的 profile 名（单订阅模式为 ""）
+        self.resumed = False
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            self.resumed = self._load()
+            if not self.resumed:
+                print(f"[checkpoint] {path} belongs to another run; starting fresh")
+        if not self.resumed:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"kind": "header", "run_key": key}) + "\n")
+
+    def _load(self) -> bool:
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        records: list[dict[str, Any]] = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+        if not records or records[0].get("kind") != "header" or records[0].get("run_key") != self.key:
+            return False
+        for rec in records[1:]:
+            kind = rec.get("kind")
+            if kind == "fetched":
+                self.papers = [paper_from_dict(d) for d in rec["papers"]]
+            elif kind == "selected":
+                self.selected = [result_from_dict(d) for d in rec["results"]]
+            elif kind == "summary":
+                self.summaries[rec["arxiv_id"]] = rec["summary"]
+            elif kind == "mailed":
+                self.mailed.add(rec.get("profile", ""))
+        # 截断不完整的尾行，后续追加的记录才能被正常读回
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.writelines(lines[: len(records)])
+        return True
+
+    def _append(self, rec: dict[str, Any]) -> None:
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def save_fetched(self, papers: list[ArxivPaper]) -> None:
+        self.papers = list(papers)
+        self._append({"kind": "fetched", "papers": [paper_to_dict(p) for p in papers]})
+
+    def save_selected(self, results: list[FilterResult]) -> None:
+        self.selected = list(results)
+        self._append({"kind": "selected", "results": [result_to_dict(r) for r in results]})
+
+    def add_summary(self, arxiv_id: str, summary: str) -> None:
+        with self._lock:
+            self.summaries[arxiv_id] = summary
+        self._append({"kind": "summary", "arxiv_id": arxiv_id, "summary": summary})
+
+    def mark_mailed(self, profile: str = "") -> None:
+        self.mailed.add(profile)
+        self._append({"kind": "mailed", "profile": profile})
+
+    def describe(self) -> str:
+        return (
+            f"fetched={'-' if self.papers is None else len(self.papers)} "
+            f"selected={'-' if self.selected is None else len(self.selected)} "
+            f"summaries={len(self.summaries)} mailed={len(self.mailed)}"
+        )
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,298 @@
+"""
+命令行入口：python -m app <command>
+
+  run        完整流程（抓取 -> 过滤 -> 总结 -> 渲染 -> 发送），等价于 python -m app.main
+  fetch      抓取 arXiv，输出论文 JSONL
+  filter     关键词过滤 / BM25 排序 / 按 state 去重，输出待发送列表 JSONL
+  summarize  调用 DeepSeek 总结，输出带 summary 的 JSONL
+  render     渲染日报，输出邮件 JSONL（每行一封）
+  send       发送 render 的输出并更新 state；--drain 只补发 outbox 里遗留的邮件
+  config     把当前解析出的配置导出为快照文件（CONFIG_SNAPSHOT=<文件> 可原样复用）
+
+各步骤之间用 JSONL 衔接，-i/-o 省略或为 "-" 时读 stdin / 写 stdout（此时进度日志改写到 stderr），
+例如：python -m app fetch | python -m app filter | python -m app summarize | python -m app render | python -m app send
+每个子命令只在执行时导入自己用到的模块：send 不会导入 requests/numpy，fetch 不会导入 smtplib/asyncio。
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+from contextlib import redirect_stdout
+import json
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+if TYPE_CHECKING:
+    from .config import Config
+    from .filtering import FilterResult
+    from .state_store import SqliteStateStore, StateStore
+
+
+def _read_jsonl(path: str) -> Iterator[dict[str, Any]]:
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _write_jsonl(path: str, records: list[dict[str, Any]]) -> None:
+    f = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+    try:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        f.flush()
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def _load(args: argparse.Namespace) -> Config:
+    from dataclasses import replace
+
+    from .config import load_config
+
+    cfg = load_config(args.config, validate=True)
+    if args.profile:
+        prof = next((p for p in cfg.profiles if p.name == args.profile), None)
+        if prof is None:
+            raise SystemExit(f"未知的 profile: {args.profile}（可选: {[p.name for p in cfg.profiles]}）")
+        # 单步命令按单一订阅运行：用该订阅的类别/关键词/收件人/state 覆盖全局配置
+        cfg = replace(
+            cfg,
+            arxiv_categories=prof.arxiv_categories,
+            keywords=prof.keywords,
+            mail_to=prof.mail_to,
+            state_path=prof.state_path,
+            mail_subject_prefix=prof.mail_subject_prefix,
+            profiles=[],
+        )
+    elif cfg.profiles:
+        raise SystemExit("已配置多订阅（profiles），单步命令需要用 --profile 指定其中一个；完整流程请用 run")
+    return cfg
+
+
+def _open_state(cfg: Config) -> StateStore | SqliteStateStore:
+    from .state_store import open_state_store
+
+    return open_state_store(
+        cfg.state_path,
+        cfg.state_backend,
+        journal_compact_bytes=cfg.state_journal_max_kb * 1024,
+    )
+
+
+def _read_results(path: str) -> tuple[list[FilterResult], dict[str, str], list[str]]:
+    """读取 filter / summarize 的输出：待发送列表、已有的总结、总结失败的说明。"""
+    from .checkpoint import result_from_dict
+
+    results: list[FilterResult] = []
+    summaries: dict[str, str] = {}
+    failed: list[str] = []
+    for rec in _read_jsonl(path):
+        if "failed" in rec:
+            failed.append(rec["failed"])
+            continue
+        r = result_from_dict(rec)
+        results.append(r)
+        if rec.get("summary"):
+            summaries[r.paper.arxiv_id] = rec["summary"]
+    return results, summaries, failed
+
+
+def _cmd_run(args: argparse.Namespace) -> None:
+    from .main import main as run_main
+
+    code = run_main(["--config", args.config] + (["--resume"] if args.resume else []))
+    if code:
+        raise SystemExit(code)
+
+
+def _cmd_fetch(args: argparse.Namespace) -> list[dict[str, Any]]:
+    from .checkpoint import paper_to_dict
+    from .main import _fetch_all
+
+    cfg = _load(args)
+    return [paper_to_dict(p) for p in _fetch_all(cfg)]
+
+
+def _cmd_filter(args: argparse.Namespace) -> list[dict[str, Any]]:
+    from .checkpoint import paper_from_dict, result_to_dict
+    from .main import _requeue_undelivered, _select, _update_corpus_stats
+
+    cfg = _load(args)
+    papers = [paper_from_dict(d) for d in _read_jsonl(args.input)]
+    # 语料统计只在内存里更新，由 run 在 state 保存后落盘
+    corpus_stats = _update_corpus_stats(cfg, papers, cfg.keywords)
+    state = _open_state(cfg)
+    _requeue_undelivered(cfg, state, args.profile)
+    selected = _select(cfg, state, papers, cfg.keywords, corpus_stats)
+    return [result_to_dict(r) for r in selected]
+
+
+def _cmd_summarize(args: argparse.Namespace) -> list[dict[str, Any]]:
+    from .checkpoint import result_to_dict
+    from .main import _summarize
+
+    cfg = _load(args)
+    results, _, _ = _read_results(args.input)
+    summaries, failed = _summarize(cfg, results, time.monotonic())
+    records = []
+    for r in results:
+        rec = result_to_dict(r)
+        rec["summary"] = summaries.get(r.paper.arxiv_id)
+        records.append(rec)
+    records.extend({"failed": msg} for msg in failed)
+    return records
+
+
+def _cmd_render(args: argparse.Namespace) -> list[dict[str, Any]]:
+    from .main import _local_date, _render
+
+    cfg = _load(args)
+    results, summaries, failed = _read_results(args.input)
+    digests = _render(cfg, results, summaries, failed, args.date or _local_date(cfg))
+    # 每封都带上整份日报的论文列表，send 全部发出后据此更新 state
+    sent = [[r.paper.arxiv_id, r.paper.updated.isoformat()] for r in results]
+    print(f"[render] {len(results)} entries -> {len(digests)} message(s)")
+    return [
+        {
+            "subject": d.subject,
+            "text": d.text,
+            "html": d.html,
+            "attachments": [
+                {
+                    "filename": a.filename,
+                    "content_type": a.content_type,
+                    "data": base64.b64encode(a.data).decode("ascii"),
+                }
+                for a in d.attachments
+            ],
+            "sent": sent,
+        }
+        for d in digests
+    ]
+
+
+def _cmd_send(args: argparse.Namespace) -> None:
+    from .main import _confirm_delivered, _mail_dispatch, _send
+
+    cfg = _load(args)
+    if args.drain:
+        if not cfg.mail_outbox_dir:
+            raise SystemExit("--drain 需要配置 MAIL_OUTBOX_DIR")
+        if cfg.dry_run:
+            print("[dry_run] enabled: outbox left untouched")
+            return
+        # 启动投递线程即会补发遗留邮件，退出时等待投递完成，再确认 state 里对应的 queued 条目
+        with _mail_dispatch(cfg) as dispatcher:
+            pass
+        _confirm_delivered(dispatcher, {args.profile: _open_state(cfg)})
+        return
+
+    from .renderer import Attachment, RenderedEmail
+
+    digests: list[RenderedEmail] = []
+    sent: dict[str, str] = {}
+    for rec in _read_jsonl(args.input):
+        digests.append(
+            RenderedEmail(
+                subject=rec["subject"],
+                text=rec["text"],
+                html=rec["html"],
+                attachments=[
+                    Attachment(a["filename"], a["content_type"], base64.b64decode(a["data"]))
+                    for a in rec.get("attachments", [])
+                ],
+            )
+        )
+        sent.update((arxiv_id, updated_iso) for arxiv_id, updated_iso in rec.get("sent", []))
+    if not digests:
+        print("[mail] nothing to send")
+        return
+    state = _open_state(cfg)
+    with _mail_dispatch(cfg) as dispatcher:
+        _send(cfg, state, digests, list(sent.items()), profile=args.profile, dispatcher=dispatcher)
+    _confirm_delivered(dispatcher, {args.profile: state})
+
+
+def _cmd_config(args: argparse.Namespace) -> None:
+    from .config import load_config, validate_config, write_snapshot
+
+    cfg = load_config(args.config)
+    error = None
+    try:
+        validate_config(cfg)
+    except ValueError as e:
+        error = str(e)
+    write_snapshot(args.path, cfg, error)
+    print(f"[config] snapshot written to {args.path}" + (f" (invalid: {error})" if error else ""))
+
+
+_COMMANDS: dict[str, Callable[[argparse.Namespace], list[dict[str, Any]] | None]] = {
+    "run": _cmd_run,
+    "fetch": _cmd_fetch,
+    "filter": _cmd_filter,
+    "summarize": _cmd_summarize,
+    "render": _cmd_render,
+    "send": _cmd_send,
+    "config": _cmd_config,
+}
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app")
+    parser.add_argument("-c", "--config", default="config.yaml", help="配置文件路径（默认 config.yaml）")
+    parser.add_argument("--profile", default="", help="多订阅时，单步命令按哪个订阅运行")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="完整流程，等价于 python -m app.main")
+    p.add_argument("--resume", action="store_true", help="从检查点继续上一次中断的运行")
+
+    p = sub.add_parser("fetch", help="抓取 arXiv，输出论文 JSONL")
+    p.add_argument("-o", "--output", default="-")
+
+    p = sub.add_parser("filter", help="过滤/排序/按 state 去重，输出待发送列表 JSONL")
+    p.add_argument("-i", "--input", default="-")
+    p.add_argument("-o", "--output", default="-")
+
+    p = sub.add_parser("summarize", help="调用 DeepSeek 总结，输出带 summary 的 JSONL")
+    p.add_argument("-i", "--input", default="-")
+    p.add_argument("-o", "--output", default="-")
+
+    p = sub.add_parser("render", help="渲染日报，输出邮件 JSONL")
+    p.add_argument("-i", "--input", default="-")
+    p.add_argument("-o", "--output", default="-")
+    p.add_argument("--date", default="", help="标题里的日期（默认按 TIMEZONE 取今天）")
+
+    p = sub.add_parser("send", help="发送 render 的输出并更新 state")
+    p.add_argument("-i", "--input", default="-")
+    p.add_argument("--drain", action="store_true", help="只补发 MAIL_OUTBOX_DIR 里遗留的邮件")
+
+    p = sub.add_parser("config", help="导出当前配置的快照（不含密钥）")
+    p.add_argument("path", help="快照文件路径，之后用 CONFIG_SNAPSHOT=<path> 复用")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    output = getattr(args, "output", None)
+    if output == "-":
+        # stdout 留给 JSONL，进度日志改写到 stderr
+        with redirect_stdout(sys.stderr):
+            records = _COMMANDS[args.command](args)
+    else:
+        records = _COMMANDS[args.command](args)
+    if output is not None:
+        _write_jsonl(output, records or [])
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
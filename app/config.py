@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field, replace
+import hashlib
+import json
 import os
 from typing import Any
 
-import yaml
-
 
 def _getenv_bool(name: str, default: bool) -> bool:
     raw = os.getenv(name)
@@ -30,6 +30,18 @@ def _getenv_str(name: str, default: str | None = None) -> str | None:
     return raw if raw != "" else default
 
 
+@dataclass(frozen=True)
+class Profile:
+    """一组订阅：自己的关键词/类别/收件人/state，与其他订阅共享一次抓取和总结。"""
+
+    name: str
+    arxiv_categories: list[str]
+    keywords: list[str]
+    mail_to: list[str]
+    state_path: str
+    mail_subject_prefix: str
+
+
 @dataclass(frozen=True)
 class Config:
     # arXiv
@@ -37,10 +49,18 @@ class Config:
     since_hours: int
     limit: int
     keywords: list[str]
+    keyword_boundary: str  # none | left | both
+    rank_top_k: int  # 0 = 不排序截断，命中任一关键词即处理
+    rank_stats_path: str
+    fetch_concurrency: int  # 1 = 逐页顺序请求；>1 = 同一查询最多这么多页同时在途（共享限速）
+    arxiv_cache_dir: str
+    arxiv_cache_ttl_s: int
+    arxiv_cache_max_mb: int  # 0 = 关闭缓存
 
     # State
     state_path: str
-    state_backend: str  # repo | cache (for future)
+    state_backend: str  # repo | cache (for future) | journal | sqlite
+    state_journal_max_kb: int
     resend_on_update: bool
 
     # DeepSeek
@@ -49,6 +69,23 @@ class Config:
     deepseek_model: str
     deepseek_timeout_s: int
     deepseek_max_retries: int
+    deepseek_concurrency: int
+    deepseek_stream: bool
+    deepseek_max_tokens: int  # 0 = 不限制
+    deepseek_time_budget_s: int  # 0 = 不限制；单篇（含重试）的总时间上限
+    summary_batch_size: int  # 1 = 每篇单独请求
+    summary_batch_max_tokens: int
+    run_token_budget: int  # 0 = 不限；单次运行总结的预估 token 上限
+    run_time_budget_s: int  # 0 = 不限；从启动算起，超时后不再发起新的总结请求
+    deepseek_async: bool  # True = httpx 异步客户端（连接池/HTTP2、429 自适应限速）
+    summary_cache_dir: str
+    summary_cache_max_entries: int  # 0 = 关闭缓存
+    summary_cache_max_age_days: int
+
+    # Pipeline
+    pipeline_mode: str  # phased | staged
+    pipeline_queue_size: int
+    checkpoint_path: str  # 空字符串 = 不写检查点
 
     # Mail
     dry_run: bool
@@ -60,11 +97,20 @@ class Config:
     smtp_starttls: bool
     mail_from: str | None
     mail_to: list[str]
+    mail_per_recipient: bool  # True = 每个收件人单独一封（复用同一 SMTP 连接）
+    mail_outbox_dir: str  # 空字符串 = 同步发送；否则先写入 outbox 再由后台线程投递
+    mail_outbox_max_attempts: int
+    mail_dispatch_wait_s: int  # 退出前等待后台投递的最长时间，0 = 一直等
+    mail_max_bytes: int  # 0 = 不限；正文（文本 + HTML）的字节上限
+    mail_oversize_mode: str  # split | attach
 
     # Rendering
     mail_subject_prefix: str
     timezone: str
 
+    # 多订阅（config.yaml 的 profiles）；为空时按上面的单一配置运行
+    profiles: list[Profile] = field(default_factory=list)
+
 
 DEFAULT_KEYWORDS = [
     # RL / optimization
@@ -93,9 +139,12 @@ DEFAULT_KEYWORDS = [
 ]
 
 
-def load_config(config_path: str = "config.yaml") -> Config:
+def _build_config(config_path: str) -> Config:
     file_cfg: dict[str, Any] = {}
     if os.path.exists(config_path):
+        # 没有配置文件时（例如只用环境变量的 CI）不必导入 yaml
+        import yaml
+
         with open(config_path, "r", encoding="utf-8") as f:
             file_cfg = yaml.safe_load(f) or {}
 
@@ -104,6 +153,12 @@ def load_config(config_path: str = "config.yaml") -> Config:
     deepseek_cfg = file_cfg.get("deepseek", {})
     mail_cfg = file_cfg.get("mail", {})
     render_cfg = file_cfg.get("render", {})
+    pipeline_cfg = file_cfg.get("pipeline", {})
+    checkpoint_path = _getenv_str(
+        "CHECKPOINT_PATH", pipeline_cfg.get("checkpoint_path", "data/cache/checkpoint.jsonl")
+    ) or ""
+    if checkpoint_path.lower() in {"off", "none", "0"}:
+        checkpoint_path = ""
 
     categories = (
         _getenv_str("ARXIV_CATEGORIES")
@@ -120,15 +175,47 @@ def load_config(config_path: str = "config.yaml") -> Config:
     mail_to_raw = _getenv_str("MAIL_TO") or ",".join(mail_cfg.get("to", []))
     mail_to = [x.strip() for x in mail_to_raw.split(",") if x.strip()]
 
+    subject_prefix = _getenv_str(
+        "MAIL_SUBJECT_PREFIX", render_cfg.get("subject_prefix", "[arXiv日报]")
+    ) or "[arXiv日报]"
+    state_path = _getenv_str("STATE_PATH", state_cfg.get("path", "data/state.json")) or "data/state.json"
+    profiles = _load_profiles(
+        file_cfg.get("profiles") or [], arxiv_categories, keywords, mail_to, state_path, subject_prefix
+    )
+
     return Config(
         arxiv_categories=arxiv_categories,
         since_hours=_getenv_int("SINCE_HOURS", int(arxiv_cfg.get("since_hours", 24))),
         limit=_getenv_int("LIMIT", int(arxiv_cfg.get("limit", 50))),
         keywords=keywords,
-        state_path=_getenv_str("STATE_PATH", state_cfg.get("path", "data/state.json"))
-        or "data/state.json",
+        keyword_boundary=_getenv_str(
+            "KEYWORD_BOUNDARY", arxiv_cfg.get("keyword_boundary", "left")
+        )
+        or "left",
+        rank_top_k=_getenv_int("RANK_TOP_K", int(arxiv_cfg.get("rank_top_k", 0))),
+        rank_stats_path=_getenv_str(
+            "RANK_STATS_PATH", arxiv_cfg.get("rank_stats_path", "data/corpus_stats.json")
+        )
+        or "data/corpus_stats.json",
+        fetch_concurrency=_getenv_int(
+            "FETCH_CONCURRENCY", int(arxiv_cfg.get("fetch_concurrency", 1))
+        ),
+        arxiv_cache_dir=_getenv_str(
+            "ARXIV_CACHE_DIR", arxiv_cfg.get("cache_dir", "data/cache/arxiv")
+        )
+        or "data/cache/arxiv",
+        arxiv_cache_ttl_s=_getenv_int(
+            "ARXIV_CACHE_TTL_S", int(arxiv_cfg.get("cache_ttl_s", 3600))
+        ),
+        arxiv_cache_max_mb=_getenv_int(
+            "ARXIV_CACHE_MAX_MB", int(arxiv_cfg.get("cache_max_mb", 64))
+        ),
+        state_path=state_path,
         state_backend=_getenv_str("STATE_BACKEND", state_cfg.get("backend", "repo"))
         or "repo",
+        state_journal_max_kb=_getenv_int(
+            "STATE_JOURNAL_MAX_KB", int(state_cfg.get("journal_max_kb", 256))
+        ),
         resend_on_update=_getenv_bool(
             "RESEND_ON_UPDATE", bool(state_cfg.get("resend_on_update", False))
         ),
@@ -147,6 +234,45 @@ def load_config(config_path: str = "config.yaml") -> Config:
         deepseek_max_retries=_getenv_int(
             "DEEPSEEK_MAX_RETRIES", int(deepseek_cfg.get("max_retries", 3))
         ),
+        deepseek_concurrency=_getenv_int(
+            "DEEPSEEK_CONCURRENCY", int(deepseek_cfg.get("concurrency", 4))
+        ),
+        deepseek_stream=_getenv_bool("DEEPSEEK_STREAM", bool(deepseek_cfg.get("stream", False))),
+        deepseek_max_tokens=_getenv_int(
+            "DEEPSEEK_MAX_TOKENS", int(deepseek_cfg.get("max_tokens", 0))
+        ),
+        deepseek_time_budget_s=_getenv_int(
+            "DEEPSEEK_TIME_BUDGET_S", int(deepseek_cfg.get("time_budget_s", 0))
+        ),
+        summary_batch_size=_getenv_int(
+            "SUMMARY_BATCH_SIZE", int(deepseek_cfg.get("batch_size", 1))
+        ),
+        summary_batch_max_tokens=_getenv_int(
+            "SUMMARY_BATCH_MAX_TOKENS", int(deepseek_cfg.get("batch_max_tokens", 12000))
+        ),
+        run_token_budget=_getenv_int(
+            "RUN_TOKEN_BUDGET", int(deepseek_cfg.get("run_token_budget", 0))
+        ),
+        run_time_budget_s=_getenv_int(
+            "RUN_TIME_BUDGET_S", int(deepseek_cfg.get("run_time_budget_s", 0))
+        ),
+        deepseek_async=_getenv_bool("DEEPSEEK_ASYNC", bool(deepseek_cfg.get("async", False))),
+        summary_cache_dir=_getenv_str(
+            "SUMMARY_CACHE_DIR", deepseek_cfg.get("cache_dir", "data/cache/summaries")
+        )
+        or "data/cache/summaries",
+        summary_cache_max_entries=_getenv_int(
+            "SUMMARY_CACHE_MAX_ENTRIES", int(deepseek_cfg.get("cache_max_entries", 2000))
+        ),
+        summary_cache_max_age_days=_getenv_int(
+            "SUMMARY_CACHE_MAX_AGE_DAYS", int(deepseek_cfg.get("cache_max_age_days", 30))
+        ),
+        pipeline_mode=_getenv_str("PIPELINE_MODE", pipeline_cfg.get("mode", "phased"))
+        or "phased",
+        pipeline_queue_size=_getenv_int(
+            "PIPELINE_QUEUE_SIZE", int(pipeline_cfg.get("queue_size", 16))
+        ),
+        checkpoint_path=checkpoint_path,
         dry_run=_getenv_bool("DRY_RUN", bool(mail_cfg.get("dry_run", False))),
         smtp_host=_getenv_str("SMTP_HOST", mail_cfg.get("smtp_host")),
         smtp_port=_getenv_int("SMTP_PORT", int(mail_cfg.get("smtp_port", 587))),
@@ -158,15 +284,63 @@ def load_config(config_path: str = "config.yaml") -> Config:
         ),
         mail_from=_getenv_str("MAIL_FROM", mail_cfg.get("from")),
         mail_to=mail_to,
-        mail_subject_prefix=_getenv_str(
-            "MAIL_SUBJECT_PREFIX", render_cfg.get("subject_prefix", "[arXiv日报]")
+        mail_per_recipient=_getenv_bool(
+            "MAIL_PER_RECIPIENT", bool(mail_cfg.get("per_recipient", False))
+        ),
+        mail_outbox_dir=_getenv_str("MAIL_OUTBOX_DIR", mail_cfg.get("outbox_dir", "")) or "",
+        mail_outbox_max_attempts=_getenv_int(
+            "MAIL_OUTBOX_MAX_ATTEMPTS", int(mail_cfg.get("outbox_max_attempts", 5))
+        ),
+        mail_dispatch_wait_s=_getenv_int(
+            "MAIL_DISPATCH_WAIT_S", int(mail_cfg.get("dispatch_wait_s", 120))
+        ),
+        mail_max_bytes=_getenv_int("MAIL_MAX_BYTES", int(mail_cfg.get("max_bytes", 0))),
+        mail_oversize_mode=_getenv_str(
+            "MAIL_OVERSIZE_MODE", mail_cfg.get("oversize_mode", "split")
         )
-        or "[arXiv日报]",
+        or "split",
+        mail_subject_prefix=subject_prefix,
         timezone=_getenv_str("TIMEZONE", render_cfg.get("timezone", "Asia/Shanghai"))
         or "Asia/Shanghai",
+        profiles=profiles,
     )
 
 
+def _as_list(value: Any) -> list[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(x).strip() for x in value or [] if str(x).strip()]
+
+
+def _load_profiles(
+    raw: list[dict[str, Any]],
+    categories: list[str],
+    keywords: list[str],
+    mail_to: list[str],
+    state_path: str,
+    subject_prefix: str,
+) -> list[Profile]:
+    """
+    profiles 中未填写的字段沿用顶层配置；state 默认放在 STATE_PATH 同目录的 state.<name>.json，
+    各订阅的已发送记录互不影响。
+    """
+    state_dir = os.path.dirname(state_path) or "."
+    profiles: list[Profile] = []
+    for i, item in enumerate(raw):
+        name = str(item.get("name") or f"profile{i + 1}").strip()
+        profiles.append(
+            Profile(
+                name=name,
+                arxiv_categories=_as_list(item.get("categories")) or categories,
+                keywords=_as_list(item.get("keywords")) or keywords,
+                mail_to=_as_list(item.get("to")) or mail_to,
+                state_path=str(item.get("state_path") or os.path.join(state_dir, f"state.{name}.json")),
+                mail_subject_prefix=str(item.get("subject_prefix") or subject_prefix),
+            )
+        )
+    return profiles
+
+
 def validate_config(cfg: Config) -> None:
     if not cfg.arxiv_categories:
         raise ValueError("ARXIV_CATEGORIES 不能为空")
@@ -174,8 +348,46 @@ def validate_config(cfg: Config) -> None:
         raise ValueError("SINCE_HOURS 必须 > 0")
     if cfg.limit <= 0:
         raise ValueError("LIMIT 必须 > 0")
+    if cfg.keyword_boundary not in {"none", "left", "both"}:
+        raise ValueError("KEYWORD_BOUNDARY 必须是 none / left / both")
+    if cfg.rank_top_k < 0:
+        raise ValueError("RANK_TOP_K 不能为负数")
+    if cfg.fetch_concurrency <= 0:
+        raise ValueError("FETCH_CONCURRENCY 必须 > 0")
+    if cfg.arxiv_cache_ttl_s < 0 or cfg.arxiv_cache_max_mb < 0:
+        raise ValueError("ARXIV_CACHE_TTL_S / ARXIV_CACHE_MAX_MB 不能为负数")
+    if cfg.state_backend not in {"repo", "cache", "journal", "sqlite"}:
+        raise ValueError("STATE_BACKEND 必须是 repo / cache / journal / sqlite")
     if not cfg.keywords:
         raise ValueError("关键词列表不能为空（KEYWORDS 或 config.yaml）")
+    if cfg.deepseek_max_tokens < 0 or cfg.deepseek_time_budget_s < 0:
+        raise ValueError("DEEPSEEK_MAX_TOKENS / DEEPSEEK_TIME_BUDGET_S 不能为负数")
+    if cfg.summary_batch_size <= 0 or cfg.summary_batch_max_tokens <= 0:
+        raise ValueError("SUMMARY_BATCH_SIZE / SUMMARY_BATCH_MAX_TOKENS 必须 > 0")
+    if cfg.run_token_budget < 0 or cfg.run_time_budget_s < 0:
+        raise ValueError("RUN_TOKEN_BUDGET / RUN_TIME_BUDGET_S 不能为负数")
+    if cfg.pipeline_mode not in {"phased", "staged"}:
+        raise ValueError("PIPELINE_MODE 必须是 phased / staged")
+    if cfg.pipeline_queue_size <= 0:
+        raise ValueError("PIPELINE_QUEUE_SIZE 必须 > 0")
+    if cfg.mail_outbox_max_attempts <= 0 or cfg.mail_dispatch_wait_s < 0:
+        raise ValueError("MAIL_OUTBOX_MAX_ATTEMPTS 必须 > 0，MAIL_DISPATCH_WAIT_S 不能为负数")
+    if cfg.mail_max_bytes < 0:
+        raise ValueError("MAIL_MAX_BYTES 不能为负数")
+    if cfg.mail_oversize_mode not in {"split", "attach"}:
+        raise ValueError("MAIL_OVERSIZE_MODE 必须是 split / attach")
+    if cfg.deepseek_concurrency <= 0:
+        raise ValueError("DEEPSEEK_CONCURRENCY 必须 > 0")
+    names = [p.name for p in cfg.profiles]
+    if len(set(names)) != len(names):
+        raise ValueError(f"profiles 的 name 不能重复: {names}")
+    if len({p.state_path for p in cfg.profiles}) != len(cfg.profiles):
+        raise ValueError("profiles 的 state_path 不能重复")
+    for p in cfg.profiles:
+        if not p.arxiv_categories or not p.keywords:
+            raise ValueError(f"profile {p.name}: categories / keywords 不能为空")
+        if not cfg.dry_run and not p.mail_to:
+            raise ValueError(f"profile {p.name}: 非 DRY_RUN 模式缺少收件人（to 或 MAIL_TO）")
     if not cfg.dry_run:
         missing = []
         if not cfg.smtp_host:
@@ -188,7 +400,7 @@ def validate_config(cfg: Config) -> None:
             missing.append("SMTP_PASS")
         if not cfg.mail_from:
             missing.append("MAIL_FROM")
-        if not cfg.mail_to:
+        if not cfg.mail_to and not cfg.profiles:
             missing.append("MAIL_TO")
         if missing:
             raise ValueError(f"非 DRY_RUN 模式缺少配置: {', '.join(missing)}")
@@ -196,3 +408,161 @@ def validate_config(cfg: Config) -> None:
         # 允许 DRY_RUN 先跑通抓取/渲染，但会跳过总结或用降级策略
         return
 
+
+
+# ---- 配置快照 ----
+# 解析好的 Config（连同 validate_config 的结果）缓存为 <CONFIG_SNAPSHOT_DIR>/<key>.json，
+# key 由本文件源码、YAML 文件内容和下列环境变量的值决定；命中时不再导入/解析 YAML。
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_MAX_FILES = 64
+# load_config 读取的环境变量（密钥除外）；新增环境变量时要同时加到这里，否则快照不会随它失效
+_SNAPSHOT_ENV = (
+    "ARXIV_CATEGORIES", "SINCE_HOURS", "LIMIT", "KEYWORDS", "KEYWORD_BOUNDARY", "RANK_TOP_K",
+    "RANK_STATS_PATH", "FETCH_CONCURRENCY", "ARXIV_CACHE_DIR", "ARXIV_CACHE_TTL_S", "ARXIV_CACHE_MAX_MB",
+    "STATE_PATH", "STATE_BACKEND", "STATE_JOURNAL_MAX_KB", "RESEND_ON_UPDATE",
+    "DEEPSEEK_BASE_URL", "DEEPSEEK_MODEL", "DEEPSEEK_TIMEOUT_S", "DEEPSEEK_MAX_RETRIES",
+    "DEEPSEEK_CONCURRENCY", "DEEPSEEK_STREAM", "DEEPSEEK_MAX_TOKENS", "DEEPSEEK_TIME_BUDGET_S",
+    "SUMMARY_BATCH_SIZE", "SUMMARY_BATCH_MAX_TOKENS", "RUN_TOKEN_BUDGET", "RUN_TIME_BUDGET_S",
+    "DEEPSEEK_ASYNC", "SUMMARY_CACHE_DIR", "SUMMARY_CACHE_MAX_ENTRIES", "SUMMARY_CACHE_MAX_AGE_DAYS",
+    "PIPELINE_MODE", "PIPELINE_QUEUE_SIZE", "CHECKPOINT_PATH",
+    "DRY_RUN", "SMTP_HOST", "SMTP_PORT", "SMTP_USER", "SMTP_USE_SSL", "SMTP_STARTTLS", "MAIL_FROM",
+    "MAIL_TO", "MAIL_PER_RECIPIENT", "MAIL_OUTBOX_DIR", "MAIL_OUTBOX_MAX_ATTEMPTS", "MAIL_DISPATCH_WAIT_S",
+    "MAIL_MAX_BYTES", "MAIL_OVERSIZE_MODE", "MAIL_SUBJECT_PREFIX", "TIMEZONE",
+)
+# 密钥不写入快照，每次从环境变量读取；key 里只记录是否设置（会影响 validate_config 的结果）
+_SECRET_ENV = {"DEEPSEEK_API_KEY": "deepseek_api_key", "SMTP_PASS": "smtp_pass"}
+
+# 进程内缓存：key -> (Config, validate_config 的错误信息)，同一进程里反复调用时连快照文件也不读
+_memo: dict[str, tuple[Config, str | None]] = {}
+_source_digest: str | None = None
+
+
+def _code_digest() -> str:
+    global _source_digest
+    if _source_digest is None:
+        try:
+            with open(__file__, "rb") as f:
+                _source_digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            _source_digest = ""
+    return _source_digest
+
+
+def snapshot_key(config_path: str = "config.yaml") -> str:
+    """YAML 内容、相关环境变量或配置代码任一变化，key 都会变。"""
+    try:
+        with open(config_path, "rb") as f:
+            yaml_digest: str | None = hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        yaml_digest = None
+    parts = {
+        "version": SNAPSHOT_VERSION,
+        "code": _code_digest(),
+        "yaml": yaml_digest,
+        "env": {name: os.environ.get(name) for name in _SNAPSHOT_ENV},
+        "secrets": sorted(name for name in _SECRET_ENV if _getenv_str(name)),
+    }
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def write_snapshot(path: str, cfg: Config, error: str | None = None) -> None:
+    """把 Config（不含密钥）和校验结果写成紧凑的 JSON；先写临时文件再 rename。"""
+    data = asdict(cfg)
+    for fld in _SECRET_ENV.values():
+        data.pop(fld)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": SNAPSHOT_VERSION, "config": data, "error": error},
+            f,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+    os.replace(tmp, path)
+
+
+def read_snapshot(path: str) -> tuple[Config, str | None]:
+    """读取快照，密钥从环境变量补齐；返回 (Config, 写入时 validate_config 的错误信息)。"""
+    with open(path, "r", encoding="utf-8") as f:
+        snap = json.load(f)
+    if snap.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"配置快照版本不匹配: {path}")
+    data = dict(snap["config"])
+    data["profiles"] = [Profile(**p) for p in data.get("profiles", [])]
+    for env, fld in _SECRET_ENV.items():
+        data[fld] = _getenv_str(env)
+    return Config(**data), snap.get("error")
+
+
+def _validation_error(cfg: Config) -> str | None:
+    try:
+        validate_config(cfg)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _prune_snapshots(snap_dir: str) -> None:
+    names = [n for n in os.listdir(snap_dir) if n.endswith(".json")]
+    if len(names) <= _SNAPSHOT_MAX_FILES:
+        return
+    paths = sorted((os.path.join(snap_dir, n) for n in names), key=os.path.getmtime)
+    for path in paths[: len(paths) - _SNAPSHOT_MAX_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _resolve(config_path: str) -> tuple[Config, str | None]:
+    snap_dir = _getenv_str("CONFIG_SNAPSHOT_DIR", "data/cache/config") or ""
+    if snap_dir.lower() in {"off", "none", "0"}:
+        cfg = _build_config(config_path)
+        return cfg, _validation_error(cfg)
+
+    key = snapshot_key(config_path)
+    hit = _memo.get(key)
+    if hit is not None:
+        cfg, error = hit
+        # 密钥不参与 key，可能在两次调用之间变化
+        return replace(cfg, **{fld: _getenv_str(env) for env, fld in _SECRET_ENV.items()}), error
+
+    path = os.path.join(snap_dir, f"{key}.json")
+    try:
+        hit = read_snapshot(path)
+    except (OSError, ValueError, TypeError, KeyError):
+        hit = None  # 不存在或已损坏：重新解析
+    if hit is None:
+        cfg = _build_config(config_path)
+        hit = (cfg, _validation_error(cfg))
+        if any(getattr(cfg, fld) != _getenv_str(env) for env, fld in _SECRET_ENV.items()):
+            # 密钥写在 config.yaml 里：快照里没有密钥，命中时会丢失，只能每次解析
+            return hit
+        try:
+            write_snapshot(path, *hit)
+            _prune_snapshots(snap_dir)
+        except OSError as e:
+            print(f"[config] failed to write snapshot {path}: {e}")
+    _memo[key] = hit
+    return hit
+
+
+def load_config(config_path: str = "config.yaml", validate: bool = False) -> Config:
+    """
+    读取配置（config.yaml + 环境变量，环境变量优先）。
+    解析结果缓存为快照（CONFIG_SNAPSHOT_DIR，默认 data/cache/config，off 关闭），相同输入的后续调用不再解析 YAML；
+    CONFIG_SNAPSHOT 指向某个快照文件时直接使用它、忽略 YAML 与其他环境变量（只从环境变量读密钥），便于复现运行。
+    validate=True 时同时执行 validate_config（结果随快照缓存），不合法时抛出 ValueError。
+    """
+    pinned = _getenv_str("CONFIG_SNAPSHOT")
+    if pinned:
+        cfg, _ = read_snapshot(pinned)
+        # 密钥来自当前环境，重新校验
+        error = _validation_error(cfg)
+    else:
+        cfg, error = _resolve(config_path)
+    if validate and error is not None:
+        raise ValueError(error)
+    return cfg
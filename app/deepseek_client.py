@@ -2,22 +2,29 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import json
+import threading
 import time
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import requests
+if TYPE_CHECKING:
+    import requests
 
 
 @dataclass(frozen=True)
 class DeepSeekResponse:
     content: str
-    raw: dict[str, Any]
+    raw: dict[str, Any] | None = None  # 仅 keep_raw=True 时保留
+    truncated: bool = False  # 因时间预算或 max_tokens 提前结束
 
 
 class DeepSeekClient:
     """
     DeepSeek 提供 OpenAI 兼容接口，默认走:
       POST {base_url}/v1/chat/completions
+
+    stream=True 时使用 SSE 流式输出，边收边拼接内容；
+    time_budget_s 是单次 chat()（含重试）的总时间上限，超时后返回已收到的部分（truncated=True）。
+    max_tokens / time_budget_s 是按单篇设定的，chat() 可按本次请求覆盖（批量总结按篇数放大）。
     """
 
     def __init__(
@@ -27,54 +34,137 @@ class DeepSeekClient:
         model: str = "deepseek-chat",
         timeout_s: int = 60,
         max_retries: int = 3,
+        stream: bool = False,
+        max_tokens: int | None = None,
+        time_budget_s: float | None = None,
+        keep_raw: bool = False,
     ) -> None:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout_s = timeout_s
         self.max_retries = max_retries
-        self._session = requests.Session()
+        self.stream = stream
+        self.max_tokens = max_tokens
+        self.time_budget_s = time_budget_s
+        self.keep_raw = keep_raw
+        # requests.Session 不保证线程安全；并发总结时每个线程各用一个（各自复用连接）
+        self._local = threading.local()
+
+    @property
+    def _session(self) -> requests.Session:
+        sess = getattr(self._local, "session", None)
+        if sess is None:
+            import requests
+
+            sess = self._local.session = requests.Session()
+        return sess
 
-    def chat(self, messages: list[dict[str, str]], temperature: float = 0.2) -> DeepSeekResponse:
+    def _read_stream(self, resp: requests.Response, deadline: float | None) -> DeepSeekResponse:
+        """增量解析 SSE：每个 `data: {...}` 携带一段 delta.content，`data: [DONE]` 结束。"""
+        pieces: list[str] = []
+        chunks: list[dict[str, Any]] = []
+        truncated = False
+        try:
+            for line in resp.iter_lines(decode_unicode=True):
+                if deadline is not None and time.monotonic() > deadline:
+                    truncated = True
+                    break
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if self.keep_raw:
+                    chunks.append(chunk)
+                choice = (chunk.get("choices") or [{}])[0]
+                delta = choice.get("delta", {}).get("content")
+                if delta:
+                    pieces.append(delta)
+                if choice.get("finish_reason") == "length":
+                    truncated = True
+        finally:
+            resp.close()
+        return DeepSeekResponse(
+            content="".join(pieces).strip(),
+            raw={"chunks": chunks} if self.keep_raw else None,
+            truncated=truncated,
+        )
+
+    def chat(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float = 0.2,
+        response_format: dict[str, str] | None = None,
+        max_tokens: int | None = None,
+        time_budget_s: float | None = None,
+    ) -> DeepSeekResponse:
+        max_tokens = max_tokens or self.max_tokens
+        time_budget_s = time_budget_s or self.time_budget_s
         url = f"{self.base_url}/v1/chat/completions"
-        payload = {
+        payload: dict[str, Any] = {
             "model": self.model,
             "messages": messages,
             "temperature": temperature,
         }
+        if response_format:
+            payload["response_format"] = response_format
+        if max_tokens:
+            payload["max_tokens"] = int(max_tokens)
+        if self.stream:
+            payload["stream"] = True
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        body = json.dumps(payload)
+        deadline = time.monotonic() + time_budget_s if time_budget_s else None
 
         last_err: Exception | None = None
         for attempt in range(1, self.max_retries + 1):
+            timeout: float = self.timeout_s
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = min(timeout, remaining)
             try:
                 resp = self._session.post(
-                    url, headers=headers, data=json.dumps(payload), timeout=self.timeout_s
+                    url, headers=headers, data=body, timeout=timeout, stream=self.stream
                 )
                 if resp.status_code >= 500:
+                    import requests
+
                     raise requests.HTTPError(
                         f"DeepSeek 5xx: {resp.status_code} {resp.text[:2000]}",
                         response=resp,
                     )
                 resp.raise_for_status()
+                if self.stream:
+                    result = self._read_stream(resp, deadline)
+                    if result.truncated and not result.content:
+                        raise TimeoutError("DeepSeek stream exceeded time budget before any output")
+                    return result
                 raw = resp.json()
-                content = (
-                    raw.get("choices", [{}])[0]
-                    .get("message", {})
-                    .get("content", "")
-                    .strip()
+                choice = raw.get("choices", [{}])[0]
+                content = choice.get("message", {}).get("content", "").strip()
+                return DeepSeekResponse(
+                    content=content,
+                    raw=raw if self.keep_raw else None,
+                    truncated=choice.get("finish_reason") == "length",
                 )
-                return DeepSeekResponse(content=content, raw=raw)
             except Exception as e:  # noqa: BLE001
                 last_err = e
                 if attempt == self.max_retries:
                     break
                 # 指数退避 + 抖动
                 sleep_s = min(8.0, 0.8 * (2 ** (attempt - 1))) + (0.05 * attempt)
+                if deadline is not None:
+                    sleep_s = min(sleep_s, max(0.0, deadline - time.monotonic()))
                 time.sleep(sleep_s)
-        assert last_err is not None
+        if last_err is None:
+            raise TimeoutError(f"DeepSeek time budget {time_budget_s}s exhausted")
         raise last_err
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 from .arxiv_client import ArxivPaper
+from .keyword_matcher import KeywordMatcher, compile_keywords
 
 
 @dataclass(frozen=True)
@@ -10,27 +11,27 @@ class FilterResult:
     paper: ArxivPaper
     score: int
     matched_keywords: list[str]
+    relevance: float = 0.0  # BM25 分数，只有启用 rank_top_k 时才会计算
 
 
 def _norm(s: str) -> str:
     return (s or "").lower()
 
 
-def score_paper(paper: ArxivPaper, keywords: list[str]) -> FilterResult:
+def score_paper(
+    paper: ArxivPaper,
+    keywords: list[str],
+    matcher: KeywordMatcher | None = None,
+) -> FilterResult:
+    matcher = matcher or compile_keywords(keywords)
     hay = _norm(paper.title) + "\n" + _norm(paper.summary)
-    matched: list[str] = []
-    score = 0
-    for kw in keywords:
-        k = _norm(kw).strip()
-        if not k:
-            continue
-        if k in hay:
-            matched.append(kw)
-            score += 1
+    hits = matcher.match(hay)
+    score = len(hits)
     # 去重且保留原顺序
     seen = set()
     matched_unique = []
-    for m in matched:
+    for idx in hits:
+        m = matcher.keywords[idx]
         if m not in seen:
             matched_unique.append(m)
             seen.add(m)
@@ -38,14 +39,17 @@ def score_paper(paper: ArxivPaper, keywords: list[str]) -> FilterResult:
 
 
 def filter_papers(
-    papers: list[ArxivPaper], keywords: list[str], min_score: int = 1
+    papers: list[ArxivPaper],
+    keywords: list[str],
+    min_score: int = 1,
+    boundary: str = "left",
 ) -> list[FilterResult]:
+    matcher = compile_keywords(keywords, boundary=boundary)
     results: list[FilterResult] = []
     for p in papers:
-        r = score_paper(p, keywords)
+        r = score_paper(p, keywords, matcher=matcher)
         if r.score >= min_score:
             results.append(r)
     # score desc, updated desc
     results.sort(key=lambda x: (x.score, x.paper.updated), reverse=True)
     return results
-
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable
+import urllib.parse
+
+if TYPE_CHECKING:
+    import requests
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float  # epoch seconds，最近一次从源站确认内容的时间
+    last_access: float  # epoch seconds，用于 LRU
+    size: int
+
+
+def normalize_url(url: str) -> str:
+    """scheme/host 小写、query 参数排序，保证同一查询落到同一个 key。"""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urllib.parse.urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, "")
+    )
+
+
+def _cache_key(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """
+    本地 HTTP 响应缓存（GET only）：
+    - TTL 内直接返回本地内容，不走网络；
+    - 过期后带 If-None-Match / If-Modified-Since 做条件请求，304 时复用本地内容；
+    - 总大小超过 max_bytes 时按最近访问时间（LRU）淘汰。
+
+    目录结构：
+      <cache_dir>/index.json     key -> CacheEntry
+      <cache_dir>/<key>.body     响应体
+    """
+
+    def __init__(self, cache_dir: str, ttl_s: int = 3600, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.cache_dir = cache_dir
+        self.ttl_s = int(ttl_s)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._index: dict[str, CacheEntry] = self._load_index()
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def _load_index(self) -> dict[str, CacheEntry]:
+        if not os.path.exists(self._index_path):
+            return {}
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                raw: dict[str, Any] = json.load(f) or {}
+            return {k: CacheEntry(**v) for k, v in raw.items()}
+        except (OSError, ValueError, TypeError):
+            # 索引损坏时当作空缓存，body 文件会在后续写入时被覆盖
+            return {}
+
+    def _save_index(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({k: asdict(v) for k, v in self._index.items()}, f)
+        os.replace(tmp, self._index_path)
+
+    def _read_body(self, key: str) -> bytes | None:
+        try:
+            with open(self._body_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _evict(self) -> None:
+        total = sum(e.size for e in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda kv: kv[1].last_access):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+            total -= entry.size
+            del self._index[key]
+
+    def get(
+        self,
+        url: str,
+        session: requests.Session,
+        timeout: float = 30,
+        before_request: Callable[[], None] | None = None,
+    ) -> bytes:
+        """返回 url 的响应体；只有真正发起网络请求时才调用 before_request（例如限速器）。"""
+        key = _cache_key(url)
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(key)
+            body = self._read_body(key) if entry is not None else None
+            if entry is not None and body is not None and now - entry.fetched_at < self.ttl_s:
+                entry.last_access = now
+                self._save_index()
+                return body
+
+        headers: dict[str, str] = {}
+        if entry is not None and body is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        if before_request is not None:
+            before_request()
+        resp = session.get(url, headers=headers, timeout=timeout)
+        now = time.time()
+        if resp.status_code == 304 and entry is not None and body is not None:
+            with self._lock:
+                entry.fetched_at = now
+                entry.last_access = now
+                self._save_index()
+            return body
+        resp.raise_for_status()
+
+        body = resp.content
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = self._body_path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, self._body_path(key))
+            self._index[key] = CacheEntry(
+                url=normalize_url(url),
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+                fetched_at=now,
+                last_access=now,
+                size=len(body),
+            )
+            self._evict()
+            self._save_index()
+        return body
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from collections import deque
+from functools import lru_cache
+
+BOUNDARY_MODES = ("none", "left", "both")
+
+# pattern 数少于该值时逐个 pattern 用 str.find（C 实现）查找，
+# 达到该值才构建 Aho–Corasick 自动机：纯 Python 的逐字符循环只有关键词很多时才划算
+# （python -m benchmarks.bench_keyword_matcher 可测盈亏平衡点）
+AUTOMATON_MIN_PATTERNS = 150
+
+
+def _is_word_char(c: str) -> bool:
+    # 只对 ASCII 字母数字做词边界判断；中文等没有空格分词的文字不受边界规则影响
+    return c.isascii() and (c.isalnum() or c == "_")
+
+
+class KeywordMatcher:
+    """
+    多关键词匹配器：关键词表编译一次，之后对每段文本计数。
+    pattern 数少于 automaton_min_patterns 时逐个 pattern 用 str.find 查找；
+    否则用 Aho–Corasick 自动机只扫描一遍，耗时与文本长度成正比，基本不随关键词数量增长。
+    两种实现的计数完全相同（包括重叠命中）。
+
+    boundary 控制词边界：
+    - "none": 纯子串匹配（旧行为，"rl" 会命中 "world"）
+    - "left": 关键词左侧必须是词边界（"rl" 命中 "rlhf"、不命中 "world"；"llm" 仍命中 "llms"）
+    - "both": 两侧都必须是词边界（整词匹配）
+    """
+
+    def __init__(
+        self,
+        keywords: list[str],
+        boundary: str = "left",
+        automaton_min_patterns: int = AUTOMATON_MIN_PATTERNS,
+    ) -> None:
+        if boundary not in BOUNDARY_MODES:
+            raise ValueError(f"boundary 必须是 {BOUNDARY_MODES} 之一: {boundary!r}")
+        self.keywords = list(keywords)
+        self.boundary = boundary
+
+        # 归一化后的 pattern（去重），以及每个 pattern 对应的原始关键词下标
+        self.patterns: list[str] = []
+        self.pattern_keywords: list[list[int]] = []
+        pid_of: dict[str, int] = {}
+        for idx, kw in enumerate(self.keywords):
+            k = (kw or "").lower().strip()
+            if not k:
+                continue
+            pid = pid_of.get(k)
+            if pid is None:
+                pid = pid_of[k] = len(self.patterns)
+                self.patterns.append(k)
+                self.pattern_keywords.append([])
+            self.pattern_keywords[pid].append(idx)
+
+        self._use_automaton = len(self.patterns) >= automaton_min_patterns
+        if self._use_automaton:
+            self._build()
+
+    def _build(self) -> None:
+        children: list[dict[str, int]] = [{}]
+        out: list[list[int]] = [[]]
+        for pid, pat in enumerate(self.patterns):
+            s = 0
+            for ch in pat:
+                nxt = children[s].get(ch)
+                if nxt is None:
+                    nxt = len(children)
+                    children[s][ch] = nxt
+                    children.append({})
+                    out.append([])
+                s = nxt
+            out[s].append(pid)
+
+        # BFS 计算 fail 指针，同时把转移表补全成 DFA：
+        # delta[s] = delta[fail[s]] 覆盖上 s 自己的子节点，匹配时每个字符只查一次字典
+        fail = [0] * len(children)
+        delta: list[dict[str, int]] = [dict() for _ in children]
+        delta[0] = dict(children[0])
+        queue: deque[int] = deque(children[0].values())
+        while queue:
+            s = queue.popleft()
+            f = fail[s]
+            out[s] = out[s] + out[f]
+            delta[s] = {**delta[f], **children[s]}
+            for ch, nxt in children[s].items():
+                fail[nxt] = delta[f].get(ch, 0)
+                queue.append(nxt)
+        self._delta = delta
+        self._out = out
+
+    def _boundary_ok(self, text: str, start: int, end: int, pid: int) -> bool:
+        if self.boundary == "none":
+            return True
+        pat = self.patterns[pid]
+        if _is_word_char(pat[0]) and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if (
+            self.boundary == "both"
+            and _is_word_char(pat[-1])
+            and end < len(text)
+            and _is_word_char(text[end])
+        ):
+            return False
+        return True
+
+    def counts(self, text: str) -> dict[int, int]:
+        """扫描 text（应已小写），返回 pattern 下标 -> 命中次数。"""
+        if not self._use_automaton:
+            return self._counts_find(text)
+        delta = self._delta
+        out = self._out
+        patterns = self.patterns
+        found: dict[int, int] = {}
+        s = 0
+        for i, ch in enumerate(text):
+            s = delta[s].get(ch, 0)
+            if out[s]:
+                for pid in out[s]:
+                    start = i + 1 - len(patterns[pid])
+                    if self._boundary_ok(text, start, i + 1, pid):
+                        found[pid] = found.get(pid, 0) + 1
+        return found
+
+    def _counts_find(self, text: str) -> dict[int, int]:
+        found: dict[int, int] = {}
+        for pid, pat in enumerate(self.patterns):
+            n = 0
+            # 每次从上一个起点的下一位继续找，重叠命中与自动机一样都计数
+            i = text.find(pat)
+            while i >= 0:
+                if self._boundary_ok(text, i, i + len(pat), pid):
+                    n += 1
+                i = text.find(pat, i + 1)
+            if n:
+                found[pid] = n
+        return found
+
+    def match(self, text: str) -> list[int]:
+        """返回命中的原始关键词下标（按关键词表顺序）。"""
+        idxs: list[int] = []
+        for pid in self.counts(text):
+            idxs.extend(self.pattern_keywords[pid])
+        idxs.sort()
+        return idxs
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(keywords: tuple[str, ...], boundary: str) -> KeywordMatcher:
+    return KeywordMatcher(list(keywords), boundary=boundary)
+
+
+def compile_keywords(keywords: list[str], boundary: str = "left") -> KeywordMatcher:
+    """同一关键词表只编译一次（进程内缓存）。"""
+    return _compile_cached(tuple(keywords), boundary)
@@ -4,6 +4,142 @@ import smtplib
 import socket
 import time
 from email.message import EmailMessage
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .renderer import Attachment
+
+# 可重试的错误：连接断开/超时/临时失败，重试前会重新建立连接
+_RETRYABLE = (smtplib.SMTPException, socket.timeout, OSError)
+
+
+def build_message(
+    mail_from: str,
+    mail_to: list[str],
+    subject: str,
+    text: str,
+    html: str | None = None,
+    attachments: list[Attachment] | None = None,
+) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = mail_from
+    msg["To"] = ", ".join(mail_to)
+    msg["Subject"] = subject
+    msg.set_content(text)
+    if html:
+        msg.add_alternative(html, subtype="html")
+    for att in attachments or []:
+        maintype, _, subtype = att.content_type.partition("/")
+        msg.add_attachment(
+            att.data, maintype=maintype, subtype=subtype or "octet-stream", filename=att.filename
+        )
+    return msg
+
+
+class SmtpSession:
+    """
+    一条复用的 SMTP 连接：第一次发送时才建立连接并登录，之后的邮件都走同一条连接，
+    发送 N 封邮件只需一次 TCP/TLS 握手和一次 AUTH。
+    发送失败时关闭连接、退避后重连重试（最多 max_retries 次）。
+    用法：
+        with mailer.session() as s:
+            s.send(...)
+            s.send(...)
+    """
+
+    def __init__(self, mailer: SmtpMailer) -> None:
+        self.mailer = mailer
+        self.connects = 0  # 实际建立连接（握手 + 登录）的次数
+        self.sent = 0
+        self._server: smtplib.SMTP | None = None
+
+    def __enter__(self) -> SmtpSession:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _connect(self) -> smtplib.SMTP:
+        m = self.mailer
+        if m.use_ssl:
+            server: smtplib.SMTP = smtplib.SMTP_SSL(m.host, m.port, timeout=m.timeout_s)
+        else:
+            server = smtplib.SMTP(m.host, m.port, timeout=m.timeout_s)
+        try:
+            server.ehlo()
+            if (not m.use_ssl) and m.starttls:
+                server.starttls()
+                server.ehlo()
+            server.login(m.username, m.password)
+        except BaseException:
+            server.close()
+            raise
+        self.connects += 1
+        return server
+
+    def _drop(self) -> None:
+        if self._server is None:
+            return
+        server, self._server = self._server, None
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def close(self) -> None:
+        self._drop()
+
+    def send_message(self, msg: EmailMessage, to_addrs: list[str] | None = None) -> None:
+        """发送一封已构造好的邮件；to_addrs 为空时按邮件头里的收件人投递。"""
+        last_err: Exception | None = None
+        free_reconnect = True
+        attempt = 0
+        while attempt < self.mailer.max_retries:
+            attempt += 1
+            reused = self._server is not None
+            try:
+                if self._server is None:
+                    self._server = self._connect()
+                self._server.send_message(msg, to_addrs=to_addrs)
+                self.sent += 1
+                return
+            except _RETRYABLE as e:
+                last_err = e
+                # 连接状态未知（可能已被服务器断开），下次重试重新连接
+                self._drop()
+                if reused and free_reconnect and isinstance(e, smtplib.SMTPServerDisconnected):
+                    # 复用的连接已被服务器关闭（空闲超时/单连接限额）：立即重连，不计重试次数
+                    free_reconnect = False
+                    attempt -= 1
+                    continue
+                if attempt == self.mailer.max_retries:
+                    break
+                sleep_s = min(8.0, 0.8 * (2 ** (attempt - 1))) + (0.05 * attempt)
+                time.sleep(sleep_s)
+        assert last_err is not None
+        raise last_err
+
+    def send(
+        self,
+        mail_from: str,
+        mail_to: list[str],
+        subject: str,
+        text: str,
+        html: str | None = None,
+        per_recipient: bool = False,
+        attachments: list[Attachment] | None = None,
+    ) -> int:
+        """
+        per_recipient=False：一封邮件发给所有收件人（与原行为一致）；
+        per_recipient=True：每个收件人单独一封（To 只有自己，互相看不到地址），仍复用同一连接。
+        返回发出的邮件数。
+        """
+        if not per_recipient:
+            self.send_message(build_message(mail_from, mail_to, subject, text, html, attachments))
+            return 1
+        for rcpt in mail_to:
+            self.send_message(build_message(mail_from, [rcpt], subject, text, html, attachments))
+        return len(mail_to)
 
 
 class SmtpMailer:
@@ -27,6 +163,9 @@ class SmtpMailer:
         self.timeout_s = timeout_s
         self.max_retries = max_retries
 
+    def session(self) -> SmtpSession:
+        return SmtpSession(self)
+
     def send(
         self,
         mail_from: str,
@@ -34,39 +173,11 @@ class SmtpMailer:
         subject: str,
         text: str,
         html: str | None = None,
+        per_recipient: bool = False,
+        attachments: list[Attachment] | None = None,
     ) -> None:
-        msg = EmailMessage()
-        msg["From"] = mail_from
-        msg["To"] = ", ".join(mail_to)
-        msg["Subject"] = subject
-        msg.set_content(text)
-        if html:
-            msg.add_alternative(html, subtype="html")
-
-        last_err: Exception | None = None
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                if self.use_ssl:
-                    server: smtplib.SMTP = smtplib.SMTP_SSL(
-                        self.host, self.port, timeout=self.timeout_s
-                    )
-                else:
-                    server = smtplib.SMTP(self.host, self.port, timeout=self.timeout_s)
-
-                with server:
-                    server.ehlo()
-                    if (not self.use_ssl) and self.starttls:
-                        server.starttls()
-                        server.ehlo()
-                    server.login(self.username, self.password)
-                    server.send_message(msg)
-                return
-            except (smtplib.SMTPException, socket.timeout, OSError) as e:
-                last_err = e
-                if attempt == self.max_retries:
-                    break
-                sleep_s = min(8.0, 0.8 * (2 ** (attempt - 1))) + (0.05 * attempt)
-                time.sleep(sleep_s)
-        assert last_err is not None
-        raise last_err
-
+        """单次发送：建立连接、发送、断开。需要连续发送多封时用 session()。"""
+        with self.session() as s:
+            s.send(
+                mail_from, mail_to, subject, text, html, per_recipient=per_recipient, attachments=attachments
+            )
@@ -1,17 +1,37 @@
 from __future__ import annotations
 
-from dataclasses import asdict
+import argparse
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, replace
+import os
+import threading
+import time
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
 from zoneinfo import ZoneInfo
 
-from .arxiv_client import fetch_recent
-from .config import load_config, validate_config
-from .deepseek_client import DeepSeekClient
-from .filtering import filter_papers
-from .mailer import SmtpMailer
-from .renderer import RenderItem, render_email
-from .state_store import StateStore
-from .summarizer import Summarizer
+from .arxiv_client import (
+    ArxivPaper,
+    fetch_recent,
+    fetch_recent_concurrent,
+    iter_recent,
+    iter_recent_concurrent,
+)
+from .checkpoint import RunCheckpoint, run_key
+from .config import Config, Profile, load_config
+from .filtering import FilterResult, filter_papers, score_paper
+from .http_cache import HttpCache
+from .keyword_matcher import compile_keywords
+from .renderer import RenderedEmail, RenderItem, render_digests, render_summary_html
+from .state_store import SqliteStateStore, StateStore, base_arxiv_id, open_state_store
+from .summary_cache import SummaryCache
+
+if TYPE_CHECKING:
+    # 以下模块（asyncio/smtplib/email 等）只在用到的步骤里导入，见 app/cli.py
+    from .deepseek_client import DeepSeekClient
+    from .mailer import SmtpMailer, SmtpSession
+    from .outbox import OutboxDispatcher
+    from .ranking import CorpusStats
 
 
 def _safe_zoneinfo(name: str) -> ZoneInfo:
@@ -21,66 +41,558 @@ def _safe_zoneinfo(name: str) -> ZoneInfo:
         return ZoneInfo("UTC")
 
 
-def main() -> int:
-    cfg = load_config()
-    validate_config(cfg)
+def _local_date(cfg: Config) -> str:
+    tz = _safe_zoneinfo(cfg.timezone)
+    return datetime.now(timezone.utc).astimezone(tz).strftime("%Y-%m-%d")
 
-    print("[config] loaded:", {k: v for k, v in asdict(cfg).items() if k not in {"smtp_pass", "deepseek_api_key"}})
 
-    papers = fetch_recent(
-        categories=cfg.arxiv_categories,
-        keywords=cfg.keywords,
-        since_hours=cfg.since_hours,
-        max_results=cfg.limit,
+async def _summarize_async(
+    cfg: Config,
+    jobs: list[tuple[ArxivPaper, list[str]]],
+    summary_cache: SummaryCache | None,
+    deadline: float | None,
+    on_summary: Callable[[str, str], None] | None = None,
+) -> tuple[dict[str, str], list[str], int]:
+    # httpx 是可选依赖，只在 DEEPSEEK_ASYNC 时导入
+    from .async_deepseek_client import AsyncDeepSeekClient
+    from .summarizer import Summarizer
+
+    async with AsyncDeepSeekClient(
+        api_key=cfg.deepseek_api_key or "",
+        base_url=cfg.deepseek_base_url,
+        model=cfg.deepseek_model,
+        timeout_s=cfg.deepseek_timeout_s,
+        max_retries=cfg.deepseek_max_retries,
+        max_connections=cfg.deepseek_concurrency,
+        stream=cfg.deepseek_stream,
+        max_tokens=cfg.deepseek_max_tokens or None,
+        time_budget_s=cfg.deepseek_time_budget_s or None,
+    ) as client:
+        summarizer = Summarizer(client, cache=summary_cache)
+        summaries, failed = await summarizer.summarize_many_async(
+            jobs,
+            max_concurrency=cfg.deepseek_concurrency,
+            deadline=deadline,
+            on_summary=on_summary,
+        )
+    return summaries, failed, summarizer.cache_hits
+
+
+def _make_http_cache(cfg: Config) -> HttpCache | None:
+    if cfg.arxiv_cache_max_mb <= 0:
+        return None
+    return HttpCache(
+        cfg.arxiv_cache_dir,
+        ttl_s=cfg.arxiv_cache_ttl_s,
+        max_bytes=cfg.arxiv_cache_max_mb * 1024 * 1024,
     )
-    
+
+
+_summary_caches: dict[tuple[str, int, int], SummaryCache] = {}
+
+
+def _make_summary_cache(cfg: Config) -> SummaryCache | None:
+    # 每次运行只建一个实例：构造时会扫描并清理缓存目录，总结与各订阅的渲染共用它
+    if cfg.summary_cache_max_entries <= 0:
+        return None
+    key = (cfg.summary_cache_dir, cfg.summary_cache_max_entries, cfg.summary_cache_max_age_days)
+    cache = _summary_caches.get(key)
+    if cache is None:
+        cache = _summary_caches[key] = SummaryCache(
+            cfg.summary_cache_dir,
+            max_entries=cfg.summary_cache_max_entries,
+            max_age_days=cfg.summary_cache_max_age_days,
+        )
+    return cache
+
+
+def _make_client(cfg: Config) -> DeepSeekClient:
+    from .deepseek_client import DeepSeekClient
+
+    return DeepSeekClient(
+        api_key=cfg.deepseek_api_key or "",
+        base_url=cfg.deepseek_base_url,
+        model=cfg.deepseek_model,
+        timeout_s=cfg.deepseek_timeout_s,
+        max_retries=cfg.deepseek_max_retries,
+        stream=cfg.deepseek_stream,
+        max_tokens=cfg.deepseek_max_tokens or None,
+        time_budget_s=cfg.deepseek_time_budget_s or None,
+    )
+
+
+def _fetch_all(cfg: Config) -> list[ArxivPaper]:
+    http_cache = _make_http_cache(cfg)
+    if cfg.fetch_concurrency > 1:
+        papers = fetch_recent_concurrent(
+            categories=cfg.arxiv_categories,
+            keywords=cfg.keywords,
+            since_hours=cfg.since_hours,
+            max_results=cfg.limit,
+            max_workers=cfg.fetch_concurrency,
+            cache=http_cache,
+        )
+    else:
+        papers = fetch_recent(
+            categories=cfg.arxiv_categories,
+            keywords=cfg.keywords,
+            since_hours=cfg.since_hours,
+            max_results=cfg.limit,
+            cache=http_cache,
+        )
     print(f"[arxiv] fetched {len(papers)} entries in last {cfg.since_hours}h (limit={cfg.limit})")
+    return papers
 
-    filtered = filter_papers(papers, cfg.keywords, min_score=1)
-    print(f"[filter] matched {len(filtered)} entries (min_score=1)")
 
-    state = StateStore(cfg.state_path)
+def _update_corpus_stats(
+    cfg: Config, papers: list[ArxivPaper], keywords: list[str]
+) -> CorpusStats | None:
+    """启用排序时把本次抓到的论文计入语料统计（按 id 去重，重复计入是安全的）。"""
+    if cfg.rank_top_k <= 0:
+        return None
+    # numpy 只在启用排序时才需要
+    from .ranking import CorpusStats
 
-    to_process = []
-    for r in filtered:
-        p = r.paper
-        updated_iso = p.updated.isoformat()
-        if state.should_send(p.arxiv_id, updated_iso, cfg.resend_on_update):
-            to_process.append(r)
+    corpus_stats = CorpusStats(cfg.rank_stats_path)
+    added = corpus_stats.update(papers, compile_keywords(keywords, boundary=cfg.keyword_boundary))
+    print(f"[rank] corpus n_docs={corpus_stats.n_docs} (+{added})")
+    return corpus_stats
+
+
+def _select(
+    cfg: Config,
+    state: StateStore | SqliteStateStore,
+    papers: list[ArxivPaper],
+    keywords: list[str],
+    corpus_stats: CorpusStats | None,
+    label: str = "",
+) -> list[FilterResult]:
+    """过滤 -> （可选）BM25 排序 -> 去掉已发送 -> top-K，返回待发送列表。"""
+    filtered = filter_papers(papers, keywords, min_score=1, boundary=cfg.keyword_boundary)
+    print(f"[filter]{label} matched {len(filtered)} entries (min_score=1)")
+
+    if corpus_stats is not None:
+        from .ranking import rank_results
+
+        matcher = compile_keywords(keywords, boundary=cfg.keyword_boundary)
+        filtered = rank_results(filtered, matcher, corpus_stats)
+        print(f"[rank]{label} bm25 ranked {len(filtered)} entries")
+
+    unsent = state.filter_unsent([r.paper for r in filtered], cfg.resend_on_update)
+    unsent_ids = {p.arxiv_id for p in unsent}
+    to_process = [r for r in filtered if r.paper.arxiv_id in unsent_ids]
     print(
-        f"[state] to_send {len(to_process)} / {len(filtered)} (resend_on_update={cfg.resend_on_update})"
+        f"[state]{label} to_send {len(to_process)} / {len(filtered)} (resend_on_update={cfg.resend_on_update})"
     )
+    if cfg.rank_top_k > 0 and len(to_process) > cfg.rank_top_k:
+        print(f"[rank]{label} keep top {cfg.rank_top_k} / {len(to_process)} by relevance")
+        to_process = to_process[: cfg.rank_top_k]
+    return to_process
+
+
+def _run_phased(
+    cfg: Config,
+    state: StateStore | SqliteStateStore,
+    started: float,
+    ckpt: RunCheckpoint | None = None,
+) -> tuple[list[FilterResult], dict[str, str], list[str], CorpusStats | None]:
+    """原始流程：抓取全部 -> 过滤全部 -> 去重 -> 总结，每一步完成后才开始下一步。"""
+    corpus_stats = None
+    if ckpt is not None and ckpt.selected is not None:
+        to_process = ckpt.selected
+        print(f"[checkpoint] skip fetch/filter: {len(to_process)} selected entries")
+        if ckpt.papers is not None:
+            # 语料统计只在 state 保存后落盘，中断的运行需要重新计入
+            corpus_stats = _update_corpus_stats(cfg, ckpt.papers, cfg.keywords)
+    else:
+        papers = _fetch_or_resume(cfg, ckpt)
+        corpus_stats = _update_corpus_stats(cfg, papers, cfg.keywords)
+        to_process = _select(cfg, state, papers, cfg.keywords, corpus_stats)
+        if ckpt is not None:
+            ckpt.save_selected(to_process)
+
+    summaries, failed = _summarize(cfg, to_process, started, ckpt)
+    return to_process, summaries, failed, corpus_stats
+
+
+def _fetch_or_resume(cfg: Config, ckpt: RunCheckpoint | None) -> list[ArxivPaper]:
+    if ckpt is not None and ckpt.papers is not None:
+        print(f"[checkpoint] skip fetch: {len(ckpt.papers)} entries")
+        return ckpt.papers
+    papers = _fetch_all(cfg)
+    if ckpt is not None:
+        ckpt.save_fetched(papers)
+    return papers
+
 
+def _summarize(
+    cfg: Config,
+    to_process: list[FilterResult],
+    started: float,
+    ckpt: RunCheckpoint | None = None,
+) -> tuple[dict[str, str], list[str]]:
+    """按 token/时间预算总结 to_process（检查点里已有的总结直接复用）。"""
     summaries: dict[str, str] = {}
     failed: list[str] = []
-    if cfg.deepseek_api_key and to_process:
-        client = DeepSeekClient(
-            api_key=cfg.deepseek_api_key,
-            base_url=cfg.deepseek_base_url,
-            model=cfg.deepseek_model,
-            timeout_s=cfg.deepseek_timeout_s,
-            max_retries=cfg.deepseek_max_retries,
+    remaining = to_process
+    on_summary = None
+    if ckpt is not None:
+        summaries = {
+            r.paper.arxiv_id: ckpt.summaries[r.paper.arxiv_id]
+            for r in to_process
+            if r.paper.arxiv_id in ckpt.summaries
+        }
+        remaining = [r for r in to_process if r.paper.arxiv_id not in summaries]
+        on_summary = ckpt.add_summary
+        if summaries:
+            print(f"[checkpoint] reuse {len(summaries)} summaries; {len(remaining)} left")
+    if cfg.deepseek_api_key and remaining:
+        from .scheduler import plan_summaries
+        from .summarizer import Summarizer
+
+        summary_cache = _make_summary_cache(cfg)
+        plan = plan_summaries(
+            remaining, token_budget=cfg.run_token_budget, max_tokens=cfg.deepseek_max_tokens or None
         )
-        summarizer = Summarizer(client)
-        for idx, r in enumerate(to_process, 1):
-            p = r.paper
-            print(f"[deepseek] summarizing {idx}/{len(to_process)}: {p.arxiv_id}")
-            try:
-                summaries[p.arxiv_id] = summarizer.summarize_one(
-                    paper=p, matched_keywords=r.matched_keywords
-                )
-            except Exception as e:  # noqa: BLE001
-                failed.append(f"{p.arxiv_id} {p.title} ({type(e).__name__}: {e})")
+        if plan.skipped:
+            print(
+                f"[budget] token budget {cfg.run_token_budget}: summarize {len(plan.selected)}, "
+                f"abstract-only {len(plan.skipped)} (est {plan.est_tokens} tokens)"
+            )
+        deadline = started + cfg.run_time_budget_s if cfg.run_time_budget_s else None
+        # 按优先级提交，时间预算耗尽时先被跳过的是性价比最低的论文
+        jobs = [(r.paper, r.matched_keywords) for r in plan.selected]
+        print(
+            f"[deepseek] summarizing {len(jobs)} entries "
+            f"(concurrency={cfg.deepseek_concurrency}, async={cfg.deepseek_async})"
+        )
+        if cfg.deepseek_async:
+            import asyncio
+
+            new, failed, cache_hits = asyncio.run(
+                _summarize_async(cfg, jobs, summary_cache, deadline, on_summary)
+            )
+        else:
+            summarizer = Summarizer(_make_client(cfg), cache=summary_cache)
+            new, failed = summarizer.summarize_many(
+                jobs,
+                max_workers=cfg.deepseek_concurrency,
+                batch_size=cfg.summary_batch_size,
+                batch_max_tokens=cfg.summary_batch_max_tokens,
+                deadline=deadline,
+                on_summary=on_summary,
+            )
+            cache_hits = summarizer.cache_hits
+        summaries.update(new)
+        if summary_cache is not None:
+            print(f"[deepseek] summary cache hits: {cache_hits}/{len(jobs)}")
     else:
         if not cfg.deepseek_api_key:
             print("[deepseek] DEEPSEEK_API_KEY not set; skip summarization")
+    return summaries, failed
 
-    tz = _safe_zoneinfo(cfg.timezone)
-    date_local = datetime.now(timezone.utc).astimezone(tz).strftime("%Y-%m-%d")
 
+def _merge_for_summary(per_profile: list[list[FilterResult]]) -> list[FilterResult]:
+    """
+    多个订阅选中的论文去重合并，每篇只总结一次：命中关键词取并集（提示词因此对所有订阅一致），
+    score / relevance 取最大值用于预算排序。
+    """
+    merged: dict[str, FilterResult] = {}
+    for results in per_profile:
+        for r in results:
+            pid = r.paper.arxiv_id
+            cur = merged.get(pid)
+            if cur is None:
+                merged[pid] = replace(r, matched_keywords=list(r.matched_keywords))
+                continue
+            kws = cur.matched_keywords + [k for k in r.matched_keywords if k not in cur.matched_keywords]
+            merged[pid] = replace(
+                cur,
+                matched_keywords=kws,
+                score=max(cur.score, r.score),
+                relevance=max(cur.relevance, r.relevance),
+            )
+    return list(merged.values())
+
+
+def _run_profiles(
+    cfg: Config,
+    started: float,
+    date_local: str,
+    ckpt: RunCheckpoint | None = None,
+) -> None:
+    """
+    多订阅模式：所有订阅的类别/关键词取并集只抓取一次，按订阅各自过滤、去重（各自的 state），
+    去重后的论文合并总结一次，再按订阅分别渲染、发送并保存 state。
+    成本随“不同论文数”增长，而不是“订阅数 × 论文数”。
+    """
+    if cfg.pipeline_mode == "staged":
+        print("[pipeline] profiles run in phased mode")
+    categories = list(dict.fromkeys(c for p in cfg.profiles for c in p.arxiv_categories))
+    keywords = list(dict.fromkeys(k for p in cfg.profiles for k in p.keywords))
+    papers = _fetch_or_resume(replace(cfg, arxiv_categories=categories, keywords=keywords), ckpt)
+    corpus_stats = _update_corpus_stats(cfg, papers, keywords)
+
+    selections: list[tuple[Profile, StateStore | SqliteStateStore, list[FilterResult]]] = []
+    for prof in cfg.profiles:
+        state = open_state_store(
+            prof.state_path,
+            cfg.state_backend,
+            journal_compact_bytes=cfg.state_journal_max_kb * 1024,
+        )
+        _requeue_undelivered(cfg, state, prof.name)
+        cats = set(prof.arxiv_categories)
+        mine = [p for p in papers if cats.intersection(p.categories)]
+        to_process = _select(cfg, state, mine, prof.keywords, corpus_stats, label=f"[{prof.name}]")
+        selections.append((prof, state, to_process))
+
+    merged = _merge_for_summary([sel for _, _, sel in selections])
+    total = sum(len(sel) for _, _, sel in selections)
+    print(f"[profiles] {len(cfg.profiles)} profiles, {total} selections, {len(merged)} unique papers")
+    summaries, failed = _summarize(cfg, merged, started, ckpt)
+
+    # 所有订阅共用一条 SMTP 连接（第一次发送时才连接，dry_run 不会连接）
+    with _mail_dispatch(cfg) as dispatcher, _make_mailer(cfg).session() as session:
+        for prof, state, to_process in selections:
+            ids = {r.paper.arxiv_id for r in to_process}
+            _deliver(
+                cfg,
+                state,
+                to_process,
+                summaries,
+                [f for f in failed if f.split(" ", 1)[0] in ids],
+                date_local,
+                subject_prefix=prof.mail_subject_prefix,
+                mail_to=prof.mail_to,
+                ckpt=ckpt,
+                profile=prof.name,
+                session=session,
+                dispatcher=dispatcher,
+            )
+        if session.connects:
+            print(f"[mail] {session.sent} message(s) over {session.connects} SMTP connection(s)")
+    _confirm_delivered(dispatcher, {prof.name: state for prof, state, _ in selections})
+    if cfg.dry_run:
+        return
+    if corpus_stats is not None:
+        corpus_stats.save()
+    if ckpt is not None:
+        ckpt.clear()
+
+
+def _run_staged(
+    cfg: Config,
+    state: StateStore | SqliteStateStore,
+    started: float,
+    ckpt: RunCheckpoint | None = None,
+) -> tuple[list[FilterResult], dict[str, str], list[str]]:
+    """
+    流水线模式：fetch -> filter -> dedupe -> summarize 各阶段由有界队列连接并行推进，
+    第一页论文解析出来后就可以开始调用 DeepSeek，而不必等最后一页抓完。
+    token 预算按到达顺序先到先得；BM25 排序/批量总结需要完整列表，只在 phased 模式下可用。
+    """
+    from .pipeline import Pipeline
+    from .scheduler import estimate_cost
+    from .summarizer import Summarizer
+
+    http_cache = _make_http_cache(cfg)
+    if ckpt is not None and ckpt.papers is not None:
+        print(f"[checkpoint] skip fetch: {len(ckpt.papers)} entries")
+        source: Iterable[ArxivPaper] = ckpt.papers
+    elif cfg.fetch_concurrency > 1:
+        # 逐页产出：并发抓取的页一到就进入 filter，而不是等全部抓完再开始流水线
+        source = iter_recent_concurrent(
+            categories=cfg.arxiv_categories,
+            keywords=cfg.keywords,
+            since_hours=cfg.since_hours,
+            max_results=cfg.limit,
+            max_workers=cfg.fetch_concurrency,
+            cache=http_cache,
+        )
+    else:
+        source = iter_recent(
+            categories=cfg.arxiv_categories,
+            keywords=cfg.keywords,
+            since_hours=cfg.since_hours,
+            max_results=cfg.limit,
+            cache=http_cache,
+        )
+
+    matcher = compile_keywords(cfg.keywords, boundary=cfg.keyword_boundary)
+    fetched: list[ArxivPaper] = []
+
+    def _filter(p: ArxivPaper) -> list[FilterResult]:
+        fetched.append(p)
+        r = score_paper(p, cfg.keywords, matcher=matcher)
+        return [r] if r.score >= 1 else []
+
+    def _dedupe(r: FilterResult) -> list[FilterResult]:
+        return [r] if state.filter_unsent([r.paper], cfg.resend_on_update) else []
+
+    summarizer = None
+    if cfg.deepseek_api_key:
+        summarizer = Summarizer(_make_client(cfg), cache=_make_summary_cache(cfg))
+    else:
+        print("[deepseek] DEEPSEEK_API_KEY not set; skip summarization")
+    deadline = started + cfg.run_time_budget_s if cfg.run_time_budget_s else None
+    budget_lock = threading.Lock()
+    tokens_left = [cfg.run_token_budget]
+
+    def _summarize(r: FilterResult) -> list[tuple[FilterResult, str | None, str | None]]:
+        if ckpt is not None and r.paper.arxiv_id in ckpt.summaries:
+            return [(r, ckpt.summaries[r.paper.arxiv_id], None)]
+        if summarizer is None:
+            return [(r, None, None)]
+        if deadline is not None and time.monotonic() > deadline:
+            return [(r, None, None)]
+        if cfg.run_token_budget > 0:
+            cost = estimate_cost(r, cfg.deepseek_max_tokens or None)
+            with budget_lock:
+                if cost > tokens_left[0]:
+                    return [(r, None, None)]
+                tokens_left[0] -= cost
+        p = r.paper
+        try:
+            text = summarizer.summarize_one(paper=p, matched_keywords=r.matched_keywords)
+            print(f"[deepseek] summarized: {p.arxiv_id}")
+            if ckpt is not None:
+                ckpt.add_summary(p.arxiv_id, text)
+            return [(r, text, None)]
+        except Exception as e:  # noqa: BLE001
+            return [(r, None, f"{p.arxiv_id} {p.title} ({type(e).__name__}: {e})")]
+
+    pipeline = (
+        Pipeline(source, source_name="fetch", queue_size=cfg.pipeline_queue_size)
+        .add_stage("filter", _filter)
+        .add_stage("dedupe", _dedupe)
+        .add_stage("summarize", _summarize, workers=cfg.deepseek_concurrency)
+    )
+    outputs = pipeline.run()
+    for st in pipeline.stats:
+        print(f"[pipeline] {st.describe()}")
+
+    # 与 filter_papers 相同的排序：score desc, updated desc
+    outputs.sort(key=lambda x: (x[0].score, x[0].paper.updated), reverse=True)
+    to_process = [r for r, _, _ in outputs]
+    if ckpt is not None:
+        if ckpt.papers is None:
+            ckpt.save_fetched(fetched)
+        ckpt.save_selected(to_process)
+    summaries = {r.paper.arxiv_id: text for r, text, _ in outputs if text is not None}
+    failed = [err for _, _, err in outputs if err is not None]
+    print(
+        f"[arxiv] fetched {pipeline.source_stats.items_out} entries in last {cfg.since_hours}h "
+        f"(limit={cfg.limit}); to_send {len(to_process)}, summarized {len(summaries)}"
+    )
+    return to_process, summaries, failed
+
+
+def _make_mailer(cfg: Config) -> SmtpMailer:
+    from .mailer import SmtpMailer
+
+    return SmtpMailer(
+        host=cfg.smtp_host or "",
+        port=cfg.smtp_port,
+        username=cfg.smtp_user or "",
+        password=cfg.smtp_pass or "",
+        use_ssl=cfg.smtp_use_ssl,
+        starttls=cfg.smtp_starttls,
+        timeout_s=30,
+        max_retries=3,
+    )
+
+
+@contextmanager
+def _mail_dispatch(cfg: Config) -> Iterator[OutboxDispatcher | None]:
+    """
+    启用 MAIL_OUTBOX_DIR 时启动后台投递线程（同时补发以前运行遗留的邮件），
+    退出时最多等待 MAIL_DISPATCH_WAIT_S 秒，未投递完的留在 outbox 里下次再发。
+    """
+    if cfg.dry_run or not cfg.mail_outbox_dir:
+        yield None
+        return
+    from .outbox import Outbox, OutboxDispatcher
+
+    outbox = Outbox(cfg.mail_outbox_dir, max_attempts=cfg.mail_outbox_max_attempts)
+    dispatcher = OutboxDispatcher(outbox, _make_mailer(cfg))
+    dispatcher.start()
+    try:
+        yield dispatcher
+    finally:
+        t0 = time.monotonic()
+        finished = dispatcher.close(timeout=cfg.mail_dispatch_wait_s or None)
+        print(
+            f"[outbox] delivered={dispatcher.delivered} deferred={dispatcher.deferred} "
+            f"(waited {time.monotonic() - t0:.1f}s after state save)"
+        )
+        if not finished:
+            print(f"[outbox] still sending after {cfg.mail_dispatch_wait_s}s; the rest stays queued")
+
+
+def _outbox_papers(cfg: Config, profile: str) -> set[str]:
+    """outbox 里尚未投递（不含 dead/）的邮件覆盖的论文。"""
+    if not cfg.mail_outbox_dir or not os.path.isdir(cfg.mail_outbox_dir):
+        return set()
+    from .outbox import Outbox
+
+    return {bid for item in Outbox(cfg.mail_outbox_dir).pending() if item.profile == profile for bid in item.papers}
+
+
+def _requeue_undelivered(cfg: Config, state: StateStore | SqliteStateStore, profile: str = "") -> None:
+    """
+    上次运行记为 queued、既没有确认投递、outbox 里也找不到对应邮件的论文
+    （outbox 目录随 Actions 缓存丢失，或投递失败移入 dead/），从 state 中移除，本次重新选入日报。
+    仍在 outbox 里等待投递的保持 queued，由本次的投递线程补发后确认。
+    """
+    queued = state.queued_ids()
+    if not queued:
+        return
+    lost = set(queued) - _outbox_papers(cfg, profile)
+    label = f"[{profile}]" if profile else ""
+    if lost:
+        state.unmark(lost)
+        print(f"[state]{label} {len(lost)} queued entries were never delivered; selecting them again")
+    if len(lost) < len(queued):
+        print(f"[state]{label} {len(queued) - len(lost)} queued entries still waiting in the outbox")
+
+
+def _confirm_delivered(
+    dispatcher: OutboxDispatcher | None, states: dict[str, StateStore | SqliteStateStore]
+) -> None:
+    """投递线程结束后，把已投递邮件覆盖的论文从 queued 改为已发送（同一篇仍有邮件待投递时保持 queued）。"""
+    if dispatcher is None or not dispatcher.delivered_items:
+        return
+    waiting = {(item.profile, bid) for item in dispatcher.outbox.pending() for bid in item.papers}
+    for profile, state in states.items():
+        done = {
+            bid
+            for item in dispatcher.delivered_items
+            if item.profile == profile
+            for bid in item.papers
+            if (profile, bid) not in waiting
+        }
+        n = state.mark_delivered(done)
+        if n:
+            state.save()
+            label = f"[{profile}]" if profile else ""
+            print(f"[state]{label} {n} queued entries confirmed delivered")
+
+
+def _render(
+    cfg: Config,
+    to_process: list[FilterResult],
+    summaries: dict[str, str],
+    failed: list[str],
+    date_local: str,
+    subject_prefix: str | None = None,
+) -> list[RenderedEmail]:
+    """把待发送列表渲染成一封或多封日报（受 MAIL_MAX_BYTES 约束）。"""
+    # 总结转成的 HTML 与总结缓存放在一起，缓存过的总结不再重复转换
+    html_cache = _make_summary_cache(cfg)
     items: list[RenderItem] = []
     for r in to_process:
         p = r.paper
+        md = summaries.get(p.arxiv_id)
         items.append(
             RenderItem(
                 title=p.title,
@@ -91,51 +603,197 @@ def main() -> int:
                 updated_iso=p.updated.isoformat(),
                 matched_keywords=r.matched_keywords,
                 abstract=p.summary,
-                summary_md=summaries.get(p.arxiv_id),
+                summary_md=md,
                 score=r.score,
+                summary_html=render_summary_html(md, html_cache) if md else None,
             )
         )
 
-    rendered = render_email(
-        subject_prefix=cfg.mail_subject_prefix,
+    return render_digests(
+        subject_prefix=subject_prefix or cfg.mail_subject_prefix,
         date_local=date_local,
         items=items,
         failed=failed,
+        max_bytes=cfg.mail_max_bytes,
+        oversize_mode=cfg.mail_oversize_mode,
     )
 
+
+def _send(
+    cfg: Config,
+    state: StateStore | SqliteStateStore,
+    digests: list[RenderedEmail],
+    sent: list[tuple[str, str]],
+    mail_to: list[str] | None = None,
+    ckpt: RunCheckpoint | None = None,
+    profile: str = "",
+    session: SmtpSession | None = None,
+    dispatcher: OutboxDispatcher | None = None,
+) -> None:
+    """
+    发送渲染好的日报，全部发出后把 sent（(arxiv_id, updated_iso) 列表）记入 state（dry_run 时只打印）。
+    传入 session 时复用其 SMTP 连接（多订阅共用一次握手），否则本次所有邮件（含拆分的多封）共用一次连接。
+    传入 dispatcher 时邮件写入 outbox 后由后台线程投递，state 立即保存但条目记为 queued，
+    投递确认后由 _confirm_delivered 改为已发送。
+    """
+    label = f"[{profile}]" if profile else ""
+    recipients = cfg.mail_to if mail_to is None else mail_to
+
     if cfg.dry_run:
-        print("[dry_run] enabled: will NOT send email, will NOT update state.")
-        print("\n" + "=" * 80 + "\n")
-        print(rendered.text)
-        print("\n" + "=" * 80 + "\n")
-        print(f"[dry_run] html_size={len(rendered.html)} bytes")
-        return 0
+        print(f"[dry_run]{label} enabled: will NOT send email, will NOT update state.")
+        for rendered in digests:
+            print("\n" + "=" * 80 + "\n")
+            print(rendered.text)
+            print("\n" + "=" * 80 + "\n")
+            print(
+                f"[dry_run]{label} html_size={len(rendered.html)} bytes"
+                + "".join(f", attachment {a.filename}={len(a.data)} bytes" for a in rendered.attachments)
+            )
+        return
 
-    mailer = SmtpMailer(
-        host=cfg.smtp_host or "",
-        port=cfg.smtp_port,
-        username=cfg.smtp_user or "",
-        password=cfg.smtp_pass or "",
-        use_ssl=cfg.smtp_use_ssl,
-        starttls=cfg.smtp_starttls,
-        timeout_s=30,
-        max_retries=3,
+    # 拆分成多封时共用一条 SMTP 连接（第一次真正发送时才连接）；调用方传入 session 时沿用它
+    with nullcontext(session) if session is not None else _make_mailer(cfg).session() as smtp:
+        for k, rendered in enumerate(digests, 1):
+            # 拆分成多封时每封单独记录，续跑只补发没发出去的那几封
+            mark = profile if len(digests) == 1 else f"{profile}#{k}"
+            part = "" if len(digests) == 1 else f" part {k}/{len(digests)}"
+            if ckpt is not None and mark in ckpt.mailed:
+                print(f"[checkpoint]{label}{part} mail already sent in the interrupted run; skip sending")
+            elif dispatcher is not None:
+                queued = dispatcher.outbox.enqueue(
+                    mail_from=cfg.mail_from or "",
+                    mail_to=recipients,
+                    subject=rendered.subject,
+                    text=rendered.text,
+                    html=rendered.html,
+                    per_recipient=cfg.mail_per_recipient,
+                    profile=profile,
+                    attachments=rendered.attachments,
+                    papers=[base_arxiv_id(arxiv_id) for arxiv_id, _ in sent],
+                )
+                dispatcher.submit(queued)
+                print(f"[mail]{label}{part} queued {len(queued)} message(s) in {dispatcher.outbox.path}")
+                if ckpt is not None:
+                    ckpt.mark_mailed(mark)
+            else:
+                n = smtp.send(
+                    mail_from=cfg.mail_from or "",
+                    mail_to=recipients,
+                    subject=rendered.subject,
+                    text=rendered.text,
+                    html=rendered.html,
+                    per_recipient=cfg.mail_per_recipient,
+                    attachments=rendered.attachments,
+                )
+                print(f"[mail]{label}{part} sent {n} message(s) to {len(recipients)} recipient(s)")
+                if ckpt is not None:
+                    ckpt.mark_mailed(mark)
+
+    # update state only after mail successfully sent；写入 outbox 的记为 queued，投递确认后才算已发送
+    for arxiv_id, updated_iso in sent:
+        state.mark_sent(arxiv_id, updated_iso, queued=dispatcher is not None)
+    state.save()
+    print(f"[state]{label} saved:", state.path)
+
+
+def _deliver(
+    cfg: Config,
+    state: StateStore | SqliteStateStore,
+    to_process: list[FilterResult],
+    summaries: dict[str, str],
+    failed: list[str],
+    date_local: str,
+    subject_prefix: str | None = None,
+    mail_to: list[str] | None = None,
+    ckpt: RunCheckpoint | None = None,
+    profile: str = "",
+    session: SmtpSession | None = None,
+    dispatcher: OutboxDispatcher | None = None,
+) -> None:
+    """渲染并发送一封日报，发送成功后更新 state；参数含义见 _render / _send。"""
+    digests = _render(cfg, to_process, summaries, failed, date_local, subject_prefix)
+    sent = [(r.paper.arxiv_id, r.paper.updated.isoformat()) for r in to_process]
+    _send(cfg, state, digests, sent, mail_to, ckpt, profile, session, dispatcher)
+
+
+def _open_checkpoint(cfg: Config, date_local: str, resume: bool) -> RunCheckpoint | None:
+    if not cfg.checkpoint_path:
+        return None
+    # 只有影响“选出哪些论文”的配置参与 key；改了这些配置的重跑不会复用旧检查点
+    key = run_key(
+        date_local,
+        {
+            "arxiv_categories": cfg.arxiv_categories,
+            "keywords": cfg.keywords,
+            "keyword_boundary": cfg.keyword_boundary,
+            "since_hours": cfg.since_hours,
+            "limit": cfg.limit,
+            "rank_top_k": cfg.rank_top_k,
+            "state_path": cfg.state_path,
+            "resend_on_update": cfg.resend_on_update,
+            "profiles": [asdict(p) for p in cfg.profiles],
+        },
     )
-    mailer.send(
-        mail_from=cfg.mail_from or "",
-        mail_to=cfg.mail_to,
-        subject=rendered.subject,
-        text=rendered.text,
-        html=rendered.html,
+    ckpt = RunCheckpoint(cfg.checkpoint_path, key, resume=resume)
+    if ckpt.resumed:
+        print(f"[checkpoint] resume from {cfg.checkpoint_path}: {ckpt.describe()}")
+    return ckpt
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.main")
+    parser.add_argument("-c", "--config", default="config.yaml", help="配置文件路径（默认 config.yaml）")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="从检查点（CHECKPOINT_PATH）继续上一次中断的运行，跳过已完成的步骤",
     )
-    print(f"[mail] sent to {len(cfg.mail_to)} recipient(s)")
+    return parser.parse_args(argv)
 
-    # update state only after mail successfully sent
-    for r in to_process:
-        p = r.paper
-        state.mark_sent(p.arxiv_id, p.updated.isoformat())
-    state.save()
-    print("[state] saved:", cfg.state_path)
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    started = time.monotonic()
+    cfg = load_config(args.config, validate=True)
+
+    print("[config] loaded:", {k: v for k, v in asdict(cfg).items() if k not in {"smtp_pass", "deepseek_api_key"}})
+
+    date_local = _local_date(cfg)
+
+    ckpt = _open_checkpoint(cfg, date_local, args.resume)
+    if cfg.profiles:
+        _run_profiles(cfg, started, date_local, ckpt)
+        return 0
+
+    state = open_state_store(
+        cfg.state_path,
+        cfg.state_backend,
+        journal_compact_bytes=cfg.state_journal_max_kb * 1024,
+    )
+    _requeue_undelivered(cfg, state)
+
+    corpus_stats = None
+    staged = cfg.pipeline_mode == "staged"
+    if staged and cfg.rank_top_k > 0:
+        print("[pipeline] RANK_TOP_K needs the full candidate list; falling back to phased mode")
+        staged = False
+    if staged and ckpt is not None and ckpt.selected is not None:
+        # 已选出待发送列表，只剩总结，按 phased 方式补齐即可
+        staged = False
+    if staged:
+        to_process, summaries, failed = _run_staged(cfg, state, started, ckpt)
+    else:
+        to_process, summaries, failed, corpus_stats = _run_phased(cfg, state, started, ckpt)
+
+    with _mail_dispatch(cfg) as dispatcher:
+        _deliver(cfg, state, to_process, summaries, failed, date_local, ckpt=ckpt, dispatcher=dispatcher)
+    _confirm_delivered(dispatcher, {"": state})
+    if cfg.dry_run:
+        return 0
+    if corpus_stats is not None:
+        corpus_stats.save()
+    if ckpt is not None:
+        ckpt.clear()
     return 0
 
 
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import base64
+from dataclasses import asdict, dataclass, field
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+from .mailer import SmtpMailer
+from .renderer import Attachment
+
+_STOP = object()
+
+
+@dataclass
+class OutboxItem:
+    id: str
+    created_at: float
+    mail_from: str
+    mail_to: list[str]
+    subject: str
+    text: str
+    html: str | None = None
+    profile: str = ""
+    attempts: int = 0
+    last_error: str | None = None
+    # [{"filename", "content_type", "data"(base64)}]
+    attachments: list[dict[str, str]] = field(default_factory=list)
+    # 这封日报覆盖的论文（base arXiv id）：投递确认后据此把 state 里的 queued 改为已发送
+    papers: list[str] = field(default_factory=list)
+
+    def decoded_attachments(self) -> list[Attachment]:
+        return [
+            Attachment(
+                filename=a["filename"],
+                content_type=a["content_type"],
+                data=base64.b64decode(a["data"]),
+            )
+            for a in self.attachments
+        ]
+
+
+class Outbox:
+    """
+    磁盘上的待发邮件队列，每封一个 JSON 文件：<dir>/<created_at>-<id>.json（文件名按入队时间排序）。
+    写入先落临时文件再 rename，并 fsync，入队返回后即使进程被杀也不会丢信；
+    投递成功后删除文件，超过 max_attempts 次仍失败的移入 <dir>/dead/ 等人工处理。
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5) -> None:
+        self.path = path
+        self.max_attempts = int(max_attempts)
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, item: OutboxItem) -> str:
+        return os.path.join(self.path, f"{item.created_at:017.6f}-{item.id}.json")
+
+    def _write(self, item: OutboxItem) -> None:
+        path = self._file(item)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(item), f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def enqueue(
+        self,
+        mail_from: str,
+        mail_to: list[str],
+        subject: str,
+        text: str,
+        html: str | None = None,
+        per_recipient: bool = False,
+        profile: str = "",
+        attachments: list[Attachment] | None = None,
+        papers: list[str] | None = None,
+    ) -> list[OutboxItem]:
+        """
+        per_recipient=True 时每个收件人单独一条，重试只会重发失败的那一封，不会让已收到的人收到重复邮件。
+        """
+        groups = [[rcpt] for rcpt in mail_to] if per_recipient else [list(mail_to)]
+        encoded = [
+            {
+                "filename": a.filename,
+                "content_type": a.content_type,
+                "data": base64.b64encode(a.data).decode("ascii"),
+            }
+            for a in attachments or []
+        ]
+        items: list[OutboxItem] = []
+        for rcpts in groups:
+            item = OutboxItem(
+                id=uuid.uuid4().hex[:12],
+                created_at=time.time(),
+                mail_from=mail_from,
+                mail_to=rcpts,
+                subject=subject,
+                text=text,
+                html=html,
+                profile=profile,
+                attachments=encoded,
+                papers=list(papers or []),
+            )
+            self._write(item)
+            items.append(item)
+        return items
+
+    def pending(self) -> list[OutboxItem]:
+        items: list[OutboxItem] = []
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.path, name), "r", encoding="utf-8") as f:
+                    items.append(OutboxItem(**json.load(f)))
+            except (OSError, ValueError, TypeError):
+                continue
+        return items
+
+    def done(self, item: OutboxItem) -> None:
+        try:
+            os.remove(self._file(item))
+        except FileNotFoundError:
+            pass
+
+    def failed(self, item: OutboxItem, err: BaseException) -> bool:
+        """记录一次失败；返回 True 表示已达到 max_attempts 并移入 dead/。"""
+        item.attempts += 1
+        item.last_error = f"{type(err).__name__}: {err}"
+        if item.attempts < self.max_attempts:
+            self._write(item)
+            return False
+        dead = os.path.join(self.path, "dead")
+        os.makedirs(dead, exist_ok=True)
+        os.replace(self._file(item), os.path.join(dead, os.path.basename(self._file(item))))
+        return True
+
+
+class OutboxDispatcher:
+    """
+    后台投递线程：start() 后先补发上次运行遗留的邮件，之后 submit() 的邮件按入队顺序投递，
+    全部复用一条 SMTP 会话。主线程入队后即可继续保存 state，不再等待网络。
+    close(timeout) 等待队列投递完；超时或失败的邮件留在 outbox 里，下次运行再发。
+    投递成功的邮件记在 delivered_items 里，调用方据此确认 state 中的 queued 条目。
+    """
+
+    def __init__(self, outbox: Outbox, mailer: SmtpMailer) -> None:
+        self.outbox = outbox
+        self.mailer = mailer
+        self.delivered = 0
+        self.deferred = 0
+        self.delivered_items: list[OutboxItem] = []
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+
+    def __enter__(self) -> OutboxDispatcher:
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def start(self) -> None:
+        leftovers = self.outbox.pending()
+        if leftovers:
+            print(f"[outbox] retrying {len(leftovers)} message(s) left by earlier runs")
+        for item in leftovers:
+            self._queue.put(item)
+        self._thread.start()
+
+    def submit(self, items: list[OutboxItem]) -> None:
+        for item in items:
+            self._queue.put(item)
+
+    def close(self, timeout: float | None = None) -> bool:
+        """返回 False 表示超时，仍有邮件在投递中（会留在 outbox 里）。"""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self) -> None:
+        with self.mailer.session() as session:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                label = f"[{item.profile}]" if item.profile else ""
+                try:
+                    session.send(
+                        item.mail_from,
+                        item.mail_to,
+                        item.subject,
+                        item.text,
+                        item.html,
+                        attachments=item.decoded_attachments(),
+                    )
+                except Exception as e:  # noqa: BLE001
+                    self.deferred += 1
+                    dead = self.outbox.failed(item, e)
+                    where = "moved to dead/" if dead else "kept for the next run"
+                    print(f"[outbox]{label} delivery failed ({type(e).__name__}: {e}); {where}")
+                    continue
+                self.outbox.done(item)
+                self.delivered += 1
+                self.delivered_items.append(item)
+                print(f"[outbox]{label} delivered to {len(item.mail_to)} recipient(s): {item.subject}")
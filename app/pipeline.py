@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int = 1
+    items_in: int = 0
+    items_out: int = 0
+    busy_s: float = 0.0  # 各 worker 在 fn 内的累计耗时
+    first_start: float | None = None
+    last_end: float | None = None
+
+    @property
+    def wall_s(self) -> float:
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    def describe(self) -> str:
+        return (
+            f"{self.name}: in={self.items_in} out={self.items_out} "
+            f"workers={self.workers} busy={self.busy_s:.1f}s wall={self.wall_s:.1f}s"
+        )
+
+
+@dataclass
+class _Stage:
+    stats: StageStats
+    fn: Callable[[Any], Iterable[Any]]
+
+
+class Pipeline:
+    """
+    多阶段流水线：source -> stage1 -> stage2 -> ... -> run() 的返回值。
+    - 相邻阶段之间是有界队列（queue_size），下游处理不过来时上游 put 会阻塞，形成背压；
+    - 每个阶段可以有多个 worker 线程，fn(item) 返回 0..n 个输出（过滤/展开都用同一个接口）；
+    - 阶段内抛出的异常会被记录下来，流水线继续排空，run() 结束时抛出第一个异常。
+    """
+
+    def __init__(self, source: Iterable[Any], source_name: str = "source", queue_size: int = 16) -> None:
+        self._source = source
+        self._queue_size = max(1, int(queue_size))
+        self.source_stats = StageStats(name=source_name)
+        self._stages: list[_Stage] = []
+        self._errors: list[BaseException] = []
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, fn: Callable[[Any], Iterable[Any]], workers: int = 1) -> Pipeline:
+        self._stages.append(_Stage(stats=StageStats(name=name, workers=max(1, int(workers))), fn=fn))
+        return self
+
+    @property
+    def stats(self) -> list[StageStats]:
+        return [self.source_stats] + [s.stats for s in self._stages]
+
+    def _record_error(self, e: BaseException) -> None:
+        with self._lock:
+            self._errors.append(e)
+
+    def _run_source(self, out_q: queue.Queue) -> None:
+        st = self.source_stats
+        st.first_start = time.monotonic()
+        try:
+            it = iter(self._source)
+            while True:
+                t0 = time.monotonic()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                finally:
+                    st.busy_s += time.monotonic() - t0
+                st.items_out += 1
+                out_q.put(item)
+        except BaseException as e:  # noqa: BLE001
+            self._record_error(e)
+        finally:
+            st.last_end = time.monotonic()
+            out_q.put(_DONE)
+
+    def _run_worker(
+        self, stage: _Stage, in_q: queue.Queue, out_q: queue.Queue, remaining: list[int]
+    ) -> None:
+        st = stage.stats
+        while True:
+            item = in_q.get()
+            if item is _DONE:
+                # 让同阶段其他 worker 也能看到结束标记；最后一个退出的 worker 通知下游
+                in_q.put(_DONE)
+                with self._lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                    st.last_end = time.monotonic()
+                if last:
+                    out_q.put(_DONE)
+                return
+            t0 = time.monotonic()
+            with self._lock:
+                st.items_in += 1
+                if st.first_start is None:
+                    st.first_start = t0
+            try:
+                outputs = list(stage.fn(item))
+            except BaseException as e:  # noqa: BLE001
+                self._record_error(e)
+                outputs = []
+            with self._lock:
+                st.busy_s += time.monotonic() - t0
+                st.items_out += len(outputs)
+            for out in outputs:
+                out_q.put(out)
+
+    def run(self) -> list[Any]:
+        queues = [queue.Queue(maxsize=self._queue_size) for _ in range(len(self._stages) + 1)]
+        threads = [threading.Thread(target=self._run_source, args=(queues[0],), daemon=True)]
+        for idx, stage in enumerate(self._stages):
+            remaining = [stage.stats.workers]
+            for _ in range(stage.stats.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._run_worker,
+                        args=(stage, queues[idx], queues[idx + 1], remaining),
+                        daemon=True,
+                    )
+                )
+        for t in threads:
+            t.start()
+
+        results: list[Any] = []
+        sink = queues[-1]
+        while True:
+            item = sink.get()
+            if item is _DONE:
+                break
+            results.append(item)
+        for t in threads:
+            t.join()
+        if self._errors:
+            raise self._errors[0]
+        return results
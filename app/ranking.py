@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from dataclasses import replace
+import json
+import os
+from typing import Any
+
+import numpy as np
+
+from .arxiv_client import ArxivPaper
+from .filtering import FilterResult
+from .keyword_matcher import KeywordMatcher
+from .state_store import base_arxiv_id
+
+# 去重窗口：最近计入统计的论文 id，避免同一天重跑把同一批论文重复计入 df
+_MAX_RECENT_IDS = 20000
+
+
+class CorpusStats:
+    """
+    跨运行累积的语料统计（BM25 的 idf / avgdl 来源），按关键词（归一化后的 pattern）记 df。
+    每个关键词另记“参与统计的文档数”（pattern_docs）：新加的关键词从加入那次运行起计数，
+    当次抓到的论文即使已计入过也会补算它的 df，idf 用它自己的 df / 文档数，不与老关键词的 n_docs 混用。
+
+    JSON 格式：
+    {
+      "n_docs": 12345,
+      "title_len": 123456,       # 标题总词数
+      "abstract_len": 2345678,   # 摘要总词数
+      "df": { "rlhf": 321, ... },
+      "pattern_docs": { "rlhf": 12345, "grpo": 180, ... },
+      "recent_ids": ["2501.01234", ...]
+    }
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        data: dict[str, Any] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f) or {}
+        self.n_docs = int(data.get("n_docs", 0))
+        self.title_len = int(data.get("title_len", 0))
+        self.abstract_len = int(data.get("abstract_len", 0))
+        self.df: dict[str, int] = dict(data.get("df", {}))
+        # 旧文件没有 pattern_docs：已有 df 的关键词视为从一开始就参与统计
+        self.pattern_docs: dict[str, int] = dict(
+            data.get("pattern_docs") or {pat: self.n_docs for pat in self.df}
+        )
+        self._recent: dict[str, None] = dict.fromkeys(data.get("recent_ids", []))
+
+    def update(self, papers: list[ArxivPaper], matcher: KeywordMatcher) -> int:
+        """把本次抓到、且未计入过的论文并入统计（新关键词对本次所有论文补算 df）；返回新计入的篇数。"""
+        new_pids = {pid for pid, pat in enumerate(matcher.patterns) if pat not in self.pattern_docs}
+        for pid in new_pids:
+            self.pattern_docs[matcher.patterns[pid]] = 0
+        added = 0
+        batch: set[str] = set()
+        for p in papers:
+            bid = base_arxiv_id(p.arxiv_id)
+            if bid in batch:
+                continue
+            batch.add(bid)
+            fresh = bid not in self._recent
+            if not fresh and not new_pids:
+                continue
+            title = (p.title or "").lower()
+            abstract = (p.summary or "").lower()
+            hits = matcher.counts(title + "\n" + abstract)
+            # 已计入过的论文只补算新关键词
+            pids = range(len(matcher.patterns)) if fresh else new_pids
+            for pid in pids:
+                pat = matcher.patterns[pid]
+                self.pattern_docs[pat] += 1
+                if pid in hits:
+                    self.df[pat] = self.df.get(pat, 0) + 1
+            if fresh:
+                self._recent[bid] = None
+                self.n_docs += 1
+                self.title_len += len(title.split())
+                self.abstract_len += len(abstract.split())
+                added += 1
+        if len(self._recent) > _MAX_RECENT_IDS:
+            keep = list(self._recent)[-_MAX_RECENT_IDS:]
+            self._recent = dict.fromkeys(keep)
+        return added
+
+    def idf(self, patterns: list[str]) -> np.ndarray:
+        n = np.array([max(self.pattern_docs.get(p, self.n_docs), 1) for p in patterns], dtype=np.float64)
+        df = np.array([self.df.get(p, 0) for p in patterns], dtype=np.float64)
+        return np.log1p((n - df + 0.5) / (df + 0.5))
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "n_docs": self.n_docs,
+                    "title_len": self.title_len,
+                    "abstract_len": self.abstract_len,
+                    "df": self.df,
+                    "pattern_docs": self.pattern_docs,
+                    "recent_ids": list(self._recent),
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp, self.path)
+
+
+def rank_results(
+    results: list[FilterResult],
+    matcher: KeywordMatcher,
+    stats: CorpusStats,
+    title_weight: float = 2.0,
+    abstract_weight: float = 1.0,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> list[FilterResult]:
+    """
+    BM25F 风格打分：标题/摘要的词频与长度按字段权重合并，idf 来自跨运行累积的 df。
+    整批论文一次性组成 [论文 × 关键词] 矩阵做向量化计算，结果写入 relevance 并按其降序返回。
+    """
+    if not results or not matcher.patterns:
+        return list(results)
+
+    n, m = len(results), len(matcher.patterns)
+    tf_title = np.zeros((n, m), dtype=np.float64)
+    tf_abs = np.zeros((n, m), dtype=np.float64)
+    len_title = np.zeros(n, dtype=np.float64)
+    len_abs = np.zeros(n, dtype=np.float64)
+    for i, r in enumerate(results):
+        title = (r.paper.title or "").lower()
+        abstract = (r.paper.summary or "").lower()
+        for pid, c in matcher.counts(title).items():
+            tf_title[i, pid] = c
+        for pid, c in matcher.counts(abstract).items():
+            tf_abs[i, pid] = c
+        len_title[i] = len(title.split())
+        len_abs[i] = len(abstract.split())
+
+    if stats.n_docs > 0:
+        avg_title = stats.title_len / stats.n_docs
+        avg_abs = stats.abstract_len / stats.n_docs
+    else:
+        avg_title = float(len_title.mean())
+        avg_abs = float(len_abs.mean())
+
+    tf = title_weight * tf_title + abstract_weight * tf_abs
+    dl = title_weight * len_title + abstract_weight * len_abs
+    avgdl = max(title_weight * avg_title + abstract_weight * avg_abs, 1.0)
+    norm = k1 * (1.0 - b + b * dl / avgdl)
+    scores = (stats.idf(matcher.patterns) * (tf * (k1 + 1.0)) / (tf + norm[:, None])).sum(axis=1)
+
+    order = np.argsort(-scores, kind="stable")
+    return [replace(results[i], relevance=float(scores[i])) for i in order]
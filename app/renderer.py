@@ -1,8 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
+import gzip
+import hashlib
 from html import escape
+import re
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from .summary_cache import SummaryCache
 
 
 @dataclass(frozen=True)
@@ -17,6 +25,14 @@ class RenderItem:
     abstract: str
     summary_md: str | None
     score: int
+    summary_html: str | None = None  # 预先转换好的总结 HTML；为空时渲染时按 summary_md 转换
+
+
+@dataclass(frozen=True)
+class Attachment:
+    filename: str
+    content_type: str  # 如 application/gzip
+    data: bytes
 
 
 @dataclass(frozen=True)
@@ -24,6 +40,7 @@ class RenderedEmail:
     subject: str
     text: str
     html: str
+    attachments: list[Attachment] = field(default_factory=list)
 
 
 def _shorten(text: str, n: int = 900) -> str:
@@ -57,6 +74,241 @@ def _format_authors(authors: object) -> str:
     return str(authors)
 
 
+# 转换规则变化时递增，持久化缓存里旧版本的 HTML 自动失效
+MARKDOWN_VERSION = 2
+
+_MD_FENCE = re.compile(r"^\s*(```|~~~)")
+_MD_HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+_MD_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_MD_ORDERED = re.compile(r"^(\s*)\d{1,3}[.)]\s+(.*)$")
+_MD_CODE_SPAN = re.compile(r"`([^`\n]+)`")
+_MD_BOLD = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*|__(?=\S)(.+?)(?<=\S)__")
+
+_H_CODE_SPAN = "<code style='background:#f3f4f6; border-radius:4px; padding:0 3px; font-size:12px;'>"
+_H_CODE_BLOCK = (
+    "<pre style='background:#f3f4f6; border-radius:6px; padding:8px; font-size:12px; "
+    "white-space:pre-wrap; margin:6px 0;'><code>"
+)
+_H_HEADING = "<div style='font-weight:700; font-size:{size}px; margin:10px 0 4px 0;'>"
+_H_LIST = "<{tag} style='margin:4px 0; padding-left:22px;'>"
+_H_PARA = "<p style='margin:4px 0;'>"
+
+
+def _md_inline(text: str) -> str:
+    """先转义再套用行内规则（反引号代码、加粗），不会放出原始 HTML。"""
+    out: list[str] = []
+    pos = 0
+    for m in _MD_CODE_SPAN.finditer(text):
+        out.append(_MD_BOLD.sub(lambda b: f"<b>{b.group(1) or b.group(2)}</b>", escape(text[pos : m.start()])))
+        out.append(_H_CODE_SPAN + escape(m.group(1)) + "</code>")
+        pos = m.end()
+    out.append(_MD_BOLD.sub(lambda b: f"<b>{b.group(1) or b.group(2)}</b>", escape(text[pos:])))
+    return "".join(out)
+
+
+@lru_cache(maxsize=4096)
+def markdown_to_html(md: str) -> str:
+    """
+    DeepSeek 总结里常见的 Markdown 子集转 HTML：# 标题、- / 1. 列表（按缩进嵌套）、**加粗**、`代码`、``` 代码块。
+    其余内容按段落输出（段内换行保留为 <br/>），所有文本都会转义。
+    """
+    out: list[str] = []
+    para: list[str] = []
+    lists: list[tuple[int, str]] = []  # (缩进, ul/ol) 栈
+    code: list[str] | None = None
+    after_blank = False
+
+    def close_para() -> None:
+        if para:
+            out.append(_H_PARA + "<br/>".join(para) + "</p>")
+            para.clear()
+
+    def close_lists(indent: int = -1) -> None:
+        while lists and lists[-1][0] > indent:
+            out.append(f"</li></{lists.pop()[1]}>")
+
+    for line in md.splitlines():
+        if code is not None:
+            if _MD_FENCE.match(line):
+                out.append(_H_CODE_BLOCK + escape("\n".join(code)) + "</code></pre>")
+                code = None
+            else:
+                code.append(line)
+            continue
+        if _MD_FENCE.match(line):
+            close_para()
+            close_lists()
+            code = []
+            continue
+        if not line.strip():
+            close_para()
+            after_blank = True
+            continue
+        blank_before, after_blank = after_blank, False
+        m = _MD_HEADING.match(line)
+        if m:
+            close_para()
+            close_lists()
+            size = 15 if len(m.group(1)) <= 2 else 14
+            out.append(_H_HEADING.format(size=size) + _md_inline(m.group(2)) + "</div>")
+            continue
+        m = _MD_BULLET.match(line) or _MD_ORDERED.match(line)
+        if m:
+            close_para()
+            indent = len(m.group(1).expandtabs(4))
+            tag = "ul" if m.re is _MD_BULLET else "ol"
+            close_lists(indent)
+            if lists and lists[-1][0] == indent and lists[-1][1] == tag:
+                out.append("</li><li>")
+            elif lists and lists[-1][0] == indent:
+                out.append(f"</li></{lists.pop()[1]}>")
+                lists.append((indent, tag))
+                out.append(_H_LIST.format(tag=tag) + "<li>")
+            else:
+                lists.append((indent, tag))
+                out.append(_H_LIST.format(tag=tag) + "<li>")
+            out.append(_md_inline(m.group(2)))
+            continue
+        if lists and blank_before and len(line) - len(line.lstrip()) <= lists[0][0]:
+            # 空行后不缩进的普通文本：列表已结束
+            close_lists()
+        if lists:
+            # 列表项的续行（紧跟的行，或空行后缩进的段落）
+            out.append("<br/>" + _md_inline(line.strip()))
+            continue
+        para.append(_md_inline(line.strip()))
+    if code is not None:
+        out.append(_H_CODE_BLOCK + escape("\n".join(code)) + "</code></pre>")
+    close_para()
+    close_lists()
+    return "\n".join(out)
+
+
+def summary_html_key(md: str) -> str:
+    raw = f"md-v{MARKDOWN_VERSION}\0{md}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def render_summary_html(md: str, cache: SummaryCache | None = None) -> str:
+    """按总结内容哈希记忆：进程内 lru_cache + 与总结缓存放在一起的 .html 文件，缓存过的总结不再重新转换。"""
+    if cache is None:
+        return markdown_to_html(md)
+    key = summary_html_key(md)
+    html = cache.get_html(key)
+    if html is None:
+        html = markdown_to_html(md)
+        cache.put_html(key, html)
+    return html
+
+
+def _cut(normalized: str, n: int) -> str:
+    """_shorten 的后半步：输入已经是折叠过空白的文本。"""
+    return normalized if len(normalized) <= n else (normalized[: n - 1] + "…")
+
+
+# 静态片段在导入时拼好一次；每篇论文只做一次 str.format，文本与 HTML 两份输出在同一遍循环里写出
+_EMPTY = "今天没有命中关键词的论文。"
+
+_H_HEAD = (
+    "<!doctype html>\n"
+    "<html><head><meta charset='utf-8' />\n"
+    "<meta name='viewport' content='width=device-width, initial-scale=1' />\n"
+    "<title>{subject}</title>\n"
+    "</head><body style='font-family: -apple-system, BlinkMacSystemFont, Segoe UI, Roboto, Helvetica, Arial, sans-serif; line-height:1.5;'>\n"
+    "<h2 style='margin:0 0 12px 0;'>{subject}</h2>\n"
+)
+_H_EMPTY = f"<p>{_EMPTY}</p>\n"
+_H_ITEM_OPEN = (
+    "<div style='border:1px solid #e5e7eb; border-radius:10px; padding:14px; margin:12px 0;'>\n"
+    "<div style='font-size:16px; font-weight:700; margin-bottom:6px;'>{i}. "
+    "<a href='{link}' style='text-decoration:none;'>{title}</a></div>\n"
+    "<div style='color:#374151; font-size:13px;'>"
+)
+_H_ITEM_ABSTRACT = (
+    "</div>\n"
+    "<hr style='border:none; border-top:1px solid #eee; margin:10px 0;'/>\n"
+    "<div style='font-size:13px; color:#111827;'><b>Abstract</b></div>\n"
+    "<div style='font-size:13px; color:#111827; white-space:pre-wrap;'>"
+)
+_H_ITEM_SUMMARY = (
+    "</div>\n"
+    "<div style='height:10px;'></div>\n"
+    "<div style='font-size:13px; color:#111827;'><b>Summary</b></div>\n"
+)
+_H_SUMMARY_OPEN = "<div style='font-size:13px; color:#111827;'>"
+_H_SUMMARY_MISSING = "<div style='font-size:13px; color:#6b7280;'>未生成/跳过</div>\n"
+_H_ITEM_CLOSE = "</div>\n"
+_H_FAILED_OPEN = "<h3 style='margin-top:18px;'>未总结成功的条目</h3>\n<ul>\n"
+_H_FOOT = "<p style='color:#6b7280; font-size:12px;'>此邮件由 GitHub Actions 自动生成。</p>\n</body></html>"
+
+_T_ITEM_HEAD = "{i}. {title}\n   arXiv: {arxiv_id}\n   Link: {link}\n"
+_T_ITEM_TAIL = "   Updated: {updated}\n   Abstract:\n   {abstract}\n"
+
+
+def _write_item(i: int, it: RenderItem, text: Callable[[str], Any], html: Callable[[str], Any]) -> None:
+    """一篇论文：共享字段（作者、类别、关键词、摘要）只格式化一次，分别写入文本与 HTML。"""
+    authors = _format_authors(it.authors) if it.authors else ""
+    categories = ", ".join(it.categories) if it.categories else ""
+    matched = ", ".join(it.matched_keywords) if it.matched_keywords else ""
+    abstract = " ".join((it.abstract or "").split())
+
+    # Text
+    text(_T_ITEM_HEAD.format(i=i, title=it.title, arxiv_id=it.arxiv_id, link=it.link_abs))
+    if authors:
+        text(f"   Authors: {authors}\n")
+    if categories:
+        text(f"   Categories: {categories}\n")
+    if matched:
+        text(f"   Matched: {matched} (score={it.score})\n")
+    text(_T_ITEM_TAIL.format(updated=it.updated_iso, abstract=_cut(abstract, 600)))
+    if it.summary_md:
+        # keep indentation
+        text("   Summary:\n")
+        for ln in it.summary_md.splitlines():
+            text(f"   {ln}\n")
+    else:
+        text("   Summary: (未生成/跳过)\n")
+    text("\n")
+
+    # HTML
+    html(_H_ITEM_OPEN.format(i=i, link=escape(it.link_abs), title=escape(it.title)))
+    html(f"<b>arXiv</b>: {escape(it.arxiv_id)}")
+    if authors:
+        html(f"<br/><b>Authors</b>: {escape(authors)}")
+    if categories:
+        html(f"<br/><b>Categories</b>: {escape(categories)}")
+    html(f"<br/><b>Updated</b>: {escape(it.updated_iso)}")
+    if matched:
+        html(f"<br/><b>Matched</b>: {escape(matched)} (score={it.score})")
+    html(_H_ITEM_ABSTRACT)
+    html(escape(_cut(abstract, 900)))
+    html(_H_ITEM_SUMMARY)
+    if it.summary_md:
+        html(_H_SUMMARY_OPEN)
+        html(it.summary_html if it.summary_html is not None else markdown_to_html(it.summary_md))
+        html("</div>\n")
+    else:
+        html(_H_SUMMARY_MISSING)
+    html(_H_ITEM_CLOSE)
+
+
+def _open(subject: str) -> tuple[list[str], list[str]]:
+    return [f"{subject}\n\n"], [_H_HEAD.format(subject=escape(subject))]
+
+
+def _close(text_parts: list[str], html_parts: list[str], failed: list[str]) -> tuple[str, str]:
+    if failed:
+        text_parts.append("未总结成功的条目：\n")
+        html_parts.append(_H_FAILED_OPEN)
+        for x in failed:
+            text_parts.append(f"- {x}\n")
+            html_parts.append(f"<li>{escape(x)}</li>\n")
+        text_parts.append("\n")
+        html_parts.append("</ul>\n")
+    html_parts.append(_H_FOOT)
+    return "".join(text_parts).strip() + "\n", "".join(html_parts)
+
+
 def render_email(
     subject_prefix: str,
     date_local: str,
@@ -66,94 +318,152 @@ def render_email(
     failed = failed or []
     subject = f"{subject_prefix} {date_local}（{len(items)}篇）"
 
-    # Text
-    lines: list[str] = []
-    lines.append(subject)
-    lines.append("")
+    text_parts, html_parts = _open(subject)
+    text = text_parts.append
+    html = html_parts.append
     if not items:
-        lines.append("今天没有命中关键词的论文。")
+        text(_EMPTY + "\n")
+        html(_H_EMPTY)
+
     for i, it in enumerate(items, 1):
-        lines.append(f"{i}. {it.title}")
-        lines.append(f"   arXiv: {it.arxiv_id}")
-        lines.append(f"   Link: {it.link_abs}")
-        if it.authors:
-            lines.append(f"   Authors: {_format_authors(it.authors)}")
-        if it.categories:
-            lines.append(f"   Categories: {', '.join(it.categories)}")
-        if it.matched_keywords:
-            lines.append(f"   Matched: {', '.join(it.matched_keywords)} (score={it.score})")
-        lines.append(f"   Updated: {it.updated_iso}")
-        lines.append("   Abstract:")
-        lines.append(f"   {_shorten(it.abstract, 600)}")
-        if it.summary_md:
-            lines.append("   Summary:")
-            # keep indentation
-            for ln in it.summary_md.splitlines():
-                lines.append(f"   {ln}")
-        else:
-            lines.append("   Summary: (未生成/跳过)")
-        lines.append("")
-    if failed:
-        lines.append("未总结成功的条目：")
-        for x in failed:
-            lines.append(f"- {x}")
-        lines.append("")
-    text_body = "\n".join(lines).strip() + "\n"
-
-    # HTML (minimal, self-contained)
-    html_parts: list[str] = []
-    html_parts.append("<!doctype html>")
-    html_parts.append("<html><head><meta charset='utf-8' />")
-    html_parts.append("<meta name='viewport' content='width=device-width, initial-scale=1' />")
-    html_parts.append("<title>" + escape(subject) + "</title>")
-    html_parts.append("</head><body style='font-family: -apple-system, BlinkMacSystemFont, Segoe UI, Roboto, Helvetica, Arial, sans-serif; line-height:1.5;'>")
-    html_parts.append(f"<h2 style='margin:0 0 12px 0;'>{escape(subject)}</h2>")
+        _write_item(i, it, text, html)
+
+    text_body, html_body = _close(text_parts, html_parts, failed)
+    return RenderedEmail(subject=subject, text=text_body, html=html_body)
+
+
+OVERSIZE_MODES = ("split", "attach")
+
+_H_INDEX_NOTE = "<p style='color:#374151; font-size:13px;'>{note}</p>\n<ol style='padding-left:22px;'>\n"
+_H_INDEX_ITEM = (
+    "<li style='margin:4px 0;'><a href='{link}' style='text-decoration:none;'>{title}</a>"
+    " <span style='color:#6b7280; font-size:12px;'>{matched}</span></li>\n"
+)
 
-    if not items:
-        html_parts.append("<p>今天没有命中关键词的论文。</p>")
 
+def _size(text: str, html: str) -> int:
+    return len(text.encode("utf-8")) + len(html.encode("utf-8"))
+
+
+def render_digests(
+    subject_prefix: str,
+    date_local: str,
+    items: list[RenderItem],
+    failed: list[str] | None = None,
+    max_bytes: int = 0,
+    oversize_mode: str = "split",
+) -> list[RenderedEmail]:
+    """
+    带大小预算的渲染（正文大小 = 文本 + HTML 的 UTF-8 字节数；max_bytes=0 表示不限，等同 render_email）。
+    每篇论文渲染成片段后立即累计字节数，不需要先渲染整封再测量：
+    - split：超出预算时开始新的一封，标题带“第 k/n 封”，编号连续，失败列表放在最后一封；
+    - attach：超出预算时正文只保留标题 + 链接的索引，完整日报（HTML）gzip 压缩后作为附件；
+      索引本身也受预算约束，放不下的条目只注明“见附件”。
+    单篇超过预算的论文会单独成封（split）。
+    """
+    failed = failed or []
+    if max_bytes <= 0 or not items:
+        return [render_email(subject_prefix, date_local, items, failed)]
+
+    subject = f"{subject_prefix} {date_local}（{len(items)}篇）"
+    # 头尾（含失败列表）的开销按最长的标题估算，每封都预留
+    shell_t, shell_h = _open(subject + "，第 99/99 封")
+    overhead = _size(*_close(shell_t, shell_h, failed))
+
+    groups: list[list[tuple[str, str]]] = [[]]
+    group_size = overhead
+    total = overhead
     for i, it in enumerate(items, 1):
-        html_parts.append("<div style='border:1px solid #e5e7eb; border-radius:10px; padding:14px; margin:12px 0;'>")
-        html_parts.append(
-            f"<div style='font-size:16px; font-weight:700; margin-bottom:6px;'>{i}. "
-            f"<a href='{escape(it.link_abs)}' style='text-decoration:none;'>{escape(it.title)}</a>"
-            f"</div>"
-        )
-        meta = []
-        meta.append(f"<b>arXiv</b>: {escape(it.arxiv_id)}")
-        if it.authors:
-            meta.append(f"<b>Authors</b>: {escape(_format_authors(it.authors))}")
-        if it.categories:
-            meta.append(f"<b>Categories</b>: {escape(', '.join(it.categories))}")
-        meta.append(f"<b>Updated</b>: {escape(it.updated_iso)}")
-        if it.matched_keywords:
-            meta.append(
-                f"<b>Matched</b>: {escape(', '.join(it.matched_keywords))} (score={it.score})"
-            )
-        html_parts.append("<div style='color:#374151; font-size:13px;'>" + "<br/>".join(meta) + "</div>")
-        html_parts.append("<hr style='border:none; border-top:1px solid #eee; margin:10px 0;'/>")
-        html_parts.append("<div style='font-size:13px; color:#111827;'><b>Abstract</b></div>")
-        html_parts.append("<div style='font-size:13px; color:#111827; white-space:pre-wrap;'>" + escape(_shorten(it.abstract, 900)) + "</div>")
-        html_parts.append("<div style='height:10px;'></div>")
-        html_parts.append("<div style='font-size:13px; color:#111827;'><b>Summary</b></div>")
-        if it.summary_md:
-            # keep markdown as pre-wrap plain text (most mail clients render safely)
-            html_parts.append("<div style='font-size:13px; color:#111827; white-space:pre-wrap;'>" + escape(it.summary_md) + "</div>")
-        else:
-            html_parts.append("<div style='font-size:13px; color:#6b7280;'>未生成/跳过</div>")
-        html_parts.append("</div>")
+        tb: list[str] = []
+        hb: list[str] = []
+        _write_item(i, it, tb.append, hb.append)
+        frag = ("".join(tb), "".join(hb))
+        size = _size(*frag)
+        total += size
+        if oversize_mode == "split" and groups[-1] and group_size + size > max_bytes:
+            groups.append([])
+            group_size = overhead
+        groups[-1].append(frag)
+        group_size += size
+
+    if len(groups) == 1 and (oversize_mode == "split" or total <= max_bytes):
+        text_parts, html_parts = _open(subject)
+        for t, h in groups[0]:
+            text_parts.append(t)
+            html_parts.append(h)
+        text_body, html_body = _close(text_parts, html_parts, failed)
+        return [RenderedEmail(subject=subject, text=text_body, html=html_body)]
+
+    if oversize_mode == "attach":
+        return [_render_with_attachment(subject, date_local, items, failed, groups[0], total, max_bytes)]
+
+    out: list[RenderedEmail] = []
+    n = len(groups)
+    for k, group in enumerate(groups, 1):
+        sub = f"{subject}，第 {k}/{n} 封"
+        text_parts, html_parts = _open(sub)
+        for t, h in group:
+            text_parts.append(t)
+            html_parts.append(h)
+        text_body, html_body = _close(text_parts, html_parts, failed if k == n else [])
+        out.append(RenderedEmail(subject=sub, text=text_body, html=html_body))
+    return out
 
-    if failed:
-        html_parts.append("<h3 style='margin-top:18px;'>未总结成功的条目</h3>")
-        html_parts.append("<ul>")
-        for x in failed:
-            html_parts.append("<li>" + escape(x) + "</li>")
-        html_parts.append("</ul>")
 
-    html_parts.append("<p style='color:#6b7280; font-size:12px;'>此邮件由 GitHub Actions 自动生成。</p>")
-    html_parts.append("</body></html>")
+def _render_with_attachment(
+    subject: str,
+    date_local: str,
+    items: list[RenderItem],
+    failed: list[str],
+    fragments: list[tuple[str, str]],
+    total: int,
+    max_bytes: int,
+) -> RenderedEmail:
+    # 完整日报复用已渲染好的片段拼成 HTML，压缩后作为附件
+    _, html_parts = _open(subject)
+    html_parts.extend(h for _, h in fragments)
+    _, full_html = _close([], html_parts, failed)
+    filename = f"arxiv-digest-{date_local}.html.gz"
+    data = gzip.compress(full_html.encode("utf-8"), mtime=0)
+    note = (
+        f"日报共 {len(items)} 篇，完整内容（摘要与总结，约 {total // 1024} KB）"
+        f"见附件 {filename}（gzip 压缩的 HTML）。"
+    )
 
-    return RenderedEmail(subject=subject, text=text_body, html="\n".join(html_parts))
+    text_parts, html_parts = _open(subject)
+    text_parts.append(note + "\n\n")
+    html_parts.append(_H_INDEX_NOTE.format(note=escape(note)))
+    # 索引同样按字节累计：头尾（含失败列表）+ 截断说明预留在前，放不下的条目只在说明里计数
+    rest_note = f"……其余 {len(items)} 篇见附件 {filename}。"
+    budget = (
+        max_bytes
+        - _size(*_close(list(text_parts), list(html_parts), failed))
+        - _size(rest_note + "\n", f"<li style='list-style:none;'>{escape(rest_note)}</li>\n</ol>\n")
+    )
+    shown = 0
+    for i, it in enumerate(items, 1):
+        matched = ", ".join(it.matched_keywords)
+        t = f"{i}. {it.title}\n   {it.link_abs}\n"
+        h = _H_INDEX_ITEM.format(link=escape(it.link_abs), title=escape(it.title), matched=escape(matched))
+        budget -= _size(t, h)
+        if budget < 0:
+            break
+        text_parts.append(t)
+        html_parts.append(h)
+        shown += 1
+    if shown < len(items):
+        rest_note = f"……其余 {len(items) - shown} 篇见附件 {filename}。"
+        text_parts.append(rest_note + "\n")
+        html_parts.append(f"<li style='list-style:none;'>{escape(rest_note)}</li>\n")
+    text_parts.append("\n")
+    html_parts.append("</ol>\n")
+    text_body, html_body = _close(text_parts, html_parts, failed)
+    return RenderedEmail(
+        subject=subject,
+        text=text_body,
+        html=html_body,
+        attachments=[Attachment(filename=filename, content_type="application/gzip", data=data)],
+    )
 
 
 def local_date_string(dt: datetime) -> str:
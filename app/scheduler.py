@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .filtering import FilterResult
+from .summarizer import OUTPUT_TOKENS_PER_PAPER, SYSTEM_PROMPT, build_user_prompt, estimate_tokens
+
+
+@dataclass(frozen=True)
+class SummaryPlan:
+    selected: list[FilterResult]  # 按优先级（分数/token）降序，调用方应按此顺序提交
+    skipped: list[FilterResult]  # 超出 token 预算，只渲染摘要
+    est_tokens: int
+
+
+def estimate_cost(r: FilterResult, max_tokens: int | None = None) -> int:
+    """
+    单篇总结的预估 token：系统提示词 + 用户提示词 + 预留输出。
+    设置了 max_tokens（DEEPSEEK_MAX_TOKENS）时输出最多这么多，预留量取两者较小值。
+    """
+    prompt = build_user_prompt(r.paper, r.matched_keywords)
+    output = min(max_tokens, OUTPUT_TOKENS_PER_PAPER) if max_tokens else OUTPUT_TOKENS_PER_PAPER
+    return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt) + output
+
+
+def plan_summaries(
+    results: list[FilterResult], token_budget: int = 0, max_tokens: int | None = None
+) -> SummaryPlan:
+    """
+    在过滤/去重之后、调用 DeepSeek 之前排定总结顺序：
+    按“相关度 / 预估 token”从高到低贪心选入，直到用完 token_budget（0 = 不限）。
+    放不下的论文跳过但继续尝试更短的，保证预算尽量用在性价比高的论文上。
+    """
+    costs = [estimate_cost(r, max_tokens) for r in results]
+
+    def _value(r: FilterResult) -> float:
+        return r.relevance if r.relevance > 0 else float(r.score)
+
+    order = sorted(range(len(results)), key=lambda i: _value(results[i]) / costs[i], reverse=True)
+    selected: list[FilterResult] = []
+    skipped_idx: set[int] = set()
+    total = 0
+    for i in order:
+        if token_budget > 0 and total + costs[i] > token_budget:
+            skipped_idx.add(i)
+            continue
+        selected.append(results[i])
+        total += costs[i]
+    skipped = [r for i, r in enumerate(results) if i in skipped_idx]
+    return SummaryPlan(selected=selected, skipped=skipped, est_tokens=total)
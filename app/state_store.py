@@ -4,7 +4,10 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 import json
 import os
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable
+
+if TYPE_CHECKING:
+    from .arxiv_client import ArxivPaper
 
 
 @dataclass(frozen=True)
@@ -45,10 +48,13 @@ class StateStore:
     JSON state format:
     {
       "sent": {
-        "2501.01234": { "updated": "2026-01-12T00:00:00+00:00", "sent_at": "..." }
+        "2501.01234": { "updated": "2026-01-12T00:00:00+00:00", "sent_at": "..." },
+        "2501.04321": { "updated": "...", "sent_at": "...", "status": "queued" }
       },
       "last_run": "..."
     }
+    status=queued 表示邮件已写入 outbox、尚未确认投递：去重时与已发送相同（不会重复选入），
+    投递确认后 mark_delivered 去掉该标记；outbox 丢失时由 unmark 删除，下次重新选入。
     """
 
     def __init__(self, path: str) -> None:
@@ -67,12 +73,307 @@ class StateStore:
         prev_updated = str(info.get("updated", ""))
         return prev_updated != updated_iso
 
-    def mark_sent(self, arxiv_id: str, updated_iso: str) -> None:
+    def filter_unsent(self, papers: list[ArxivPaper], resend_on_update: bool) -> list[ArxivPaper]:
+        """批量版 should_send：返回需要发送的论文（保持输入顺序）。"""
+        sent: dict[str, Any] = self._state.get("sent", {})
+        out: list[ArxivPaper] = []
+        for p in papers:
+            info = sent.get(base_arxiv_id(p.arxiv_id))
+            if info is None or (
+                resend_on_update and str(info.get("updated", "")) != p.updated.isoformat()
+            ):
+                out.append(p)
+        return out
+
+    def mark_sent(self, arxiv_id: str, updated_iso: str, queued: bool = False) -> None:
         bid = base_arxiv_id(arxiv_id)
         sent: dict[str, Any] = self._state.setdefault("sent", {})
         sent[bid] = {"updated": updated_iso, "sent_at": _utc_now_iso()}
+        if queued:
+            sent[bid]["status"] = "queued"
+
+    def queued_ids(self) -> list[str]:
+        return [bid for bid, info in self._state.get("sent", {}).items() if info.get("status") == "queued"]
+
+    def mark_delivered(self, bids: Iterable[str]) -> int:
+        """把 queued 的条目改为已发送；返回实际改动的条数。"""
+        sent: dict[str, Any] = self._state.get("sent", {})
+        n = 0
+        for bid in bids:
+            info = sent.get(bid)
+            if info is not None and info.pop("status", None) is not None:
+                n += 1
+        return n
+
+    def unmark(self, bids: Iterable[str]) -> None:
+        """删除条目（视为从未发送）。"""
+        sent: dict[str, Any] = self._state.get("sent", {})
+        for bid in bids:
+            sent.pop(bid, None)
 
     def save(self) -> None:
         self._state["last_run"] = _utc_now_iso()
         _save_json(self.path, self._state)
 
+
+
+class JournalStateStore(StateStore):
+    """
+    JSON 快照 + 追加式日志：
+    - 加载时读快照（与 StateStore 同格式），再按顺序重放 <快照名>.journal.jsonl；
+    - save() 只把本次 mark_sent 的条目各追加一行，写入量与新增条目数成正比；
+    - 日志超过 compact_bytes 时折叠进快照并删除日志。
+    日志行格式：
+      {"id": "2501.01234", "updated": "...", "sent_at": "..."}    # 可带 "status": "queued"
+      {"id": "2501.01234", "unmark": true}
+      {"last_run": "..."}
+    """
+
+    def __init__(self, path: str, compact_bytes: int = 256 * 1024) -> None:
+        super().__init__(path)
+        root, _ = os.path.splitext(path)
+        self.journal_path = root + ".journal.jsonl"
+        self.compact_bytes = int(compact_bytes)
+        self._pending: list[dict[str, Any]] = []
+        self._replay()
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.journal_path):
+            return
+        sent: dict[str, Any] = self._state.setdefault("sent", {})
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # 进程中途被杀可能留下半行，跳过即可
+                    continue
+                if rec.get("unmark"):
+                    sent.pop(rec["id"], None)
+                elif "id" in rec:
+                    sent[rec["id"]] = {k: rec[k] for k in ("updated", "sent_at", "status") if k in rec}
+                elif "last_run" in rec:
+                    self._state["last_run"] = rec["last_run"]
+
+    def mark_sent(self, arxiv_id: str, updated_iso: str, queued: bool = False) -> None:
+        super().mark_sent(arxiv_id, updated_iso, queued)
+        bid = base_arxiv_id(arxiv_id)
+        self._pending.append({"id": bid, **self._state["sent"][bid]})
+
+    def mark_delivered(self, bids: Iterable[str]) -> int:
+        sent: dict[str, Any] = self._state.get("sent", {})
+        queued = [bid for bid in bids if sent.get(bid, {}).get("status") == "queued"]
+        super().mark_delivered(queued)
+        # 重写整条记录（不带 status），重放时覆盖之前的 queued 行
+        self._pending.extend({"id": bid, **sent[bid]} for bid in queued)
+        return len(queued)
+
+    def unmark(self, bids: Iterable[str]) -> None:
+        bids = list(bids)
+        super().unmark(bids)
+        self._pending.extend({"id": bid, "unmark": True} for bid in bids)
+
+    def save(self) -> None:
+        self._state["last_run"] = _utc_now_iso()
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            for rec in self._pending:
+                f.write(json.dumps(rec, ensure_ascii=False, sort_keys=True) + "\n")
+            f.write(json.dumps({"last_run": self._state["last_run"]}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending.clear()
+        if os.path.getsize(self.journal_path) > self.compact_bytes:
+            self.compact()
+
+    def compact(self) -> None:
+        # 先写快照再删日志：中间崩溃时日志会被重放到已包含这些条目的快照上，结果不变
+        _save_json(self.path, self._state)
+        os.remove(self.journal_path)
+
+
+class SqliteStateStore:
+    """
+    SQLite 后端，接口与 StateStore 相同：
+    - sent 表以 base arXiv id 为主键，should_send 是一次索引点查；
+    - mark_sent 先缓存在内存，save() 时在一个事务里批量 upsert，只写新增/变化的行；
+      mark_delivered / unmark 同样在 save() 时才写入；
+    - status 列为 'queued' 表示已写入 outbox、尚未确认投递（语义同 StateStore）；
+    - 首次打开且库为空时，从同名 JSON 状态文件一次性迁移。
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sent (
+        id TEXT PRIMARY KEY,
+        updated TEXT NOT NULL,
+        sent_at TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT ''
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path: str, migrate_from: str | None = None) -> None:
+        # sqlite3 只在 STATE_BACKEND=sqlite 时导入：arxiv_client/ranking 只需要 base_arxiv_id
+        import sqlite3
+
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # 流水线模式下 dedupe 阶段在工作线程里查询（单线程顺序访问）
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(self._SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sent)")}
+        if "status" not in columns:
+            # 旧库没有 status 列
+            with self._conn:
+                self._conn.execute("ALTER TABLE sent ADD COLUMN status TEXT NOT NULL DEFAULT ''")
+        # bid -> (updated, sent_at, status)
+        self._pending: dict[str, tuple[str, str, str]] = {}
+        self._delivered: set[str] = set()
+        self._removed: set[str] = set()
+        if migrate_from:
+            self._migrate_json(migrate_from)
+
+    def _migrate_json(self, json_path: str) -> None:
+        done = self._conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone()
+        if done is not None or not os.path.exists(json_path):
+            return
+        sent: dict[str, Any] = _load_json(json_path).get("sent", {})
+        rows = [
+            (bid, str(info.get("updated", "")), str(info.get("sent_at", "")), str(info.get("status", "")))
+            for bid, info in sent.items()
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO sent (id, updated, sent_at, status) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)",
+                (json_path,),
+            )
+        print(f"[state] migrated {len(rows)} entries from {json_path} to {self.path}")
+
+    def _lookup_updated(self, bid: str) -> str | None:
+        pending = self._pending.get(bid)
+        if pending is not None:
+            return pending[0]
+        if bid in self._removed:
+            return None
+        row = self._conn.execute("SELECT updated FROM sent WHERE id = ?", (bid,)).fetchone()
+        return None if row is None else str(row[0])
+
+    def should_send(self, arxiv_id: str, updated_iso: str, resend_on_update: bool) -> bool:
+        prev_updated = self._lookup_updated(base_arxiv_id(arxiv_id))
+        if prev_updated is None:
+            return True
+        if not resend_on_update:
+            return False
+        return prev_updated != updated_iso
+
+    def filter_unsent(self, papers: list[ArxivPaper], resend_on_update: bool) -> list[ArxivPaper]:
+        """
+        批量版 should_send：候选 id 用分块 IN 查询走主键索引一次取回 updated，而不是每篇一次点查；
+        耗时只与候选数有关，与历史记录的规模基本无关（见 benchmarks/bench_state_dedupe.py）。
+        """
+        bids = [base_arxiv_id(p.arxiv_id) for p in papers]
+        unique = sorted(set(bids))
+
+        known: dict[str, str] = {}
+        for i in range(0, len(unique), 500):
+            chunk = unique[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            for bid, updated in self._conn.execute(
+                f"SELECT id, updated FROM sent WHERE id IN ({marks})", chunk
+            ):
+                known[bid] = str(updated)
+        for bid in self._removed:
+            known.pop(bid, None)
+        for bid, (updated, _, _) in self._pending.items():
+            known[bid] = updated
+
+        out: list[ArxivPaper] = []
+        for p, bid in zip(papers, bids):
+            prev = known.get(bid)
+            if prev is None or (resend_on_update and prev != p.updated.isoformat()):
+                out.append(p)
+        return out
+
+    def mark_sent(self, arxiv_id: str, updated_iso: str, queued: bool = False) -> None:
+        self._pending[base_arxiv_id(arxiv_id)] = (updated_iso, _utc_now_iso(), "queued" if queued else "")
+
+    def queued_ids(self) -> list[str]:
+        rows = self._conn.execute("SELECT id FROM sent WHERE status = 'queued'").fetchall()
+        queued = {str(r[0]) for r in rows} - self._removed - self._delivered
+        for bid, (_, _, status) in self._pending.items():
+            if status == "queued":
+                queued.add(bid)
+            else:
+                queued.discard(bid)
+        return sorted(queued)
+
+    def mark_delivered(self, bids: Iterable[str]) -> int:
+        queued = set(self.queued_ids())
+        n = 0
+        for bid in bids:
+            if bid not in queued:
+                continue
+            n += 1
+            pending = self._pending.get(bid)
+            if pending is not None:
+                self._pending[bid] = (pending[0], pending[1], "")
+            else:
+                self._delivered.add(bid)
+        return n
+
+    def unmark(self, bids: Iterable[str]) -> None:
+        for bid in bids:
+            self._pending.pop(bid, None)
+            self._delivered.discard(bid)
+            self._removed.add(bid)
+
+    def save(self) -> None:
+        rows = [(bid, upd, sent_at, status) for bid, (upd, sent_at, status) in self._pending.items()]
+        with self._conn:
+            # 先删后写：同一次运行里先 unmark 又重新 mark_sent 的条目以后者为准
+            self._conn.executemany("DELETE FROM sent WHERE id = ?", [(bid,) for bid in self._removed])
+            self._conn.executemany(
+                "UPDATE sent SET status = '' WHERE id = ?", [(bid,) for bid in self._delivered]
+            )
+            self._conn.executemany(
+                "INSERT INTO sent (id, updated, sent_at, status) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET updated = excluded.updated, sent_at = excluded.sent_at, "
+                "status = excluded.status",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_run', ?)",
+                (_utc_now_iso(),),
+            )
+        self._pending.clear()
+        self._delivered.clear()
+        self._removed.clear()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+STATE_BACKENDS = ("repo", "cache", "journal", "sqlite")
+
+
+def open_state_store(
+    path: str, backend: str = "repo", journal_compact_bytes: int = 256 * 1024
+) -> StateStore | SqliteStateStore:
+    """
+    repo / cache 都用 JSON 文件（区别只在 Actions 里如何持久化）；
+    journal 在 JSON 快照旁追加日志，定期压缩；
+    sqlite 使用同目录下的 .sqlite3 文件，并从 path 指向的 JSON 文件迁移历史记录。
+    """
+    if backend == "journal":
+        return JournalStateStore(path, compact_bytes=journal_compact_bytes)
+    if backend == "sqlite":
+        root, ext = os.path.splitext(path)
+        db_path = root + ".sqlite3" if ext == ".json" else path
+        return SqliteStateStore(db_path, migrate_from=path if ext == ".json" else None)
+    return StateStore(path)
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Iterable
+from typing import TYPE_CHECKING, Callable, Iterable
 
 from .arxiv_client import ArxivPaper
-from .deepseek_client import DeepSeekClient
+from .deepseek_client import DeepSeekClient, DeepSeekResponse
+from .summary_cache import SummaryCache, summary_cache_key
+
+if TYPE_CHECKING:
+    from .async_deepseek_client import AsyncDeepSeekClient
 
 
 @dataclass(frozen=True)
@@ -17,6 +24,8 @@ class PaperSummary:
 SYSTEM_PROMPT = """你是一位严谨的科研助理，擅长快速阅读论文摘要并产出结构化中文总结。
 要求：信息准确，不夸大；当摘要没有提供细节时要明确说明。输出使用 Markdown。"""
 
+TRUNCATED_NOTE = "\n\n（输出超出时间/长度预算，已截断）"
+
 def _format_authors(authors: object) -> str:
     """
     arXiv 解析出来的 authors 目前是 list[tuple[name, affiliation]]。
@@ -42,11 +51,36 @@ def _format_authors(authors: object) -> str:
     return str(authors).strip() or "(未知)"
 
 
-def build_user_prompt(p: ArxivPaper, matched_keywords: Iterable[str]) -> str:
-    kws = ", ".join(matched_keywords) if matched_keywords else "(无)"
-    return f"""请基于以下论文信息生成结构化中文总结：
+OUTPUT_FORMAT = """输出格式（必须包含这些小标题）：
+1) 一句话结论
+2) 核心贡献（3-5条）
+3) 方法要点（3-5条）
+4) 实验与结果（若摘要未给出，写“摘要未提供细节”）
+5) 与强化学习/后训练/对齐的关联（1-3条）
+6) 局限与开放问题（1-3条）
+"""
+
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+本次会一次给出多篇论文，请逐篇独立总结，只输出一个 JSON 对象，不要输出其他内容。"""
+
+# 预估单篇总结的输出 token 数，用于批量打包时预留输出空间
+OUTPUT_TOKENS_PER_PAPER = 700
+# 单次请求的输出 token 上限（deepseek-chat 为 8K）；批量请求的输出是各篇之和，不能超过它
+MODEL_MAX_OUTPUT_TOKENS = 8192
 
-【标题】
+
+def estimate_tokens(text: str) -> int:
+    """
+    离线粗估 token 数（不依赖 tokenizer）：
+    中日韩字符约 1 token/字，其余（英文、数字、标点、空白）约 4 字符/token。
+    """
+    cjk = sum(1 for ch in text if "\u2e80" <= ch <= "\u9fff" or "\uac00" <= ch <= "\ud7af" or "\uff00" <= ch <= "\uffef")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _paper_block(p: ArxivPaper, matched_keywords: Iterable[str]) -> str:
+    kws = ", ".join(matched_keywords) if matched_keywords else "(无)"
+    return f"""【标题】
 {p.title}
 
 【作者】
@@ -66,26 +100,309 @@ def build_user_prompt(p: ArxivPaper, matched_keywords: Iterable[str]) -> str:
 
 【摘要】
 {p.summary}
-
-输出格式（必须包含这些小标题）：
-1) 一句话结论
-2) 核心贡献（3-5条）
-3) 方法要点（3-5条）
-4) 实验与结果（若摘要未给出，写“摘要未提供细节”）
-5) 与强化学习/后训练/对齐的关联（1-3条）
-6) 局限与开放问题（1-3条）
 """
 
 
+def build_user_prompt(p: ArxivPaper, matched_keywords: Iterable[str]) -> str:
+    return "请基于以下论文信息生成结构化中文总结：\n\n" + _paper_block(p, matched_keywords) + "\n" + OUTPUT_FORMAT
+
+
+def build_batch_prompt(jobs: list[tuple[ArxivPaper, list[str]]]) -> str:
+    parts = [f"请分别为以下 {len(jobs)} 篇论文生成结构化中文总结。\n"]
+    for i, (p, kws) in enumerate(jobs, 1):
+        parts.append(f"=== 论文 {i}（arxiv_id: {p.arxiv_id}）===\n{_paper_block(p, kws)}")
+    parts.append("每篇总结的" + OUTPUT_FORMAT)
+    parts.append(
+        '只输出一个 JSON 对象，格式为：\n'
+        '{"summaries": [{"arxiv_id": "<原样抄写上面的 arxiv_id>", "summary_md": "<该论文的 Markdown 总结>"}]}\n'
+        "summaries 中每篇论文一项，summary_md 内按上面的小标题组织。\n"
+    )
+    return "\n".join(parts)
+
+
+def parse_batch_response(content: str, expected_ids: Iterable[str]) -> dict[str, str]:
+    """解析批量总结的 JSON 输出；格式不对或缺失的条目直接忽略（由调用方回退到单篇）。"""
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return {}
+    items = data.get("summaries") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return {}
+    expected = set(expected_ids)
+    out: dict[str, str] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        aid = str(item.get("arxiv_id", "")).strip()
+        text = item.get("summary_md")
+        if aid in expected and isinstance(text, str) and text.strip():
+            out[aid] = text.strip()
+    return out
+
+
 class Summarizer:
-    def __init__(self, client: DeepSeekClient) -> None:
+    def __init__(
+        self,
+        client: DeepSeekClient | AsyncDeepSeekClient,
+        cache: SummaryCache | None = None,
+        temperature: float = 0.2,
+    ) -> None:
         self.client = client
+        self.cache = cache
+        self.temperature = temperature
+        self.cache_hits = 0
 
-    def summarize_one(self, paper: ArxivPaper, matched_keywords: list[str]) -> str:
+    def _prepare(
+        self, paper: ArxivPaper, matched_keywords: list[str]
+    ) -> tuple[list[dict[str, str]], str | None, str | None]:
+        """返回 (messages, 缓存 key, 缓存命中的总结)。"""
+        user_prompt = build_user_prompt(paper, matched_keywords)
         messages = [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": build_user_prompt(paper, matched_keywords)},
+            {"role": "user", "content": user_prompt},
         ]
-        resp = self.client.chat(messages=messages, temperature=0.2)
+        if self.cache is None:
+            return messages, None, None
+        key = summary_cache_key(self.client.model, SYSTEM_PROMPT, user_prompt, self.temperature)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+        return messages, key, cached
+
+    def _finish(self, key: str | None, resp: DeepSeekResponse) -> str:
+        if resp.truncated:
+            # 截断的结果不写缓存，下次运行还有机会拿到完整总结
+            return resp.content + TRUNCATED_NOTE
+        if self.cache is not None and key is not None and resp.content:
+            self.cache.put(key, resp.content)
         return resp.content
 
+    def summarize_one(self, paper: ArxivPaper, matched_keywords: list[str]) -> str:
+        messages, key, cached = self._prepare(paper, matched_keywords)
+        if cached is not None:
+            return cached
+        resp = self.client.chat(messages=messages, temperature=self.temperature)
+        return self._finish(key, resp)
+
+    async def asummarize_one(self, paper: ArxivPaper, matched_keywords: list[str]) -> str:
+        """需要 AsyncDeepSeekClient。"""
+        messages, key, cached = self._prepare(paper, matched_keywords)
+        if cached is not None:
+            return cached
+        resp = await self.client.chat(messages=messages, temperature=self.temperature)
+        return self._finish(key, resp)
+
+    def pack_batches(
+        self,
+        jobs: list[tuple[ArxivPaper, list[str]]],
+        batch_size: int,
+        max_tokens: int,
+    ) -> list[list[int]]:
+        """
+        按输入顺序贪心打包：每批最多 batch_size 篇，预估的（提示词 + 预留输出）token 不超过 max_tokens，
+        且预留输出（篇数 × 单篇输出）不超过模型单次输出上限，否则整批会被截断、JSON 解析失败再逐篇重做。
+        单篇就超出预算的论文单独成批（走单篇调用）。
+        """
+        overhead = estimate_tokens(BATCH_SYSTEM_PROMPT) + estimate_tokens(build_batch_prompt([]))
+        per_paper_out = self._output_tokens_per_paper()
+        batches: list[list[int]] = []
+        cur: list[int] = []
+        cur_tokens = overhead
+        for i, (p, kws) in enumerate(jobs):
+            cost = estimate_tokens(_paper_block(p, kws)) + per_paper_out
+            if cur and (
+                len(cur) >= batch_size
+                or cur_tokens + cost > max_tokens
+                or (len(cur) + 1) * per_paper_out > MODEL_MAX_OUTPUT_TOKENS
+            ):
+                batches.append(cur)
+                cur, cur_tokens = [], overhead
+            cur.append(i)
+            cur_tokens += cost
+        if cur:
+            batches.append(cur)
+        return batches
+
+    def _output_tokens_per_paper(self) -> int:
+        """单篇预留的输出 token：设置了 DEEPSEEK_MAX_TOKENS 时按它，否则按经验值。"""
+        return max(1, int(self.client.max_tokens or OUTPUT_TOKENS_PER_PAPER))
+
+    def summarize_batch(self, jobs: list[tuple[ArxivPaper, list[str]]]) -> dict[str, str]:
+        """
+        一次请求总结多篇论文（JSON 输出），返回成功解析的 arxiv_id -> summary。
+        输出 token 上限与时间预算按篇数放大（单篇的 N 倍，输出不超过模型上限）。
+        结果按单篇提示词的缓存 key 写入缓存，与单篇模式互通。
+        """
+        messages = [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": build_batch_prompt(jobs)},
+        ]
+        n = len(jobs)
+        # 没有单篇上限时用模型上限，避免落到服务端较小的默认值
+        max_tokens = MODEL_MAX_OUTPUT_TOKENS
+        if self.client.max_tokens:
+            max_tokens = min(MODEL_MAX_OUTPUT_TOKENS, n * int(self.client.max_tokens))
+        time_budget_s = n * self.client.time_budget_s if self.client.time_budget_s else None
+        resp = self.client.chat(
+            messages=messages,
+            temperature=self.temperature,
+            response_format={"type": "json_object"},
+            max_tokens=max_tokens,
+            time_budget_s=time_budget_s,
+        )
+        parsed = parse_batch_response(resp.content, (p.arxiv_id for p, _ in jobs))
+        if self.cache is not None:
+            for p, kws in jobs:
+                text = parsed.get(p.arxiv_id)
+                if text:
+                    key = summary_cache_key(
+                        self.client.model, SYSTEM_PROMPT, build_user_prompt(p, kws), self.temperature
+                    )
+                    self.cache.put(key, text)
+        return parsed
+
+    def _run_unit(
+        self,
+        jobs: list[tuple[ArxivPaper, list[str]]],
+        unit: list[int],
+        deadline: float | None = None,
+    ) -> dict[int, str | Exception | None]:
+        """
+        执行一个工作单元（单篇或一批）；批量中解析失败/缺失的条目逐篇回退。
+        到达 deadline（time.monotonic）后不再发起新请求，对应条目返回 None（只渲染摘要）。
+        """
+        out: dict[int, str | Exception | None] = {}
+        if deadline is not None and time.monotonic() > deadline:
+            return {i: None for i in unit}
+        if len(unit) > 1:
+            try:
+                parsed = self.summarize_batch([jobs[i] for i in unit])
+            except Exception as e:  # noqa: BLE001
+                print(f"[deepseek] batch of {len(unit)} failed ({type(e).__name__}); falling back to single calls")
+                parsed = {}
+            for i in unit:
+                text = parsed.get(jobs[i][0].arxiv_id)
+                if text is not None:
+                    out[i] = text
+        for i in unit:
+            if i in out:
+                continue
+            if deadline is not None and time.monotonic() > deadline:
+                out[i] = None
+                continue
+            p, kws = jobs[i]
+            try:
+                out[i] = self.summarize_one(paper=p, matched_keywords=kws)
+            except Exception as e:  # noqa: BLE001
+                out[i] = e
+        return out
+
+    def summarize_many(
+        self,
+        jobs: list[tuple[ArxivPaper, list[str]]],
+        max_workers: int = 4,
+        batch_size: int = 1,
+        batch_max_tokens: int = 12000,
+        deadline: float | None = None,
+        on_summary: Callable[[str, str], None] | None = None,
+    ) -> tuple[dict[str, str], list[str]]:
+        """
+        并发总结多篇论文（最多 max_workers 个请求同时在途），每个请求仍走 client.chat 自带的重试。
+        batch_size > 1 时先把未命中缓存的论文打包成多篇一次的请求（见 pack_batches）。
+        jobs 按提交顺序执行，到达 deadline 后剩余条目跳过（既不在结果里也不算失败）。
+        每篇完成时在调用线程里回调 on_summary(arxiv_id, summary)（用于写检查点）。
+        返回 (arxiv_id -> summary, 失败描述列表)，两者都按输入顺序排列。
+        """
+        results: list[str | None] = [None] * len(jobs)
+        errors: list[str | None] = [None] * len(jobs)
+        done = 0
+        skipped = 0
+
+        if batch_size > 1:
+            pending: list[int] = []
+            for i, (p, kws) in enumerate(jobs):
+                _, _, cached = self._prepare(p, kws)
+                if cached is not None:
+                    results[i] = cached
+                    done += 1
+                    if on_summary is not None:
+                        on_summary(p.arxiv_id, cached)
+                else:
+                    pending.append(i)
+            packed = self.pack_batches([jobs[i] for i in pending], batch_size, batch_max_tokens)
+            units = [[pending[j] for j in batch] for batch in packed]
+            print(f"[deepseek] {len(pending)} uncached entries packed into {len(units)} request(s)")
+        else:
+            units = [[i] for i in range(len(jobs))]
+
+        workers = max(1, min(int(max_workers), len(units) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._run_unit, jobs, unit, deadline) for unit in units]
+            for fut in as_completed(futures):
+                for i, outcome in fut.result().items():
+                    if outcome is None:
+                        skipped += 1
+                        continue
+                    done += 1
+                    p = jobs[i][0]
+                    if isinstance(outcome, Exception):
+                        errors[i] = f"{p.arxiv_id} {p.title} ({type(outcome).__name__}: {outcome})"
+                        print(f"[deepseek] failed {done}/{len(jobs)}: {p.arxiv_id} ({type(outcome).__name__})")
+                    else:
+                        results[i] = outcome
+                        print(f"[deepseek] summarized {done}/{len(jobs)}: {p.arxiv_id}")
+                        if on_summary is not None:
+                            on_summary(p.arxiv_id, outcome)
+
+        if skipped:
+            print(f"[deepseek] time budget reached; {skipped} entries left abstract-only")
+        summaries = {
+            jobs[i][0].arxiv_id: text for i, text in enumerate(results) if text is not None
+        }
+        failed = [x for x in errors if x is not None]
+        return summaries, failed
+
+    async def summarize_many_async(
+        self,
+        jobs: list[tuple[ArxivPaper, list[str]]],
+        max_concurrency: int = 4,
+        deadline: float | None = None,
+        on_summary: Callable[[str, str], None] | None = None,
+    ) -> tuple[dict[str, str], list[str]]:
+        """summarize_many 的 asyncio 版本（需要 AsyncDeepSeekClient），返回值相同。"""
+        import asyncio
+
+        sem = asyncio.Semaphore(max(1, int(max_concurrency)))
+        done = 0
+
+        async def _run(p: ArxivPaper, kws: list[str]) -> str | None:
+            nonlocal done
+            async with sem:
+                if deadline is not None and time.monotonic() > deadline:
+                    return None
+                try:
+                    text = await self.asummarize_one(p, kws)
+                    if on_summary is not None:
+                        on_summary(p.arxiv_id, text)
+                    return text
+                finally:
+                    done += 1
+                    print(f"[deepseek] finished {done}/{len(jobs)}: {p.arxiv_id}")
+
+        outcomes = await asyncio.gather(
+            *(_run(p, kws) for p, kws in jobs), return_exceptions=True
+        )
+        summaries: dict[str, str] = {}
+        failed: list[str] = []
+        skipped = 0
+        for (p, _), res in zip(jobs, outcomes):
+            if isinstance(res, BaseException):
+                failed.append(f"{p.arxiv_id} {p.title} ({type(res).__name__}: {res})")
+            elif res is None:
+                skipped += 1
+            else:
+                summaries[p.arxiv_id] = res
+        if skipped:
+            print(f"[deepseek] time budget reached; {skipped} entries left abstract-only")
+        return summaries, failed
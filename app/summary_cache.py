@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+
+
+def summary_cache_key(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+    """内容寻址：模型、系统提示词、用户提示词（含标题/摘要/更新时间）、温度任一变化都会换 key。"""
+    raw = json.dumps([model, system_prompt, user_prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    本地磁盘上的总结缓存，每条一个 JSON 文件：<cache_dir>/<key>.json
+    总结转换出的 HTML 也存在这里：<cache_dir>/<html_key>.html（按总结内容哈希，见 renderer.summary_html_key）。
+    - 超过 max_age_days 的条目视为失效；
+    - 条目数超过 max_entries 时按最近使用时间（文件 mtime，命中时会 touch）淘汰最旧的（两类文件分别计数）。
+    淘汰在构造时做一次，运行期间只读写单个文件，多线程并发访问是安全的。
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 2000, max_age_days: int = 30) -> None:
+        self.cache_dir = cache_dir
+        self.max_entries = int(max_entries)
+        self.max_age_s = int(max_age_days) * 86400
+        os.makedirs(cache_dir, exist_ok=True)
+        self.prune()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - float(entry.get("created_at", 0)) > self.max_age_s:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get("summary")
+
+    def put(self, key: str, summary: str) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{id(summary)}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "summary": summary}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def get_html(self, key: str) -> str | None:
+        path = os.path.join(self.cache_dir, f"{key}.html")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                html = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return html
+
+    def put_html(self, key: str, html: str) -> None:
+        path = os.path.join(self.cache_dir, f"{key}.html")
+        tmp = f"{path}.{os.getpid()}.{id(html)}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp, path)
+
+    def prune(self) -> None:
+        now = time.time()
+        entries: dict[str, list[tuple[float, str]]] = {".json": [], ".html": []}
+        for name in os.listdir(self.cache_dir):
+            suffix = os.path.splitext(name)[1]
+            if suffix not in entries:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if now - mtime > self.max_age_s:
+                os.remove(path)
+                continue
+            entries[suffix].append((mtime, path))
+        for group in entries.values():
+            if len(group) > self.max_entries:
+                group.sort()
+                for _, path in group[: len(group) - self.max_entries]:
+                    os.remove(path)
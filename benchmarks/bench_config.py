@@ -0,0 +1,74 @@
+"""
+对比 load_config 的几条路径：每次解析 YAML（快照关闭）、命中磁盘快照、同一进程内的重复调用、CONFIG_SNAPSHOT 固定快照。
+“首次导入 yaml”单独计时：快照命中时整个进程都不会导入 yaml。
+
+用法（在仓库根目录）：
+  python -m benchmarks.bench_config
+  python -m benchmarks.bench_config --config config.test.yaml --n 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from app import config as config_mod
+
+
+def _bench(label: str, n: int, fn) -> None:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    per_call = (time.perf_counter() - t0) / n
+    print(f"{label:<34} {per_call * 1e6:10.1f} us/call")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="config.test.yaml")
+    ap.add_argument("--n", type=int, default=200)
+    args = ap.parse_args()
+    config_path = os.path.abspath(args.config)
+    work = tempfile.mkdtemp(prefix="bench-config-")
+    snap_dir = os.path.join(work, "snapshots")
+
+    t0 = time.perf_counter()
+    import yaml  # noqa: F401
+
+    print(f"config={args.config} n={args.n}")
+    print(f"{'first import of yaml':<34} {(time.perf_counter() - t0) * 1e6:10.1f} us")
+
+    os.environ["CONFIG_SNAPSHOT_DIR"] = "off"
+    _bench("parse yaml + env (no snapshot)", args.n, lambda: config_mod.load_config(config_path, validate=True))
+
+    os.environ["CONFIG_SNAPSHOT_DIR"] = snap_dir
+    expected = config_mod.load_config(config_path, validate=True)  # 写入快照
+
+    def _file_hit() -> None:
+        config_mod._memo.clear()
+        assert config_mod.load_config(config_path, validate=True) == expected
+
+    _bench("snapshot file hit", args.n, _file_hit)
+    _bench("in-process repeat", args.n, lambda: config_mod.load_config(config_path, validate=True))
+
+    pinned = os.path.join(work, "pinned.json")
+    config_mod.write_snapshot(pinned, expected)
+    os.environ["CONFIG_SNAPSHOT"] = pinned
+    _bench("CONFIG_SNAPSHOT (pinned)", args.n, lambda: config_mod.load_config(config_path, validate=True))
+    del os.environ["CONFIG_SNAPSHOT"]
+
+    # 新进程里命中快照：不导入 yaml
+    code = "import sys; from app.config import load_config; load_config(sys.argv[1], validate=True); print('yaml' in sys.modules)"
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    out = subprocess.run(
+        [sys.executable, "-c", code, config_path], env=env, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    print(f"fresh process imports yaml on snapshot hit: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+FETCH_CONCURRENCY 的耗时：本地 arXiv API 替身服务器（按 search_query 里的 cat: 过滤、按 start/max_results 分页、
+每个请求模拟响应延迟），两种方式共享同样的 RateLimiter（--interval，arXiv 约定 3 秒）。
+
+  sequential   iter_recent：逐页请求，上一页返回后才发下一页（FETCH_CONCURRENCY=1）
+  concurrent   fetch_recent_concurrent：同一个查询最多 --workers 页同时在途
+
+两者必须返回完全相同的论文（不一致时以非零状态退出）。默认数据是不均匀的类别
+（一个类别 300 篇、其余各 10 篇）。限速间隔与延迟按比例缩小以便快速跑完，
+--interval 3 --latencies 1.5 5 可复现真实量级：响应快于限速间隔时两者相同，慢于间隔时并发才有收益。
+
+用法（在仓库根目录）：
+  python -m benchmarks.bench_fetch_concurrent
+  python -m benchmarks.bench_fetch_concurrent --interval 3 --latencies 1.5 5 --limits 400
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import re
+import threading
+import time
+import urllib.parse
+
+from app import arxiv_client
+from app.arxiv_client import RateLimiter, fetch_recent_concurrent, iter_recent
+
+_ENTRY = """  <entry>
+    <id>http://arxiv.org/abs/{aid}v1</id>
+    <updated>{ts}</updated>
+    <published>{ts}</published>
+    <title>Paper {aid} on reinforcement learning</title>
+    <summary>We study reinforcement learning.</summary>
+    <author><name>Alice Example</name></author>
+    <link href="http://arxiv.org/abs/{aid}v1" rel="alternate" type="text/html"/>
+    <arxiv:primary_category term="{cat}" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="{cat}" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+"""
+
+
+class _ArxivHandler(BaseHTTPRequestHandler):
+    server: _StandInArxivServer
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        srv = self.server
+        qs = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        cats = set(re.findall(r"cat:([\w.\-]+)", qs["search_query"][0]))
+        start = int(qs["start"][0])
+        n = int(qs["max_results"][0])
+        with srv.lock:
+            srv.requests += 1
+        time.sleep(srv.latency_s)
+        rows = [e for e in srv.entries if e[1] in cats][start : start + n]
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom">\n'
+            + "".join(_ENTRY.format(ts=ts, cat=cat, aid=aid) for ts, cat, aid in rows)
+            + "</feed>\n"
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _StandInArxivServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, per_category: dict[str, int]) -> None:
+        super().__init__(("127.0.0.1", 0), _ArxivHandler)
+        self.latency_s = 0.0
+        self.lock = threading.Lock()
+        self.requests = 0
+        # 都在 24 小时窗口内，整体按 updated 降序
+        now = datetime.now(timezone.utc)
+        rows = []
+        for ci, (cat, n) in enumerate(per_category.items()):
+            for i in range(n):
+                ts = now - timedelta(seconds=30 * (i * len(per_category) + ci) + 60)
+                rows.append((ts.strftime("%Y-%m-%dT%H:%M:%SZ"), cat, f"2610.{ci}{i:04d}"))
+        self.entries = sorted(rows, reverse=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--categories", default="cs.LG:300,cs.AI:10,cs.CL:10,stat.ML:10", help="类别:篇数")
+    ap.add_argument("--limits", type=int, nargs="+", default=[50, 400])
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--interval", type=float, default=0.5, help="限速间隔秒数（arXiv 为 3）")
+    ap.add_argument("--latencies", type=float, nargs="+", default=[0.25, 0.8], help="每个请求的响应延迟（秒）")
+    args = ap.parse_args()
+    per_category = {c.split(":")[0]: int(c.split(":")[1]) for c in args.categories.split(",")}
+    cats = list(per_category)
+
+    server = _StandInArxivServer(per_category)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    arxiv_client.ARXIV_API_URL = f"http://127.0.0.1:{server.server_address[1]}/api/query"
+
+    methods = [
+        ("sequential", lambda n, lim: list(iter_recent(cats, keywords=[], max_results=n, limiter=lim))),
+        (
+            f"concurrent x{args.workers}",
+            lambda n, lim: fetch_recent_concurrent(
+                cats, keywords=[], max_results=n, max_workers=args.workers, limiter=lim
+            ),
+        ),
+    ]
+    print(f"categories={per_category} interval={args.interval}s workers={args.workers}")
+    print(f"{'latency s':>9} {'limit':>6} {'method':<14} {'requests':>9} {'wall s':>8} {'papers':>7}")
+    for latency in args.latencies:
+        server.latency_s = latency
+        for limit in args.limits:
+            results = []
+            for label, fn in methods:
+                server.requests = 0
+                limiter = RateLimiter(interval_s=args.interval)
+                t0 = time.perf_counter()
+                papers = fn(limit, limiter)
+                elapsed = time.perf_counter() - t0
+                results.append([p.arxiv_id for p in papers])
+                print(f"{latency:>9} {limit:>6} {label:<14} {server.requests:>9} {elapsed:8.2f} {len(papers):>7}")
+            if results[0] != results[1]:
+                raise SystemExit(f"concurrent fetch returned different papers at limit={limit}")
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
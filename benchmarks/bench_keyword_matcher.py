@@ -0,0 +1,85 @@
+"""
+关键词匹配基准：不同关键词数量下，逐个 pattern 用 str.find 查找与 Aho–Corasick 自动机对同一段摘要
+（约 1.5k 字符）调用 KeywordMatcher.counts 的耗时，用来确定 AUTOMATON_MIN_PATTERNS。
+两种实现的计数必须完全相同（不一致时以非零状态退出）。
+
+关键词由摘要里的词组（约一成，会命中）和随机生成的词（不会命中）混合而成。
+
+用法（在仓库根目录）：
+  python -m benchmarks.bench_keyword_matcher
+  python -m benchmarks.bench_keyword_matcher --sizes 10 100 1000 --boundary both
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from app.keyword_matcher import BOUNDARY_MODES, KeywordMatcher
+
+_ABSTRACT = (
+    "Reinforcement learning from human feedback (RLHF) has become the standard recipe for aligning "
+    "large language models (LLMs) with human preferences. However, the reward models used in RLHF are "
+    "trained on limited preference data and are prone to over-optimization: the policy learns to exploit "
+    "errors in the reward model rather than improving real-world quality. We study data selection for "
+    "reward modeling and propose an uncertainty-aware sampling strategy that selects preference pairs "
+    "where an ensemble of reward models disagrees. Our method requires no additional annotation budget "
+    "and is compatible with direct preference optimization (DPO) as well as PPO-based pipelines. "
+    "Experiments on summarization, dialogue and code generation benchmarks show that training on 30% of "
+    "the selected data matches or exceeds training on the full dataset, and reduces reward hacking "
+    "measured by the gap between proxy and gold reward. We further analyze the selected examples and find "
+    "that they concentrate on ambiguous prompts, long responses and safety-critical refusals. Ablations "
+    "show that the gains hold across model scales from 1B to 70B parameters and across world knowledge, "
+    "reasoning and instruction-following evaluations. Finally, we release the selection code, the "
+    "ensemble checkpoints and a curated subset of preference data to support reproducible research on "
+    "efficient alignment of language models, and discuss limitations of ensemble-based uncertainty "
+    "estimates when the reward models share the same pretraining corpus and therefore the same biases."
+).lower()
+
+
+def _keywords(n: int, rng: random.Random) -> list[str]:
+    words = _ABSTRACT.replace(",", " ").replace(".", " ").split()
+    out = []
+    for i in range(n):
+        if i % 10 == 0:
+            k = rng.randint(0, len(words) - 2)
+            out.append(" ".join(words[k : k + rng.randint(1, 2)]))
+        else:
+            out.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 12))))
+    return out
+
+
+def _time_us(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 200, 500, 1000])
+    ap.add_argument("--boundary", choices=BOUNDARY_MODES, default="left")
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+    rng = random.Random(0)
+
+    print(f"abstract={len(_ABSTRACT)} chars boundary={args.boundary}")
+    print(f"{'keywords':>8} {'find us':>9} {'automaton us':>13}")
+    for n in args.sizes:
+        kws = _keywords(n, rng)
+        find = KeywordMatcher(kws, boundary=args.boundary, automaton_min_patterns=n + 1)
+        automaton = KeywordMatcher(kws, boundary=args.boundary, automaton_min_patterns=0)
+        if find.counts(_ABSTRACT) != automaton.counts(_ABSTRACT):
+            raise SystemExit(f"find and automaton counts differ at {n} keywords")
+        t_find = _time_us(lambda: find.counts(_ABSTRACT), args.repeat)
+        t_ac = _time_us(lambda: automaton.counts(_ABSTRACT), args.repeat)
+        print(f"{n:>8} {t_find:9.1f} {t_ac:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+渲染器基准：单遍预编译渲染器（app.renderer.render_email）对比重写前的逐行拼接实现。
+文本正文校验逐字节一致（HTML 中的总结现在按 Markdown 转换，与旧实现不同）；
+另外给出总结 Markdown 转 HTML 的冷启动与记忆化耗时；计时前先校验 markdown_to_html 的回归用例（_MD_CASES）。
+
+用法（在仓库根目录）：
+  python -m benchmarks.bench_render
+  python -m benchmarks.bench_render --items 2000 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+from html import escape
+import time
+
+from dataclasses import replace
+
+from app.renderer import (
+    RenderItem,
+    RenderedEmail,
+    _format_authors,
+    _shorten,
+    markdown_to_html,
+    render_email,
+)
+
+_SUMMARY = """### 一句话总结
+提出一种新的偏好优化方法，在 **RLHF** 训练中降低 reward hacking。
+
+### 方法
+- 使用 `KL` 约束的策略优化
+- 引入离线偏好数据 <reward model> & 在线采样
+
+### 结论
+1. 在多个基准上稳定提升
+2. 训练成本与 PPO 相当
+"""
+
+
+def synth_items(n: int) -> list[RenderItem]:
+    abstract = (
+        "We study reinforcement learning from human feedback (RLHF) for large language models "
+        "and propose a policy optimization method that improves alignment.   " * 8
+    )
+    return [
+        RenderItem(
+            title=f"Scalable Preference Optimization for Language Model Post-Training {i}",
+            arxiv_id=f"2601.{i:05d}v1",
+            link_abs=f"http://arxiv.org/abs/2601.{i:05d}v1",
+            authors=[("Alice Zhang", "Tsinghua University"), ("Bob Li", ""), ("Carol Wang", "PKU")],
+            categories=["cs.LG", "cs.AI", "cs.CL"],
+            updated_iso="2026-01-16T18:45:22+00:00",
+            matched_keywords=["rlhf", "alignment", "language model"],
+            abstract=abstract,
+            summary_md=_SUMMARY.replace("RLHF", f"RLHF-{i}") if i % 5 else None,
+            score=3,
+        )
+        for i in range(n)
+    ]
+
+
+# ---- 重写前的实现（原样保留，用于对比耗时与校验输出） ----
+
+
+def legacy_render_email(
+    subject_prefix: str,
+    date_local: str,
+    items: list[RenderItem],
+    failed: list[str] | None = None,
+) -> RenderedEmail:
+    failed = failed or []
+    subject = f"{subject_prefix} {date_local}（{len(items)}篇）"
+
+    # Text
+    lines: list[str] = []
+    lines.append(subject)
+    lines.append("")
+    if not items:
+        lines.append("今天没有命中关键词的论文。")
+    for i, it in enumerate(items, 1):
+        lines.append(f"{i}. {it.title}")
+        lines.append(f"   arXiv: {it.arxiv_id}")
+        lines.append(f"   Link: {it.link_abs}")
+        if it.authors:
+            lines.append(f"   Authors: {_format_authors(it.authors)}")
+        if it.categories:
+            lines.append(f"   Categories: {', '.join(it.categories)}")
+        if it.matched_keywords:
+            lines.append(f"   Matched: {', '.join(it.matched_keywords)} (score={it.score})")
+        lines.append(f"   Updated: {it.updated_iso}")
+        lines.append("   Abstract:")
+        lines.append(f"   {_shorten(it.abstract, 600)}")
+        if it.summary_md:
+            lines.append("   Summary:")
+            # keep indentation
+            for ln in it.summary_md.splitlines():
+                lines.append(f"   {ln}")
+        else:
+            lines.append("   Summary: (未生成/跳过)")
+        lines.append("")
+    if failed:
+        lines.append("未总结成功的条目：")
+        for x in failed:
+            lines.append(f"- {x}")
+        lines.append("")
+    text_body = "\n".join(lines).strip() + "\n"
+
+    # HTML (minimal, self-contained)
+    html_parts: list[str] = []
+    html_parts.append("<!doctype html>")
+    html_parts.append("<html><head><meta charset='utf-8' />")
+    html_parts.append("<meta name='viewport' content='width=device-width, initial-scale=1' />")
+    html_parts.append("<title>" + escape(subject) + "</title>")
+    html_parts.append("</head><body style='font-family: -apple-system, BlinkMacSystemFont, Segoe UI, Roboto, Helvetica, Arial, sans-serif; line-height:1.5;'>")
+    html_parts.append(f"<h2 style='margin:0 0 12px 0;'>{escape(subject)}</h2>")
+
+    if not items:
+        html_parts.append("<p>今天没有命中关键词的论文。</p>")
+
+    for i, it in enumerate(items, 1):
+        html_parts.append("<div style='border:1px solid #e5e7eb; border-radius:10px; padding:14px; margin:12px 0;'>")
+        html_parts.append(
+            f"<div style='font-size:16px; font-weight:700; margin-bottom:6px;'>{i}. "
+            f"<a href='{escape(it.link_abs)}' style='text-decoration:none;'>{escape(it.title)}</a>"
+            f"</div>"
+        )
+        meta = []
+        meta.append(f"<b>arXiv</b>: {escape(it.arxiv_id)}")
+        if it.authors:
+            meta.append(f"<b>Authors</b>: {escape(_format_authors(it.authors))}")
+        if it.categories:
+            meta.append(f"<b>Categories</b>: {escape(', '.join(it.categories))}")
+        meta.append(f"<b>Updated</b>: {escape(it.updated_iso)}")
+        if it.matched_keywords:
+            meta.append(
+                f"<b>Matched</b>: {escape(', '.join(it.matched_keywords))} (score={it.score})"
+            )
+        html_parts.append("<div style='color:#374151; font-size:13px;'>" + "<br/>".join(meta) + "</div>")
+        html_parts.append("<hr style='border:none; border-top:1px solid #eee; margin:10px 0;'/>")
+        html_parts.append("<div style='font-size:13px; color:#111827;'><b>Abstract</b></div>")
+        html_parts.append("<div style='font-size:13px; color:#111827; white-space:pre-wrap;'>" + escape(_shorten(it.abstract, 900)) + "</div>")
+        html_parts.append("<div style='height:10px;'></div>")
+        html_parts.append("<div style='font-size:13px; color:#111827;'><b>Summary</b></div>")
+        if it.summary_md:
+            # keep markdown as pre-wrap plain text (most mail clients render safely)
+            html_parts.append("<div style='font-size:13px; color:#111827; white-space:pre-wrap;'>" + escape(it.summary_md) + "</div>")
+        else:
+            html_parts.append("<div style='font-size:13px; color:#6b7280;'>未生成/跳过</div>")
+        html_parts.append("</div>")
+
+    if failed:
+        html_parts.append("<h3 style='margin-top:18px;'>未总结成功的条目</h3>")
+        html_parts.append("<ul>")
+        for x in failed:
+            html_parts.append("<li>" + escape(x) + "</li>")
+        html_parts.append("</ul>")
+
+    html_parts.append("<p style='color:#6b7280; font-size:12px;'>此邮件由 GitHub Actions 自动生成。</p>")
+    html_parts.append("</body></html>")
+
+    return RenderedEmail(subject=subject, text=text_body, html="\n".join(html_parts))
+
+
+def _bench(fn, items: list[RenderItem], failed: list[str], repeat: int) -> tuple[float, RenderedEmail]:
+    out = fn("[arXiv日报]", "2026-01-17", items, failed)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn("[arXiv日报]", "2026-01-17", items, failed)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+# 回归用例：(Markdown, 转换结果里必须依次出现的片段)
+_MD_CASES = [
+    # 列表后空一行的不缩进文本是新段落，不能并入最后一个列表项
+    ("- a\n- b\n\nConclusion text", ["<li>\na\n</li><li>\nb\n</li></ul>", "<p style='margin:4px 0;'>Conclusion text</p>"]),
+    ("1. x\n2. y\n\nend", ["y\n</li></ol>", ">end</p>"]),
+    # 空行后缩进的文本仍属于当前列表项
+    ("- a\n- b\n\n  more b\n- c", ["b\n<br/>more b\n</li><li>\nc\n</li></ul>"]),
+    # 不空行的续行也属于当前列表项
+    ("- a\n  lazy", ["a\n<br/>lazy\n</li></ul>"]),
+]
+
+
+def check_markdown() -> None:
+    for md, expected in _MD_CASES:
+        html = markdown_to_html(md)
+        pos = 0
+        for frag in expected:
+            found = html.find(frag, pos)
+            assert found >= 0, f"markdown_to_html({md!r}) missing {frag!r}:\n{html}"
+            pos = found + len(frag)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    check_markdown()
+    items = synth_items(args.items)
+    failed = [f"2601.{i:05d}v1 Some failed paper (TimeoutError: read timed out)" for i in range(5)]
+    t_old, old = _bench(legacy_render_email, items, failed, args.repeat)
+
+    # 冷启动：每篇总结都要转换一次 Markdown
+    markdown_to_html.cache_clear()
+    t0 = time.perf_counter()
+    render_email("[arXiv日报]", "2026-01-17", items, failed)
+    t_cold = time.perf_counter() - t0
+    # 记忆化之后（与 main 一样预先填好 summary_html）
+    t_md0 = time.perf_counter()
+    prepared = [
+        replace(it, summary_html=markdown_to_html(it.summary_md)) if it.summary_md else it for it in items
+    ]
+    t_md = time.perf_counter() - t_md0
+    t_new, new = _bench(render_email, prepared, failed, args.repeat)
+
+    print(f"items={args.items} text={len(new.text)} chars html={len(new.html)} chars (best of {args.repeat})")
+    print(f"  legacy                 {t_old * 1000:8.2f} ms")
+    print(f"  single-pass, md cold   {t_cold * 1000:8.2f} ms")
+    print(f"  single-pass, md cached {t_new * 1000:8.2f} ms  ({t_old / t_new:.1f}x vs legacy)")
+    print(f"  markdown memo lookup   {t_md * 1000:8.2f} ms for {sum(1 for it in items if it.summary_md)} summaries")
+    print(f"  identical text={old.text == new.text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+用本地的 SMTP 替身服务器对比：每封邮件单独连接（SmtpMailer.send）与复用一条连接（SmtpMailer.session）。
+替身服务器只实现 EHLO/AUTH/MAIL/RCPT/DATA/QUIT，并按 --latency-ms 模拟每次握手的网络往返；
+--drop-every N 时每条连接收 N 封后主动断开，用来验证会话的断线重连。
+连接数/邮件数/收件人数的断言在 tests/test_mailer.py（复用这里的替身服务器）。
+
+用法（在仓库根目录）：
+  python -m benchmarks.bench_smtp_session
+  python -m benchmarks.bench_smtp_session --messages 50 --latency-ms 40 --drop-every 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import socketserver
+import threading
+import time
+
+from app.mailer import SmtpMailer
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+        self.recipients = 0
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    server: _StandInSmtpServer
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode("ascii"))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        srv = self.server
+        with srv.stats.lock:
+            srv.stats.connections += 1
+        time.sleep(srv.latency_s)  # 模拟建连 + 握手的往返
+        self._reply("220 stand-in ESMTP")
+        received = 0
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            cmd = raw.decode("ascii", "replace").strip()
+            verb = cmd.split(" ", 1)[0].upper()
+            if verb in {"EHLO", "HELO"}:
+                self.wfile.write(b"250-stand-in\r\n250 AUTH PLAIN LOGIN\r\n")
+                self.wfile.flush()
+            elif verb == "AUTH":
+                time.sleep(srv.latency_s)
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb in {"MAIL", "RSET", "NOOP"}:
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                with srv.stats.lock:
+                    srv.stats.recipients += 1
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                received += 1
+                with srv.stats.lock:
+                    srv.stats.messages += 1
+                self._reply("250 OK queued")
+                if srv.drop_every and received >= srv.drop_every:
+                    return  # 模拟服务器空闲超时/限流断开连接
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _StandInSmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency_s: float, drop_every: int) -> None:
+        super().__init__(("127.0.0.1", 0), _SmtpHandler)
+        self.latency_s = latency_s
+        self.drop_every = drop_every
+        self.stats = _Stats()
+
+
+def _serve(latency_s: float, drop_every: int, fn) -> tuple[float, _Stats]:
+    server = _StandInSmtpServer(latency_s, drop_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mailer = SmtpMailer(
+        host="127.0.0.1",
+        port=server.server_address[1],
+        username="u",
+        password="p",
+        use_ssl=False,
+        starttls=False,
+        timeout_s=10,
+        max_retries=3,
+    )
+    t0 = time.perf_counter()
+    fn(mailer)
+    elapsed = time.perf_counter() - t0
+    server.shutdown()
+    server.server_close()
+    return elapsed, server.stats
+
+
+def _run(label: str, latency_s: float, drop_every: int, fn) -> None:
+    elapsed, st = _serve(latency_s, drop_every, fn)
+    print(
+        f"{label:<28} {elapsed * 1000:8.1f} ms  connections={st.connections:<4} "
+        f"messages={st.messages:<4} rcpt={st.recipients}"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=20)
+    ap.add_argument("--recipients", type=int, default=3)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--drop-every", type=int, default=0)
+    args = ap.parse_args()
+
+    latency_s = args.latency_ms / 1000.0
+    rcpts = [f"user{i}@example.com" for i in range(args.recipients)]
+    body = "digest body\n" * 200
+
+    def one_connection_each(mailer: SmtpMailer) -> None:
+        for i in range(args.messages):
+            mailer.send("bot@example.com", rcpts, f"digest {i}", body, f"<pre>{body}</pre>")
+
+    def shared_session(mailer: SmtpMailer) -> None:
+        with mailer.session() as s:
+            for i in range(args.messages):
+                s.send("bot@example.com", rcpts, f"digest {i}", body, f"<pre>{body}</pre>")
+
+    def shared_per_recipient(mailer: SmtpMailer) -> None:
+        with mailer.session() as s:
+            for i in range(args.messages):
+                s.send(
+                    "bot@example.com", rcpts, f"digest {i}", body, f"<pre>{body}</pre>", per_recipient=True
+                )
+
+    print(
+        f"messages={args.messages} recipients={args.recipients} "
+        f"latency={args.latency_ms}ms drop_every={args.drop_every or '-'}"
+    )
+    _run("send() per message", latency_s, args.drop_every, one_connection_each)
+    _run("session()", latency_s, args.drop_every, shared_session)
+    _run("session() per_recipient", latency_s, args.drop_every, shared_per_recipient)
+
+
+if __name__ == "__main__":
+    main()
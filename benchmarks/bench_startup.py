@@ -0,0 +1,143 @@
+"""
+用 `python -X importtime` 测量 CLI 各子命令的启动开销：每个子命令只应导入自己用到的模块。
+在临时目录里用合成论文离线跑 filter -> summarize -> render -> send（DRY_RUN，不设 DEEPSEEK_API_KEY），
+fetch/run 需要网络，只测它们启动时要导入的模块；"eager" 一行是把所有重依赖一次性导入的对照。
+
+每个目标输出：
+  wall ms    不带 -X importtime 的进程总耗时（取中位数，包含解释器自身启动）
+  import ms  -X importtime 统计的顶层模块累计导入时间
+  heavy      实际被导入的重依赖
+
+用法（在仓库根目录）：
+  python -m benchmarks.bench_startup
+  python -m benchmarks.bench_startup --repeat 10 --top 5
+  python -m benchmarks.bench_startup --config config.test.yaml   # 带配置文件（会导入 yaml）
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("requests", "yaml", "numpy", "feedparser", "httpx", "asyncio", "smtplib", "sqlite3")
+
+
+def _write_papers(path: str, n: int) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            topic = "reinforcement learning" if i % 2 else "graph neural networks"
+            rec = {
+                "arxiv_id": f"2610.{i:05d}v1",
+                "title": f"Paper {i} on {topic}",
+                "summary": f"We study {topic} for llm alignment. " * 8,
+                "authors": [["Alice Example", "Example University"], ["Bob Example", ""]],
+                "categories": ["cs.AI", "cs.LG"],
+                "published": now,
+                "updated": now,
+                "link_abs": f"http://arxiv.org/abs/2610.{i:05d}v1",
+                "link_pdf": f"http://arxiv.org/pdf/2610.{i:05d}v1",
+            }
+            f.write(json.dumps(rec) + "\n")
+
+
+def _parse_importtime(stderr: str) -> tuple[float, dict[str, float]]:
+    """返回 (顶层模块累计导入 ms, {顶层模块: 累计 ms})。"""
+    top: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if name.startswith("  "):
+            continue  # 子模块已计入其顶层模块的累计时间
+        top[name.strip()] = int(cumulative) / 1000.0
+    return sum(top.values()), top
+
+
+def _heavy_loaded(stderr: str) -> list[str]:
+    loaded = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "imported package" not in line:
+            loaded.add(line.rsplit("|", 1)[1].strip())
+    return [m for m in HEAVY if m in loaded]
+
+
+def _run(args: list[str], env: dict[str, str], cwd: str, importtime: bool) -> tuple[float, str]:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + args
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, env=env, cwd=cwd, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - t0) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    return elapsed, proc.stderr
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--papers", type=int, default=200)
+    ap.add_argument("--top", type=int, default=0, help="每个目标额外列出最慢的 N 个顶层导入")
+    ap.add_argument("--config", default="", help="传给子命令的配置文件（默认不用，避免导入 yaml）")
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench-startup-")
+    papers = os.path.join(work, "papers.jsonl")
+    selected = os.path.join(work, "selected.jsonl")
+    summarized = os.path.join(work, "summarized.jsonl")
+    digests = os.path.join(work, "digests.jsonl")
+    _write_papers(papers, args.papers)
+
+    env = {k: v for k, v in os.environ.items() if k != "DEEPSEEK_API_KEY"}
+    env.update(
+        PYTHONPATH=REPO_ROOT,
+        DRY_RUN="1",
+        KEYWORDS="reinforcement learning,llm",
+        ARXIV_CATEGORIES="cs.AI,cs.LG",
+        STATE_PATH=os.path.join(work, "state.json"),
+        CHECKPOINT_PATH="off",
+        MAIL_OUTBOX_DIR=os.path.join(work, "outbox"),
+    )
+    cli = ["-m", "app"] + (["-c", os.path.abspath(args.config)] if args.config else [])
+    targets: list[tuple[str, list[str]]] = [
+        ("python -c pass", ["-c", "pass"]),
+        ("import app.cli", ["-c", "import app.cli"]),
+        ("app --help", cli + ["--help"]),
+        ("fetch (imports only)", ["-c", "import app.cli, app.main, requests"]),
+        ("filter", cli + ["filter", "-i", papers, "-o", selected]),
+        ("summarize (no key)", cli + ["summarize", "-i", selected, "-o", summarized]),
+        ("render", cli + ["render", "-i", summarized, "-o", digests]),
+        ("send (dry run)", cli + ["send", "-i", digests]),
+        ("send --drain", cli + ["send", "--drain"]),
+        (
+            "eager: all modules",
+            [
+                "-c",
+                "import requests, yaml, asyncio, app.main, app.mailer, app.outbox, "
+                "app.summarizer, app.pipeline, app.scheduler",
+            ],
+        ),
+    ]
+
+    print(f"python={sys.version.split()[0]} repeat={args.repeat} papers={args.papers} workdir={work}")
+    print(f"{'target':<22} {'wall ms':>9} {'import ms':>10}  heavy")
+    for label, argv in targets:
+        walls = [_run(argv, env, work, importtime=False)[0] for _ in range(args.repeat)]
+        _, stderr = _run(argv, env, work, importtime=True)
+        total, top = _parse_importtime(stderr)
+        heavy = ",".join(_heavy_loaded(stderr)) or "-"
+        print(f"{label:<22} {statistics.median(walls):9.1f} {total:10.1f}  {heavy}")
+        if args.top:
+            for name, ms in sorted(top.items(), key=lambda kv: -kv[1])[: args.top]:
+                print(f"{'':<24}{ms:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+SQLite state 去重基准：历史记录规模不同（默认 1 万 / 10 万 / 30 万行）时，
+filter_unsent（分块 IN 查询，走主键索引）与逐篇 should_send 点查的耗时，以及打开数据库的耗时。
+候选里一半是已发送过的 id，一半是新 id。
+
+用法（在仓库根目录）：
+  python -m benchmarks.bench_state_dedupe
+  python -m benchmarks.bench_state_dedupe --rows 300000 --candidates 500 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from app.arxiv_client import ArxivPaper
+from app.state_store import SqliteStateStore
+
+
+def _build_db(path: str, rows: int) -> None:
+    store = SqliteStateStore(path)
+    store.close()
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO sent (id, updated, sent_at) VALUES (?, ?, ?)",
+            ((f"{2000 + i // 100000}.{i % 100000:05d}", "2026-01-01T00:00:00+00:00", "x") for i in range(rows)),
+        )
+    conn.close()
+
+
+def _candidates(rows: int, n: int) -> list[ArxivPaper]:
+    now = datetime.now(timezone.utc)
+    step = max(1, rows // max(1, n // 2))
+    seen = [f"{2000 + i // 100000}.{i % 100000:05d}" for i in range(0, rows, step)][: n // 2]
+    new = [f"2999.{i:05d}" for i in range(n - len(seen))]
+    return [
+        ArxivPaper(
+            arxiv_id=f"{bid}v2",
+            title="t",
+            summary="s",
+            authors=[],
+            categories=["cs.AI"],
+            published=now,
+            updated=now,
+            link_abs="",
+            link_pdf=None,
+        )
+        for bid in seen + new
+    ]
+
+
+def _median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 300000])
+    ap.add_argument("--candidates", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench-dedupe-")
+    print(f"candidates={args.candidates} (half already sent) repeat={args.repeat}")
+    print(f"{'rows':>8} {'open ms':>9} {'filter_unsent ms':>17} {'should_send loop ms':>20}")
+    for rows in args.rows:
+        path = os.path.join(work, f"state-{rows}.sqlite3")
+        _build_db(path, rows)
+        papers = _candidates(rows, args.candidates)
+
+        def _open() -> None:
+            SqliteStateStore(path).close()
+
+        store = SqliteStateStore(path)
+        batch = store.filter_unsent(papers, resend_on_update=False)
+        loop = [p for p in papers if store.should_send(p.arxiv_id, p.updated.isoformat(), False)]
+        assert [p.arxiv_id for p in batch] == [p.arxiv_id for p in loop]
+        assert len(batch) == args.candidates - args.candidates // 2
+        open_ms = _median_ms(_open, args.repeat)
+        batch_ms = _median_ms(lambda: store.filter_unsent(papers, resend_on_update=False), args.repeat)
+        loop_ms = _median_ms(
+            lambda: [p for p in papers if store.should_send(p.arxiv_id, p.updated.isoformat(), False)],
+            args.repeat,
+        )
+        store.close()
+        print(f"{rows:>8} {open_ms:9.2f} {batch_ms:17.2f} {loop_ms:20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from dataclasses import replace
+import threading
+from typing import Any, Callable, Iterator
+
+import pytest
+
+from app.config import Config, load_config
+from benchmarks.bench_smtp_session import _StandInSmtpServer
+
+
+@pytest.fixture
+def smtp_server() -> Iterator[Callable[[int], _StandInSmtpServer]]:
+    """启动本地 SMTP 替身服务器（.stats 记录连接数/邮件数/RCPT 数），测试结束后关闭。"""
+    servers: list[_StandInSmtpServer] = []
+
+    def start(drop_every: int = 0) -> _StandInSmtpServer:
+        server = _StandInSmtpServer(latency_s=0.0, drop_every=drop_every)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_cfg(monkeypatch) -> Callable[..., Config]:
+    """config.test.yaml 为底、发往给定 SMTP 端口的非 dry_run 配置；关键字参数覆盖其余字段。"""
+    monkeypatch.setenv("CONFIG_SNAPSHOT_DIR", "off")
+
+    def make(smtp_port: int, **overrides: Any) -> Config:
+        fields: dict[str, Any] = dict(
+            dry_run=False,
+            smtp_host="127.0.0.1",
+            smtp_port=smtp_port,
+            smtp_user="u",
+            smtp_pass="p",
+            smtp_use_ssl=False,
+            smtp_starttls=False,
+            mail_from="bot@example.com",
+            mail_to=["a@example.com", "b@example.com"],
+            mail_per_recipient=False,
+            mail_outbox_dir="",
+        )
+        fields.update(overrides)
+        return replace(load_config("config.test.yaml"), **fields)
+
+    return make
@@ -0,0 +1,49 @@
+"""
+FETCH_CONCURRENCY > 1 的抓取：用 benchmarks.bench_fetch_concurrent 里的本地 arXiv 替身服务器，
+不访问真实 API。
+"""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app import arxiv_client
+from app.arxiv_client import RateLimiter, iter_recent, iter_recent_concurrent
+from benchmarks.bench_fetch_concurrent import _StandInArxivServer
+
+CATS = ["cs.LG", "cs.AI"]
+
+
+@pytest.fixture
+def arxiv_server(monkeypatch):
+    server = _StandInArxivServer({"cs.LG": 120, "cs.AI": 10})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(arxiv_client, "ARXIV_API_URL", f"http://127.0.0.1:{server.server_address[1]}/api/query")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_matches_sequential(arxiv_server) -> None:
+    seq = [p.arxiv_id for p in iter_recent(CATS, keywords=[], max_results=100, limiter=RateLimiter(0))]
+    conc = [
+        p.arxiv_id
+        for p in iter_recent_concurrent(
+            CATS, keywords=[], max_results=100, max_workers=3, page_size=20, limiter=RateLimiter(0)
+        )
+    ]
+    assert len(seq) == 100
+    assert conc == seq
+
+
+def test_concurrent_yields_before_all_pages_fetched(arxiv_server) -> None:
+    # staged 模式直接把生成器交给流水线：第一篇产出时最多只发出了 max_workers 页的请求
+    it = iter_recent_concurrent(
+        CATS, keywords=[], max_results=130, max_workers=2, page_size=10, limiter=RateLimiter(0)
+    )
+    next(it)
+    assert arxiv_server.requests <= 2
+    assert len(list(it)) == 129
+    assert arxiv_server.requests == 13
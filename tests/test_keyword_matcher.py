@@ -0,0 +1,34 @@
+"""
+KeywordMatcher 的两种实现（pattern 少时 str.find，多时 Aho–Corasick）计数必须完全一致。
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from app.keyword_matcher import BOUNDARY_MODES, KeywordMatcher
+
+KEYWORDS = ["RL", "rlhf", "LLM", "language model", "aa", "a", "强化学习", "rl", "", "model-based"]
+TEXTS = [
+    "rlhf for llms in a real-world setting; rl, rl_x and (rl).",
+    "aaaa language models and a language model-based planner",
+    "基于强化学习的rl方法与强化学习rlhf",
+    "",
+]
+
+
+@pytest.mark.parametrize("boundary", BOUNDARY_MODES)
+def test_find_and_automaton_counts_match(boundary: str) -> None:
+    find = KeywordMatcher(KEYWORDS, boundary=boundary, automaton_min_patterns=len(KEYWORDS) + 1)
+    automaton = KeywordMatcher(KEYWORDS, boundary=boundary, automaton_min_patterns=0)
+    for text in TEXTS:
+        assert find.counts(text) == automaton.counts(text)
+        assert find.match(text) == automaton.match(text)
+
+
+def test_boundary_rules() -> None:
+    text = "rlhf in the real world with llms"
+    # "rl" 不误命中 "world"；left 模式下 "llm" 仍命中 "llms"，both 模式下不命中
+    assert KeywordMatcher(["rl", "llm"], boundary="none").counts(text) == {0: 2, 1: 1}
+    assert KeywordMatcher(["rl", "llm"], boundary="left").counts(text) == {0: 1, 1: 1}
+    assert KeywordMatcher(["rl", "llm"], boundary="both").counts(text) == {}
@@ -0,0 +1,67 @@
+"""
+SMTP 会话复用与断线重连：用 benchmarks.bench_smtp_session 里的本地替身服务器计数
+（连接数、邮件数、RCPT 数），不需要真实的 SMTP 服务。
+"""
+
+from __future__ import annotations
+
+from app import main
+from app.mailer import SmtpMailer
+from app.renderer import RenderedEmail
+from app.state_store import StateStore
+from benchmarks.bench_smtp_session import _StandInSmtpServer
+
+RCPTS = ["a@example.com", "b@example.com"]
+
+
+def _mailer(server: _StandInSmtpServer) -> SmtpMailer:
+    return SmtpMailer(
+        host="127.0.0.1",
+        port=server.server_address[1],
+        username="u",
+        password="p",
+        use_ssl=False,
+        starttls=False,
+        timeout_s=10,
+        max_retries=3,
+    )
+
+
+def _send_n(server: _StandInSmtpServer, n: int, per_recipient: bool = False) -> None:
+    with _mailer(server).session() as s:
+        for i in range(n):
+            s.send("bot@example.com", RCPTS, f"digest {i}", "body", "<p>body</p>", per_recipient=per_recipient)
+
+
+def test_session_uses_one_connection(smtp_server) -> None:
+    server = smtp_server()
+    _send_n(server, 7)
+    st = server.stats
+    assert (st.connections, st.messages, st.recipients) == (1, 7, 7 * len(RCPTS))
+
+
+def test_session_per_recipient_counts(smtp_server) -> None:
+    server = smtp_server()
+    _send_n(server, 7, per_recipient=True)
+    st = server.stats
+    assert (st.connections, st.messages, st.recipients) == (1, 7 * len(RCPTS), 7 * len(RCPTS))
+
+
+def test_session_reconnects_after_server_drop(smtp_server) -> None:
+    # 服务器每条连接收 3 封后断开：7 封需要 3 条连接，不丢也不重发
+    server = smtp_server(drop_every=3)
+    _send_n(server, 7)
+    st = server.stats
+    assert (st.connections, st.messages, st.recipients) == (3, 7, 7 * len(RCPTS))
+
+
+def test_send_split_digest_over_one_connection(smtp_server, make_cfg, tmp_path) -> None:
+    # MAIL_MAX_BYTES 把日报拆成多封时，单订阅路径（不传 session）也只握手一次
+    server = smtp_server()
+    cfg = make_cfg(server.server_address[1])
+    state = StateStore(str(tmp_path / "state.json"))
+    digests = [RenderedEmail(subject=f"part {k}", text="t", html="<p>h</p>") for k in range(4)]
+    main._send(cfg, state, digests, [("2610.00001v1", "2026-10-17T00:00:00+00:00")])
+    st = server.stats
+    assert (st.connections, st.messages) == (1, 4)
+    assert not state.should_send("2610.00001v1", "2026-10-17T00:00:00+00:00", False)
@@ -0,0 +1,66 @@
+"""
+MAIL_OUTBOX_DIR 模式下 state 的 queued 流程：写入 outbox 时记为 queued，投递确认后才算已发送；
+outbox 丢失（Actions 缓存被淘汰）后，下次运行把仍为 queued 的论文重新选入。
+"""
+
+from __future__ import annotations
+
+import shutil
+import socket
+
+from app import main
+from app.renderer import RenderedEmail
+from app.state_store import open_state_store
+
+UPDATED = "2026-10-17T00:00:00+00:00"
+SENT = [("2610.00001v1", UPDATED), ("2610.00002v2", UPDATED)]
+DIGESTS = [RenderedEmail(subject="digest", text="t", html="<p>h</p>")]
+
+
+def _closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_outbox_delivery_promotes_queued_to_sent(smtp_server, make_cfg, tmp_path) -> None:
+    server = smtp_server()
+    cfg = make_cfg(server.server_address[1], mail_outbox_dir=str(tmp_path / "outbox"))
+    state_path = str(tmp_path / "state.json")
+    state = open_state_store(state_path)
+
+    with main._mail_dispatch(cfg) as dispatcher:
+        main._send(cfg, state, DIGESTS, SENT, dispatcher=dispatcher)
+        # 写入 outbox 后立即保存的 state 里只是 queued
+        assert open_state_store(state_path).queued_ids() == ["2610.00001", "2610.00002"]
+    main._confirm_delivered(dispatcher, {"": state})
+
+    assert server.stats.messages == 1
+    reopened = open_state_store(state_path)
+    assert reopened.queued_ids() == []
+    assert not reopened.should_send("2610.00001v1", UPDATED, False)
+
+
+def test_lost_outbox_requeues_undelivered(make_cfg, tmp_path) -> None:
+    outbox_dir = str(tmp_path / "outbox")
+    # SMTP 不可达：邮件留在 outbox 里，state 保持 queued
+    cfg = make_cfg(_closed_port(), mail_outbox_dir=outbox_dir, mail_outbox_max_attempts=5)
+    state_path = str(tmp_path / "state.json")
+    state = open_state_store(state_path)
+    with main._mail_dispatch(cfg) as dispatcher:
+        main._send(cfg, state, DIGESTS, SENT, dispatcher=dispatcher)
+    main._confirm_delivered(dispatcher, {"": state})
+    assert open_state_store(state_path).queued_ids() == ["2610.00001", "2610.00002"]
+
+    # 邮件还在 outbox 里：下次运行不重新选入，等投递线程补发
+    state = open_state_store(state_path)
+    main._requeue_undelivered(cfg, state)
+    assert not state.should_send("2610.00001v1", UPDATED, False)
+
+    # outbox 目录丢失：仍为 queued 的论文重新选入
+    shutil.rmtree(outbox_dir)
+    state = open_state_store(state_path)
+    main._requeue_undelivered(cfg, state)
+    assert state.queued_ids() == []
+    assert state.should_send("2610.00001v1", UPDATED, False)
+    assert state.should_send("2610.00002v2", UPDATED, False)
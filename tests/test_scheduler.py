@@ -0,0 +1,43 @@
+"""
+plan_summaries 的预估 token：设置 DEEPSEEK_MAX_TOKENS 时每篇预留的输出不超过它。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.arxiv_client import ArxivPaper
+from app.filtering import FilterResult
+from app.scheduler import estimate_cost, plan_summaries
+from app.summarizer import OUTPUT_TOKENS_PER_PAPER
+
+
+def _result(i: int) -> FilterResult:
+    now = datetime.now(timezone.utc)
+    paper = ArxivPaper(
+        arxiv_id=f"2610.0000{i}v1",
+        title=f"Paper {i} on reinforcement learning",
+        summary="We study reinforcement learning. " * 20,
+        authors=[("Alice Example", "")],
+        categories=["cs.LG"],
+        published=now,
+        updated=now,
+        link_abs=f"http://arxiv.org/abs/2610.0000{i}v1",
+        link_pdf=None,
+    )
+    return FilterResult(paper=paper, score=1, matched_keywords=["reinforcement learning"])
+
+
+def test_estimate_cost_caps_output_at_max_tokens() -> None:
+    r = _result(1)
+    base = estimate_cost(r)
+    assert estimate_cost(r, 200) == base - OUTPUT_TOKENS_PER_PAPER + 200
+    # 上限大于默认预留时仍按默认预留估算
+    assert estimate_cost(r, 4000) == base
+
+
+def test_plan_fits_more_papers_with_max_tokens() -> None:
+    results = [_result(i) for i in range(4)]
+    budget = 2 * estimate_cost(results[0])
+    assert len(plan_summaries(results, token_budget=budget).selected) == 2
+    assert len(plan_summaries(results, token_budget=budget, max_tokens=100).selected) > 2
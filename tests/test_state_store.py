@@ -0,0 +1,70 @@
+"""
+queued 状态在三种 state 后端上的语义：queued 的条目去重时视为已发送，mark_delivered 后变为已发送，
+unmark 后重新可选；都要经过 save() 与重新打开后保持一致。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from app.state_store import SqliteStateStore, open_state_store
+
+UPDATED = "2026-10-17T00:00:00+00:00"
+
+
+@pytest.fixture(params=["repo", "journal", "sqlite"])
+def open_store(request, tmp_path):
+    path = str(tmp_path / "state.json")
+    return lambda: open_state_store(path, request.param)
+
+
+def test_queued_counts_as_sent_until_unmarked(open_store) -> None:
+    store = open_store()
+    store.mark_sent("2610.00001v1", UPDATED, queued=True)
+    store.mark_sent("2610.00002v1", UPDATED)
+    store.save()
+
+    store = open_store()
+    assert store.queued_ids() == ["2610.00001"]
+    assert not store.should_send("2610.00001v1", UPDATED, False)
+
+    store.unmark(["2610.00001"])
+    assert store.should_send("2610.00001v1", UPDATED, False)
+    store.save()
+
+    store = open_store()
+    assert store.queued_ids() == []
+    assert store.should_send("2610.00001v1", UPDATED, False)
+    assert not store.should_send("2610.00002v1", UPDATED, False)
+
+
+def test_mark_delivered_promotes_queued(open_store) -> None:
+    store = open_store()
+    store.mark_sent("2610.00001v1", UPDATED, queued=True)
+    store.mark_sent("2610.00002v1", UPDATED, queued=True)
+    store.save()
+
+    store = open_store()
+    # 不是 queued 的 id 不计数
+    assert store.mark_delivered(["2610.00001", "2610.09999"]) == 1
+    store.save()
+
+    store = open_store()
+    assert store.queued_ids() == ["2610.00002"]
+    assert not store.should_send("2610.00001v1", UPDATED, False)
+
+
+def test_sqlite_adds_status_column_to_old_database(tmp_path) -> None:
+    path = str(tmp_path / "state.sqlite3")
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE sent (id TEXT PRIMARY KEY, updated TEXT NOT NULL, sent_at TEXT NOT NULL)")
+        conn.execute("INSERT INTO sent VALUES ('2610.00001', ?, 'x')", (UPDATED,))
+    conn.close()
+
+    store = SqliteStateStore(path)
+    assert store.queued_ids() == []
+    assert not store.should_send("2610.00001v1", UPDATED, False)
+    store.close()